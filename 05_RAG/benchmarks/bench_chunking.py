@@ -0,0 +1,43 @@
+# bench_chunking.py - Chunking throughput and chunk-size spread, character vs token splitters
+#
+# Usage: python bench_chunking.py [path/to/file.pdf]
+
+import os
+import statistics
+import sys
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.chunking import TokenTextChunker
+from rag_common.pdf_extract import load_pdf_parallel
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pdf_reader", "nodejs.pdf")
+REPEATS = 5
+
+
+def run(label, splitter, docs, counter):
+    total_bytes = sum(len(doc.page_content.encode("utf-8")) for doc in docs) * REPEATS
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        # one page at a time, like IngestionPipeline does
+        chunks = [chunk for doc in docs for chunk in splitter.split_documents([doc])]
+    elapsed = time.perf_counter() - start
+    tokens = [counter.count_tokens(chunk.page_content) for chunk in chunks]
+    print(f"{label:<28} {len(docs) * REPEATS / elapsed:>9.1f} pages/s {total_bytes / elapsed / 1e6:>7.2f} MB/s "
+          f"{len(chunks):>6} chunks  tokens mean {statistics.mean(tokens):6.1f} "
+          f"stdev {statistics.pstdev(tokens):6.1f} min {min(tokens):4d} max {max(tokens):4d}")
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PDF
+    docs = load_pdf_parallel(file_path)
+    token_chunker = TokenTextChunker(chunk_size=250, chunk_overlap=50)  # also builds the token table up front
+    print(f"PDF: {file_path} ({len(docs)} pages)")
+
+    run("characters (1000/200)", RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len),
+        docs, token_chunker)
+    run("recursive tiktoken (250/50)", RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        model_name="text-embedding-3-small", chunk_size=250, chunk_overlap=50), docs, token_chunker)
+    run("TokenTextChunker (250/50)", token_chunker, docs, token_chunker)
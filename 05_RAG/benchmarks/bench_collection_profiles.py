@@ -0,0 +1,101 @@
+# bench_collection_profiles.py - Upload time, search latency, recall@k and RAM per collection profile
+#
+# Creates one collection per profile in Qdrant local mode (in memory, or on disk with
+# --path), uploads the same vectors in pipeline-sized batches, finishes the load (builds a
+# deferred index) and runs every query with the profile's search params. Recall@k is
+# measured against exact top-k. Uses the vectors saved by bench_dimensions.py, or random
+# ones with --synthetic.
+#
+# Local mode scans vectors exactly and ignores HNSW/quantization settings, so there the
+# numbers show the upload path and API overhead only; pass --qdrant-url to measure how the
+# settings behave on a server. RAM is estimated from each profile's settings either way.
+#
+# Usage: python bench_collection_profiles.py [--path ./qdrant_bench] [--qdrant-url URL]
+#                                            [--dimensions 1536] [--k 4] [--synthetic]
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_dimensions import load_vectors, normalize
+from rag_common.collection_profiles import BINARY_MIN_DIMENSIONS, PROFILES, CollectionProfile
+
+BATCH_SIZE = 64  # IngestionPipeline's default
+
+
+def estimated_ram(profile: CollectionProfile, count: int, dimensions: int) -> int:
+    """Bytes the profile keeps in RAM: original and quantized vectors plus the HNSW graph"""
+    ram = 0 if profile.on_disk_vectors else count * dimensions * 4
+    if profile.quantization == "binary" and dimensions >= BINARY_MIN_DIMENSIONS:
+        ram += count * dimensions // 8
+    elif profile.quantization:
+        ram += count * dimensions
+    if not profile.on_disk_index:
+        ram += count * profile.m * 2 * 4
+    return ram
+
+
+def run(client: QdrantClient, profile: CollectionProfile, docs: np.ndarray, queries: np.ndarray,
+        truth: np.ndarray, k: int):
+    name = f"bench_profile_{profile.name}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    profile.create_collection(client, name, docs.shape[1])
+
+    start = time.perf_counter()
+    for offset in range(0, len(docs), BATCH_SIZE):
+        batch = docs[offset:offset + BATCH_SIZE]
+        client.upsert(name, points=models.Batch(ids=list(range(offset, offset + len(batch))), vectors=batch.tolist()))
+    upload = time.perf_counter() - start
+    start = time.perf_counter()
+    profile.finish_load(client, name, wait=True)
+    index = time.perf_counter() - start
+
+    params = profile.search_params()
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        begin = time.perf_counter()
+        hits = client.query_points(name, query=query.tolist(), limit=k, search_params=params).points
+        latencies.append((time.perf_counter() - begin) * 1000)
+        recalls.append(len({hit.id for hit in hits} & set(expected.tolist())) / k)
+    client.delete_collection(name)
+
+    print(f"{profile.name:<12} upload {len(docs) / upload:8.0f} pts/s  index {index:6.2f}s  "
+          f"p50 {statistics.median(latencies):6.2f} ms  p95 {np.percentile(latencies, 95):6.2f} ms  "
+          f"recall@{k} {statistics.mean(recalls):.3f}  RAM ~{estimated_ram(profile, *docs.shape) / 1e6:7.2f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare collection profiles")
+    parser.add_argument("--path", default=None, help="Local mode on disk at this path (default: in memory)")
+    parser.add_argument("--qdrant-url", default=None, help="Benchmark against a server instead of local mode")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Truncate the vectors to this size first")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+
+    docs, queries = load_vectors(args.synthetic)
+    docs, queries = normalize(docs[:, :args.dimensions]), normalize(queries[:, :args.dimensions])
+    truth = np.argsort(-(queries @ docs.T), axis=1)[:, :args.k]
+
+    if args.qdrant_url:
+        client, target = QdrantClient(url=args.qdrant_url), f"server {args.qdrant_url}"
+    elif args.path:
+        client, target = QdrantClient(path=args.path), f"local mode at {args.path}"
+    else:
+        client, target = QdrantClient(":memory:"), "local mode in memory"
+    print(f"{len(docs)} vectors x {docs.shape[1]} dims, {len(queries)} queries, {target}")
+    try:
+        for profile in PROFILES.values():
+            run(client, profile, docs, queries, truth, args.k)
+    finally:
+        client.close()
+        if args.path and not args.qdrant_url:
+            shutil.rmtree(args.path, ignore_errors=True)
@@ -0,0 +1,130 @@
+# bench_dimensions.py - Index size, search latency and recall@k per embedding dimension
+#
+# Embeds the nodejs.pdf chunks and a set of Node.js questions once at full size (1536),
+# saves them next to the embedding cache, and from then on runs offline: every reduced size
+# is the Matryoshka truncation of the saved vectors, exactly what the API returns for
+# `dimensions=`. Recall@k is measured against exact full-size top-k.
+#
+# Usage: python bench_dimensions.py [--qdrant-url http://localhost:6333] [--k 4] [--synthetic]
+#   --synthetic  skip the API and use random vectors with decaying per-dimension variance
+#                (checks the mechanics only; recall numbers are not meaningful)
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.chunking import TokenTextChunker
+from rag_common.embedding_cache import DEFAULT_CACHE_PATH, MODEL_DIMENSIONS, get_embedding_model
+from rag_common.pdf_extract import load_pdf_parallel
+
+PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pdf_reader", "nodejs.pdf")
+VECTORS_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_PATH), "bench_dimensions.npz")
+MODEL = "text-embedding-3-small"
+DIMENSIONS = (256, 512, 768, 1024, 1536)
+HNSW_M = 16  # Qdrant's default
+QUESTIONS = [
+    "What is Node.js?",
+    "How does the event loop work?",
+    "How do I read a file asynchronously?",
+    "What is the difference between require and import?",
+    "How do I create an HTTP server?",
+    "What are streams and how do I pipe them?",
+    "How do I handle errors in callbacks?",
+    "What are promises and async/await?",
+    "How do I install packages with npm?",
+    "What is package.json used for?",
+    "How do I use the EventEmitter class?",
+    "How do I read environment variables?",
+    "How do I spawn a child process?",
+    "What is the Buffer class?",
+    "How do I build a REST API with Express?",
+    "How do I connect to a database?",
+    "How do I debug a Node.js application?",
+    "What is middleware?",
+    "How do I export functions from a module?",
+    "How do I use the path module?",
+    "How do I work with timers like setTimeout and setImmediate?",
+    "What is process.nextTick?",
+    "How do I handle uncaught exceptions?",
+    "How do I parse JSON?",
+    "How do I write unit tests?",
+]
+
+
+def load_vectors(synthetic: bool):
+    """Full-size (documents, queries) as unit-length float32 matrices"""
+    if synthetic:
+        rng = np.random.default_rng(0)
+        full = MODEL_DIMENSIONS[MODEL]
+        scale = 1.0 / np.sqrt(np.arange(1, full + 1))  # most of the signal in the leading dimensions
+        docs = rng.standard_normal((5000, full)) * scale
+        queries = docs[rng.choice(len(docs), len(QUESTIONS) * 4)] + rng.standard_normal((len(QUESTIONS) * 4, full)) * scale
+    elif os.path.exists(VECTORS_PATH):
+        saved = np.load(VECTORS_PATH)
+        docs, queries = saved["docs"], saved["queries"]
+    else:
+        print(f"Embedding {PDF} once at full size (cached in {VECTORS_PATH})...")
+        chunks = TokenTextChunker(chunk_size=250, chunk_overlap=50).split_documents(load_pdf_parallel(PDF))
+        embedding = get_embedding_model(MODEL)
+        docs = np.asarray(embedding.embed_documents([chunk.page_content for chunk in chunks]))
+        queries = np.asarray(embedding.embed_documents(QUESTIONS))
+        np.savez(VECTORS_PATH, docs=docs, queries=queries)
+    return normalize(docs), normalize(queries)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def estimated_bytes(count: int, dimensions: int) -> int:
+    """float32 vectors plus HNSW level-0 links (2*m neighbour ids of 4 bytes per point)"""
+    return count * dimensions * 4 + count * HNSW_M * 2 * 4
+
+
+def run(client: QdrantClient, docs: np.ndarray, queries: np.ndarray, dimensions: int, truth: np.ndarray, k: int):
+    docs, queries = normalize(docs[:, :dimensions]), normalize(queries[:, :dimensions])
+    name = f"bench_dimensions_{dimensions}"
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(name, vectors_config=models.VectorParams(size=dimensions, distance=models.Distance.COSINE))
+    for start in range(0, len(docs), 256):
+        batch = docs[start:start + 256]
+        client.upsert(name, points=models.Batch(ids=list(range(start, start + len(batch))), vectors=batch.tolist()),
+                      wait=True)
+
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        begin = time.perf_counter()
+        hits = client.query_points(name, query=query.tolist(), limit=k).points
+        latencies.append((time.perf_counter() - begin) * 1000)
+        recalls.append(len({hit.id for hit in hits} & set(expected.tolist())) / k)
+    client.delete_collection(name)
+
+    full = estimated_bytes(len(docs), MODEL_DIMENSIONS[MODEL])
+    size = estimated_bytes(len(docs), dimensions)
+    print(f"{dimensions:>5} dims  {size / 1e6:8.2f} MB ({full / size:4.1f}x smaller)  "
+          f"p50 {statistics.median(latencies):6.2f} ms  p95 {np.percentile(latencies, 95):6.2f} ms  "
+          f"recall@{k} {statistics.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index size, search latency and recall@k per embedding dimension")
+    parser.add_argument("--qdrant-url", default=None, help="Benchmark against a server (default: in-process Qdrant)")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+
+    docs, queries = load_vectors(args.synthetic)
+    # exact top-k over the full-size vectors is the reference every size is scored against
+    truth = np.argsort(-(queries @ docs.T), axis=1)[:, :args.k]
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+    print(f"{len(docs)} chunks, {len(queries)} queries, {'server ' + args.qdrant_url if args.qdrant_url else 'in-process'}")
+    for dimensions in DIMENSIONS:
+        run(client, docs, queries, dimensions, truth, args.k)
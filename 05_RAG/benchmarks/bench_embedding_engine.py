@@ -0,0 +1,107 @@
+# bench_embedding_engine.py - Embedding throughput against a local stand-in embedding server
+#
+# Starts a fake OpenAI-compatible /v1/embeddings endpoint (fixed latency per request, a bit
+# per token, and random 429s) and embeds the nodejs.pdf chunks with:
+#   - LangChain's OpenAIEmbeddings (sequential batches of 1000 texts)
+#   - AsyncEmbeddingEngine at increasing concurrency
+#
+# Usage: python bench_embedding_engine.py [max_tokens_per_request]
+
+import asyncio
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+
+import openai
+from aiohttp import web
+from langchain_openai import OpenAIEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.embedding_engine import AsyncEmbeddingEngine
+from rag_common.pdf_extract import load_pdf_parallel
+
+PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pdf_reader", "nodejs.pdf")
+PORT = 8765
+DIMENSIONS = 16
+REQUEST_LATENCY = 0.15  # seconds of round trip per request
+TOKEN_LATENCY = 0.000002  # extra seconds per input token
+RATE_LIMIT_PROBABILITY = 0.05
+
+
+def fake_vector(text: str):
+    digest = hashlib.sha256(str(text).encode("utf-8")).digest()
+    return [b / 255 for b in digest[:DIMENSIONS]]
+
+
+async def handle_embeddings(request):
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    if random.random() < RATE_LIMIT_PROBABILITY:
+        return web.json_response({"error": {"message": "Rate limit", "type": "rate_limit"}}, status=429,
+                                 headers={"retry-after": "0.2"})
+    tokens = sum(len(str(text)) // 4 for text in inputs)
+    await asyncio.sleep(REQUEST_LATENCY + tokens * TOKEN_LATENCY)
+    return web.json_response({
+        "object": "list",
+        "model": body["model"],
+        "data": [{"object": "embedding", "index": i, "embedding": fake_vector(text)} for i, text in enumerate(inputs)],
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    })
+
+
+def start_server():
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/embeddings", handle_embeddings)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", PORT).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{PORT}/v1"
+
+
+def report(label, texts, elapsed, extra=""):
+    print(f"{label:<32} {elapsed:>7.2f}s {len(texts) / elapsed:>9.1f} chunks/s {extra}")
+
+
+if __name__ == "__main__":
+    max_tokens_per_request = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    base_url = start_server()
+
+    docs = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200).split_documents(
+        load_pdf_parallel(PDF, max_workers=1)
+    )
+    texts = [doc.page_content for doc in docs] * 4  # ~1k chunks
+    expected = [fake_vector(text) for text in texts]
+    print(f"{len(texts)} chunks, {REQUEST_LATENCY * 1000:.0f}ms/request, {RATE_LIMIT_PROBABILITY:.0%} 429s, "
+          f"max {max_tokens_per_request} tokens/request")
+
+    baseline = OpenAIEmbeddings(model="text-embedding-3-small", base_url=base_url, api_key="bench",
+                                check_embedding_ctx_length=False, chunk_size=64, max_retries=10)
+    start = time.perf_counter()
+    baseline.embed_documents(texts)
+    report("OpenAIEmbeddings (64/request)", texts, time.perf_counter() - start)
+
+    for concurrency in (1, 2, 4, 8, 16):
+        engine = AsyncEmbeddingEngine(
+            max_concurrency=concurrency,
+            max_tokens_per_request=max_tokens_per_request,
+            client=openai.AsyncOpenAI(base_url=base_url, api_key="bench", max_retries=0),
+        )
+        start = time.perf_counter()
+        vectors = engine.embed(texts)
+        elapsed = time.perf_counter() - start
+        ordered = "ok" if vectors == expected else "OUT OF ORDER"
+        report(f"engine concurrency={concurrency}", texts, elapsed,
+               f"({engine.requests_sent} requests, {engine.retries} retries, order {ordered})")
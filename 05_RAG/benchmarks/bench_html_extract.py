@@ -0,0 +1,74 @@
+# bench_html_extract.py - MB/s of the HTML-to-text backends on a saved corpus of chai-docs pages
+#
+# Usage: python bench_html_extract.py [corpus_dir]          benchmark every *.html in corpus_dir
+#        python bench_html_extract.py --save [corpus_dir]   download the chai-docs seed pages first
+
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.crawler import AsyncCrawler
+from rag_common.html_extract import EXTRACTORS, get_extractor
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "chai_docs_html")
+REPEATS = 5
+
+
+def save_corpus(corpus_dir):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "website_reader"))
+    from indexing import seed_urls
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    for result in asyncio.run(AsyncCrawler().fetch_all(seed_urls)):
+        if result.error:
+            print(f"Error fetching {result.url}: {result.error}")
+            continue
+        name = urlsplit(result.url).path.strip("/").replace("/", "__") + ".html"
+        with open(os.path.join(corpus_dir, name), "wb") as f:
+            f.write(result.content)
+    print(f"Saved corpus to {corpus_dir}")
+
+
+def load_corpus(corpus_dir):
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".html"):
+            with open(os.path.join(corpus_dir, name), "rb") as f:
+                pages.append(f.read())
+    return pages
+
+
+def run(name, pages):
+    extractor = get_extractor(name)
+    total_bytes = sum(len(page) for page in pages) * REPEATS
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        texts = [extractor.extract(page).text for page in pages]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<8} {total_bytes / elapsed / 1e6:>8.2f} MB/s {elapsed / (len(pages) * REPEATS) * 1000:>8.2f} ms/page")
+    return texts
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "--save":
+        corpus_dir = args[1] if len(args) > 1 else DEFAULT_CORPUS
+        save_corpus(corpus_dir)
+    else:
+        corpus_dir = args[0] if args else DEFAULT_CORPUS
+
+    pages = load_corpus(corpus_dir)
+    if not pages:
+        sys.exit(f"No .html files in {corpus_dir}, run with --save first")
+    print(f"Corpus: {len(pages)} pages, {sum(len(p) for p in pages) / 1e6:.2f} MB")
+
+    reference = run("bs4", pages)
+    for name in EXTRACTORS:
+        if name == "bs4":
+            continue
+        texts = run(name, pages)
+        differing = sum(a != b for a, b in zip(texts, reference))
+        print(f"  text identical to bs4 on {len(pages) - differing}/{len(pages)} pages")
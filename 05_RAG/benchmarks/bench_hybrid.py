@@ -0,0 +1,92 @@
+# bench_hybrid.py - Recall@k of dense vs hybrid (dense + BM25, RRF) retrieval on identifier questions
+#
+# Indexes the nodejs.pdf chunks into Qdrant local mode through IngestionPipeline (so each
+# chunk gets its BM25 sparse vector), then asks "How do I use <identifier>?" for identifiers
+# found in only a few chunks: dotted names (fs.readFile), camelCase functions (setImmediate),
+# ERROR_CODES and npm/git commands. A question counts as found at k when a chunk containing
+# its identifier is among the top k. Embeddings go through the embedding cache, so only the
+# first run calls the API.
+#
+# Usage: python bench_hybrid.py [--queries 40] [--candidates 20]
+
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_dimensions import MODEL, PDF
+from rag_common.chunking import TokenTextChunker
+from rag_common.clients import get_vector_store
+from rag_common.collection_profiles import get_profile
+from rag_common.embedding_cache import get_embedding_model
+from rag_common.hybrid import STOPWORDS
+from rag_common.pdf_extract import load_pdf_parallel
+from rag_common.pipeline import IngestionPipeline
+
+KS = (1, 2, 4, 8)
+IDENTIFIER = re.compile(
+    r"\b[a-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+(?:\(\))?"  # fs.readFile, process.nextTick()
+    r"|\b[a-z]+[A-Z]\w*\b"  # setImmediate
+    r"|\b[A-Z][A-Z0-9]*_[A-Z0-9_]+\b"  # ERR_REQUIRE_ESM
+    r"|\b(?:npm|git) [a-z][\w-]*"  # npm ci, git stash
+)
+
+
+def identifier_questions(chunks, count: int, max_chunks: int = 3, seed: int = 0):
+    """(question, indices of the chunks containing its identifier) for rare identifiers"""
+    frequency = Counter(token for chunk in chunks for token in set(IDENTIFIER.findall(chunk.page_content)))
+    tokens = sorted(token for token, seen in frequency.items()
+                    if seen <= max_chunks and len(token) > 4 and token.split()[-1] not in STOPWORDS)  # not "npm into"
+    random.Random(seed).shuffle(tokens)
+    return [
+        (f"How do I use {token}?", {i for i, chunk in enumerate(chunks) if token in chunk.page_content})
+        for token in tokens[:count]
+    ]
+
+
+def evaluate(name: str, search, questions, vectors):
+    found = {k: [] for k in KS}
+    latencies = []
+    for (question, relevant), vector in zip(questions, vectors):
+        begin = time.perf_counter()
+        docs = search(question, vector, max(KS))
+        latencies.append((time.perf_counter() - begin) * 1000)
+        ranks = [doc.metadata["chunk"] for doc in docs]
+        for k in KS:
+            found[k].append(bool(relevant & set(ranks[:k])))
+    print(f"{name:<8} " + "  ".join(f"recall@{k} {statistics.mean(found[k]):.3f}" for k in KS)
+          + f"  p50 {statistics.median(latencies):6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense vs hybrid recall@k on identifier questions")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--candidates", type=int, default=20, help="Depth of each ranking before fusion")
+    args = parser.parse_args()
+
+    chunks = TokenTextChunker(chunk_size=250, chunk_overlap=50).split_documents(load_pdf_parallel(PDF))
+    chunks = [Document(page_content=chunk.page_content, metadata=dict(chunk.metadata, chunk=i))
+              for i, chunk in enumerate(chunks)]
+    questions = identifier_questions(chunks, args.queries)
+    print(f"{len(chunks)} chunks, {len(questions)} identifier questions")
+
+    client = QdrantClient(":memory:")
+    embedding = get_embedding_model(MODEL)
+    IngestionPipeline(client, "bench_hybrid", embedding, text_splitter=None, profile=get_profile("default")).run(chunks)
+    vector_store = get_vector_store(client, "bench_hybrid", MODEL)
+    vectors = embedding.embed_documents([question for question, _ in questions])
+
+    evaluate("dense", lambda query, vector, k: vector_store.similarity_search_by_vector(vector, k=k),
+             questions, vectors)
+    evaluate("hybrid", lambda query, vector, k: vector_store.hybrid_search(query, vector, k=k,
+                                                                          candidates=args.candidates),
+             questions, vectors)
+    client.close()
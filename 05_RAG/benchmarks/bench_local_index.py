@@ -0,0 +1,99 @@
+# bench_local_index.py - Search latency, recall@k and size of the local index vs Qdrant local mode
+#
+# Loads the same vectors into Qdrant local mode (in memory) and into a LocalVectorIndex per
+# storage type (float16 and int8 exact scans, plus an HNSW graph when hnswlib is installed),
+# then runs every query against each. Recall@k is measured against exact float32 top-k.
+# Uses the vectors saved by bench_dimensions.py, or random ones with --synthetic.
+#
+# Usage: python bench_local_index.py [--dimensions 1536] [--k 4] [--hnsw-m 16] [--ef 64] [--synthetic]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from bench_dimensions import load_vectors, normalize
+from rag_common.local_index import LocalVectorIndex
+
+BATCH_SIZE = 1000
+
+
+def report(name: str, search, queries: np.ndarray, truth: np.ndarray, k: int, size: int, build: float):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        begin = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - begin) * 1000)
+        recalls.append(len(set(found) & set(expected.tolist())) / k)
+    print(f"{name:<18} build {build:6.2f}s  p50 {statistics.median(latencies):7.3f} ms  "
+          f"p95 {np.percentile(latencies, 95):7.3f} ms  recall@{k} {statistics.mean(recalls):.3f}  "
+          f"size {size / 1e6:7.2f} MB")
+
+
+def run_qdrant(docs: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int):
+    client = QdrantClient(":memory:")
+    start = time.perf_counter()
+    client.create_collection("bench_local_index", vectors_config=models.VectorParams(
+        size=docs.shape[1], distance=models.Distance.COSINE))
+    for offset in range(0, len(docs), BATCH_SIZE):
+        batch = docs[offset:offset + BATCH_SIZE]
+        client.upsert("bench_local_index", points=models.Batch(ids=list(range(offset, offset + len(batch))),
+                                                                 vectors=batch.tolist()))
+    build = time.perf_counter() - start
+
+    def search(query):
+        hits = client.query_points("bench_local_index", query=query.tolist(), limit=k).points
+        return [hit.id for hit in hits]
+
+    report("qdrant local mode", search, queries, truth, k, docs.nbytes, build)
+    client.close()
+
+
+def run_local(name: str, directory: str, docs: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int,
+              dtype: str, hnsw_m: int = 0, ef: int = 64):
+    start = time.perf_counter()
+    index = LocalVectorIndex.create(directory, docs.shape[1], dtype=dtype, hnsw_m=hnsw_m, ef=ef, capacity=len(docs))
+    for offset in range(0, len(docs), BATCH_SIZE):
+        batch = docs[offset:offset + BATCH_SIZE]
+        ids = [str(i) for i in range(offset, offset + len(batch))]
+        index.add(ids, batch, [""] * len(batch), [{}] * len(batch))
+    index.search(queries[0], k)  # warms the page cache with the memory-mapped matrix
+    build = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+
+    def search(query):
+        return [int(point_id) for point_id, _, _, _ in index.search(query, k)]
+
+    report(name, search, queries, truth, k, size, build)
+    index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the local vector index with Qdrant local mode")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Truncate the vectors to this size first")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--hnsw-m", type=int, default=16, help="Edges per node of the HNSW variant")
+    parser.add_argument("--ef", type=int, default=64, help="HNSW search beam width")
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+
+    docs, queries = load_vectors(args.synthetic)
+    docs, queries = normalize(docs[:, :args.dimensions]), normalize(queries[:, :args.dimensions])
+    truth = np.argsort(-(queries @ docs.T), axis=1)[:, :args.k]
+    print(f"{len(docs)} vectors x {docs.shape[1]} dims, {len(queries)} queries")
+
+    run_qdrant(docs, queries, truth, args.k)
+    with tempfile.TemporaryDirectory() as root:
+        for dtype in ("float16", "int8"):
+            run_local(f"local {dtype}", os.path.join(root, dtype), docs, queries, truth, args.k, dtype)
+        try:
+            run_local(f"local hnsw m={args.hnsw_m}", os.path.join(root, "hnsw"), docs, queries, truth, args.k,
+                      "float16", hnsw_m=args.hnsw_m, ef=args.ef)
+        except ImportError as e:
+            print(f"local hnsw         skipped: {e}")
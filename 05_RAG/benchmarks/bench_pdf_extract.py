@@ -0,0 +1,39 @@
+# bench_pdf_extract.py - Pages/second of PDF text extraction by worker count
+#
+# Usage: python bench_pdf_extract.py [path/to/file.pdf] [max_workers]
+
+import os
+import sys
+import time
+
+from langchain_community.document_loaders import PyPDFLoader
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.pdf_extract import load_pdf_parallel
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pdf_reader", "nodejs.pdf")
+
+
+def run(label, load):
+    start = time.perf_counter()
+    docs = load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(docs):>6} pages {elapsed:>8.2f}s {len(docs) / elapsed:>10.1f} pages/s")
+    return docs
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PDF
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    print(f"PDF: {file_path} ({os.cpu_count()} CPUs)")
+    baseline = run("PyPDFLoader.load()", lambda: PyPDFLoader(file_path).load())
+
+    workers = 1
+    while workers <= max_workers:
+        docs = run(f"parallel workers={workers}", lambda: load_pdf_parallel(file_path, max_workers=workers))
+        same = [d.page_content for d in docs] == [d.page_content for d in baseline] and \
+            [d.metadata["page_label"] for d in docs] == [d.metadata["page_label"] for d in baseline]
+        if not same:
+            print("  ! output differs from PyPDFLoader")
+        workers *= 2
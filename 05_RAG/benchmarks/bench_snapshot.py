@@ -0,0 +1,89 @@
+# bench_snapshot.py - Export and rebuild a collection from Arrow/Parquet snapshots
+#
+# Fills a Qdrant local-mode collection with synthetic chunks (text of chunk size, metadata,
+# vectors), then per snapshot format reports the file size, export time, raw read time of the
+# memory-mapped file and the time to rebuild a fresh collection from it. For comparison it
+# prints what re-embedding the same chunks would cost at the given embedding throughput.
+#
+# Usage: python bench_snapshot.py [points] [dimensions] [--qdrant-url URL] [--embed-rate 2000]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.collection_profiles import get_profile
+from rag_common.snapshot import export_collection, read_snapshot, restore_collection
+
+SOURCE = "bench_snapshot_source"
+
+
+def fill(client: QdrantClient, points: int, dimensions: int):
+    rng = np.random.default_rng(0)
+    client.create_collection(SOURCE, vectors_config=models.VectorParams(size=dimensions,
+                                                                        distance=models.Distance.COSINE))
+    text = "lorem ipsum dolor sit amet " * 40  # ~1000 characters, a 250-token chunk
+    for start in range(0, points, 1000):
+        count = min(1000, points - start)
+        client.upload_collection(
+            SOURCE,
+            ids=[str(uuid.uuid4()) for _ in range(count)],
+            vectors=rng.standard_normal((count, dimensions)).astype(np.float32),
+            payload=[{"page_content": text, "metadata": {"source": "bench.pdf", "page": start + i},
+                      "content_hash": uuid.uuid4().hex} for i in range(count)],
+            wait=True,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot export/rebuild timings")
+    parser.add_argument("points", nargs="?", type=int, default=20000)
+    parser.add_argument("dimensions", nargs="?", type=int, default=1536)
+    parser.add_argument("--qdrant-url", default=None, help="Benchmark against a server (default: local mode)")
+    parser.add_argument("--embed-rate", type=float, default=2000, help="Chunks/s the embedding API sustains")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+    if client.collection_exists(SOURCE):
+        client.delete_collection(SOURCE)
+    fill(client, args.points, args.dimensions)
+    print(f"{args.points} points x {args.dimensions} dims; re-embedding them at {args.embed_rate:.0f} chunks/s "
+          f"would take {args.points / args.embed_rate:.1f}s plus the API bill")
+
+    workdir = tempfile.mkdtemp(prefix="bench_snapshot_")
+    try:
+        for name, dtype in (("arrow", "float16"), ("arrow", "float32"), ("parquet", "float16")):
+            path = os.path.join(workdir, f"snapshot_{dtype}.{name}")
+            target = f"bench_snapshot_{name}_{dtype}"
+            if client.collection_exists(target):
+                client.delete_collection(target)
+
+            start = time.perf_counter()
+            export_collection(client, SOURCE, path, dtype=dtype)
+            exported = time.perf_counter() - start
+
+            # mapping the file and decoding every vector to float32, without any upload
+            start = time.perf_counter()
+            rows = 0
+            for batch in read_snapshot(path):
+                batch.column("vector").flatten().to_numpy(zero_copy_only=False).astype(np.float32)
+                rows += len(batch)
+            read = time.perf_counter() - start
+
+            start = time.perf_counter()
+            restore_collection(path, client, target, profile=get_profile("bulk-load"))
+            restored = time.perf_counter() - start
+            client.delete_collection(target)
+
+            print(f"{name:<8} {dtype:<8} {os.path.getsize(path) / 1e6:8.1f} MB  export {exported:6.2f}s  "
+                  f"read {read:6.2f}s ({rows} rows)  rebuild {restored:6.2f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        client.delete_collection(SOURCE)
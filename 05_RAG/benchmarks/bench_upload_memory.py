@@ -0,0 +1,72 @@
+# bench_upload_memory.py - Python heap peak (tracemalloc) of ingesting an uploaded PDF
+#
+# Compares the old Streamlit path (upload.read() -> temp file -> pypdf.PdfReader(path), which
+# loads the whole file into a BytesIO in every process that opens it) with lazy_load_pdf_buffer,
+# for one upload and for several concurrent uploads. Only the calling process is traced; pool
+# workers memory-map the spill file, so they share its pages instead of each copying it.
+#
+# Usage: python bench_upload_memory.py [path/to/file.pdf] [concurrent_uploads]
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+
+import pypdf
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.pdf_extract import count_pdf_pages, lazy_load_pdf_buffer
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pdf_reader", "nodejs.pdf")
+
+
+class Upload(io.BytesIO):
+    """Stand-in for Streamlit's UploadedFile (a named BytesIO)"""
+    name = "upload.pdf"
+
+
+def old_path(upload):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        tmp_file.write(upload.read())
+    try:
+        for page in pypdf.PdfReader(tmp_file.name).pages:
+            page.extract_text()
+    finally:
+        os.unlink(tmp_file.name)
+
+
+def new_path(upload, max_workers):
+    count_pdf_pages(upload)
+    for _ in lazy_load_pdf_buffer(upload, max_workers=max_workers):
+        pass
+
+
+def measure(label, ingest, data, uploads):
+    ingest(Upload(data))  # warm up imports and the process pool outside the trace
+    # The upload buffers exist before ingestion starts, as they do in Streamlit
+    buffers = [Upload(data) for _ in range(uploads)]
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    threads = [threading.Thread(target=ingest, args=(buffer,)) for buffer in buffers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    print(f"{label:<38} uploads={uploads}  peak {peak / 1e6:8.1f} MB  ({peak / len(data):.1f}x the PDF)")
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PDF
+    concurrent = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with open(file_path, "rb") as f:
+        data = f.read()
+    print(f"PDF: {file_path} ({len(data) / 1e6:.1f} MB)")
+
+    for uploads in (1, concurrent):
+        measure("read() + temp file + PdfReader(path)", old_path, data, uploads)
+        measure("lazy_load_pdf_buffer in-process", lambda upload: new_path(upload, 1), data, uploads)
+        measure("lazy_load_pdf_buffer 4 workers", lambda upload: new_path(upload, 4), data, uploads)
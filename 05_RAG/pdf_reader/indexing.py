@@ -1,33 +1,109 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-#step-1: pdf to text
-# It breaks down the pdf page by page into an array. Each array index consists one page
-file_path = "./nodejs.pdf"
-loader = PyPDFLoader(file_path)
-docs = loader.load()
-
-#step-2:
-# Chunking
-text_splitter = RecursiveCharacterTextSplitter(
-    # Set a really small chunk size, just to show.
-    chunk_size=1000,
-    chunk_overlap=200,
-    length_function=len,
-    is_separator_regex=False,
-)
-splited_doc = text_splitter.split_documents(documents=docs)
-
-# Vector Embeddings
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small"
-)
-
-qdrant = QdrantVectorStore.from_documents(
-    documents = splited_doc,
-    embedding = embedding_model,
-    url='http://localhost:6333',
-    prefer_grpc=True,  # Uses port 6334
-    collection_name="my_documents",
-)
\ No newline at end of file
+import argparse
+import os
+import sys
+
+from qdrant_client import QdrantClient
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.bulk_ingest import BulkIngestor
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.collection_config import DimensionMismatchError, get_collection_embedding_model
+from rag_common.collection_profiles import PROFILES, get_profile
+from rag_common.dedup import get_dedup_filter
+from rag_common.page_cache import DEFAULT_PAGE_CACHE_PATH
+from rag_common.pipeline import IngestionPipeline
+from rag_common.snapshot import default_snapshot_path, export_collection
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Index PDFs (files or whole directory trees) into Qdrant")
+    parser.add_argument("paths", nargs="*", default=["./nodejs.pdf"], help="PDF files and/or directories to index")
+    parser.add_argument("--collection", default="my_documents", help="Qdrant collection name")
+    parser.add_argument("--qdrant-url", default="http://localhost:6333")
+    parser.add_argument("--workers", type=int, default=None, help="Parsing processes (default: one per CPU)")
+    parser.add_argument("--dimensions", type=int, default=None,
+                        help="Embedding size for a new collection, e.g. 256/512/1024 (default: EMBEDDING_DIMENSIONS or 1536)")
+    parser.add_argument("--profile", choices=list(PROFILES), default=None,
+                        help="Settings of a new collection (default: COLLECTION_PROFILE or 'default'); "
+                             "bulk-load builds the search index once, after all files are uploaded")
+    parser.add_argument("--chunk-size", type=int, default=250, help="Chunk size in tokens")
+    parser.add_argument("--chunk-overlap", type=int, default=50, help="Chunk overlap in tokens")
+    parser.add_argument("--page-timeout", type=float, default=30, help="Seconds before a single page is skipped")
+    parser.add_argument("--dedup-threshold", type=float, default=None,
+                        help="Similarity at which a chunk is dropped as a near-duplicate "
+                             "(default: DEDUP_THRESHOLD or 0.9, 0 disables)")
+    parser.add_argument("--report", default=None, help="Write a JSON report of every file to this path")
+    parser.add_argument("--snapshot", default=None,
+                        help="Write chunks and vectors to this .arrow/.parquet file after indexing "
+                             "(default: .cache/snapshots/<collection>.arrow)")
+    parser.add_argument("--no-snapshot", action="store_true", help="Do not write a snapshot")
+    parser.add_argument("--no-page-cache", action="store_true",
+                        help="Parse every PDF even if its page text is cached from an earlier run")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore the checkpoint of an interrupted run and start over")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Keep stale chunks of changed files and points of deleted PDFs")
+    return parser.parse_args()
+
+
+# The process pool re-imports this file in its workers on macOS/Windows,
+# so everything that does work has to live under the main guard
+if __name__ == "__main__":
+    args = parse_args()
+
+    #step-1: pdf to text, step-2: chunking
+    # Every PDF is extracted page by page and cut into chunks of chunk_size tokens in a
+    # pool of worker processes, one file per task (a page taking over 30s is skipped)
+
+    # Vector Embeddings (cached on disk, so re-runs never re-embed the same text).
+    # The size is fixed when the collection is created; queries read it back from there
+    qdrant_client = QdrantClient(url=args.qdrant_url, prefer_grpc=True)  # Uses port 6334
+    try:
+        embedding_model = get_collection_embedding_model(qdrant_client, args.collection, dimensions=args.dimensions)
+    except DimensionMismatchError as e:
+        sys.exit(str(e))
+
+    # Embed and store, shared by all files. Point IDs are content hashes, so a re-run only
+    # embeds chunks that changed since the last run; chunks that disappeared are pruned after
+    pipeline = IngestionPipeline(
+        client=qdrant_client,
+        collection_name=args.collection,
+        embedding=embedding_model,
+        text_splitter=None,  # chunked in the worker processes
+        delete_stale=False,
+        profile=get_profile(args.profile),
+        dedup=get_dedup_filter(args.dedup_threshold),
+    )
+    # Every written batch and finished file is checkpointed; after a crash or Ctrl-C the
+    # next run with the same settings skips the files that were finished
+    checkpoint = IngestCheckpoint.for_job(args.collection, run_key=f"{args.chunk_size}/{args.chunk_overlap}")
+    if args.fresh:
+        checkpoint.clear()
+    ingestor = BulkIngestor(
+        pipeline,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        page_timeout=args.page_timeout,
+        prune=not args.no_prune,
+        checkpoint=checkpoint,
+        # Page text is cached by file content, so re-running over the same PDFs skips pypdf entirely
+        page_cache_path=None if args.no_page_cache else DEFAULT_PAGE_CACHE_PATH,
+    )
+    report = ingestor.run(args.paths)
+
+    print(report.summary())
+    for failed in report.failed:
+        print(f"  failed: {failed.path}: {failed.error}")
+    if args.report:
+        report.write(args.report)
+        print(f"Report written to {args.report}")
+    if pipeline.dedup:
+        print(pipeline.dedup.summary())
+    print(f"Embedding cache: {embedding_model.cache.stats()}")
+    if not args.no_snapshot and qdrant_client.collection_exists(args.collection):
+        # Rebuilding the collection elsewhere (or with other settings) from here needs no embedding calls:
+        # python -m rag_common.snapshot restore <path> <new collection>
+        snapshot_path = args.snapshot or default_snapshot_path(args.collection)
+        print(f"Snapshot: {export_collection(qdrant_client, args.collection, snapshot_path)} points in {snapshot_path}")
+    sys.exit(1 if report.failed else 0)
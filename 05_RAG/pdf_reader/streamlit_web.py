@@ -1,6 +1,7 @@
 import streamlit as st
 import tempfile
 import os
+import sys
 from io import StringIO
 
 from langchain_community.document_loaders import PyPDFLoader
@@ -8,10 +9,12 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_qdrant import QdrantVectorStore
 
-from openai import OpenAI
-
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.clients import get_openai_client, get_qdrant_client, get_vector_store
+from rag_common.collection_profiles import get_profile
+
 load_dotenv()
 
 """
@@ -72,22 +75,15 @@ upload the pdf you want to chat about
 query = st.text_input("Enter your querry")
 print(query)
 if query:
-    embedding_model = OpenAIEmbeddings(
-        model="text-embedding-3-small"
-    )
-    client = OpenAI()
-
-
-    vector_store = QdrantVectorStore.from_existing_collection(
-        collection_name="my_streamlit_app",
-        url="http://localhost:6333",
-        embedding=embedding_model
-    )
+    # Clients and the vector store live for the whole process, not one rerun
+    client = get_openai_client()
+    vector_store = get_vector_store(get_qdrant_client("http://localhost:6333"), "my_streamlit_app")
     # query = input("> ")
     st.write("searching in vector DB.....")
-    results = vector_store.similarity_search(
-        query
-    )
+    results = vector_store.hybrid_search(
+        query,
+        search_params=get_profile().search_params()  # ef/rescoring of the COLLECTION_PROFILE it was built with
+    ) if vector_store else []
     print(results)    
 
     context = "\n\n".join([
@@ -0,0 +1,156 @@
+# ingest_jobs.py - Background PDF ingestion jobs for the Streamlit app
+#
+# process_pdf runs on a small worker pool instead of the Streamlit script thread, so a
+# session stays responsive (and can keep chatting) while its upload is embedded, a rerun
+# never loses a running job, and several users can upload at once. The queue is shared by
+# the whole server process; each session only keeps the IDs of its own jobs.
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from rag_processor import RAGProcessor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class JobStatus:
+    """Point-in-time view of a job, safe to read from any thread"""
+    job_id: str
+    name: str
+    state: str = QUEUED
+    percent: int = 0
+    message: str = "⏳ Waiting for a free worker..."
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+
+@dataclass
+class _Job:
+    status: JobStatus
+    upload: object  # the UploadedFile, released once the job finishes
+    collection_name: Optional[str]
+    cancel: threading.Event = field(default_factory=threading.Event)
+    future: Optional[Future] = None
+
+
+class IngestJobQueue:
+    """
+    Runs RAGProcessor.process_pdf jobs on `max_workers` threads.
+
+    At most max_workers uploads are embedded at once; further jobs wait in FIFO order, so
+    one large upload cannot hold up everybody else's. Chat queries never go through this
+    queue, and their query embeddings use the engine's interactive slots.
+
+    Args:
+        processor: RAGProcessor the jobs run on (it keeps no per-job state)
+        max_workers: Jobs processed concurrently
+        keep_finished: Finished jobs remembered for status() before the oldest are dropped
+    """
+
+    def __init__(self, processor: RAGProcessor, max_workers: int = 2, keep_finished: int = 100):
+        self.processor = processor
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, uploaded_file, collection_name: Optional[str] = None) -> str:
+        """
+        Queue an uploaded PDF for ingestion and return its job ID. A file that is already
+        in the collection finishes at once, without waiting for a worker.
+        """
+        job_id = uuid.uuid4().hex
+        status = JobStatus(job_id=job_id, name=getattr(uploaded_file, "name", "document.pdf"), submitted_at=time.time())
+        job = _Job(status=status, upload=uploaded_file, collection_name=collection_name)
+        duplicate = self.processor.already_ingested(uploaded_file, collection_name)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+            if duplicate:
+                job.status.started_at = status.submitted_at
+                self._finish(job, DONE, "✅ Already processed, ready to chat!")
+            else:
+                job.future = self._executor.submit(self._run, job)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        """Current status of a job (None if unknown or already pruned)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return JobStatus(**vars(job.status)) if job else None
+
+    def statuses(self, job_ids: List[str]) -> List[JobStatus]:
+        return [status for status in map(self.status, job_ids) if status is not None]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job. A queued job never starts; a running one stops after the batch it is
+        writing, keeping what it already wrote. Returns False if the job already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status.finished:
+                return False
+            job.cancel.set()
+            if job.future.cancel():
+                self._finish(job, CANCELLED, "⏹️ Cancelled before it started")
+            else:
+                job.status.message = "⏹️ Cancelling..."
+            return True
+
+    def _run(self, job: _Job):
+        with self._lock:
+            if job.cancel.is_set():
+                self._finish(job, CANCELLED, "⏹️ Cancelled before it started")
+                return
+            job.status.state = RUNNING
+            job.status.started_at = time.time()
+
+        def on_progress(percent: int, message: str):
+            with self._lock:
+                job.status.percent = percent
+                job.status.message = message
+
+        try:
+            ok = self.processor.process_pdf(job.upload, job.collection_name, progress_callback=on_progress,
+                                            cancel=job.cancel)
+        except Exception as e:
+            ok = False
+            on_progress(0, f"❌ Error: {e}")
+        with self._lock:
+            if ok:
+                self._finish(job, DONE, "✅ PDF processed successfully!")
+            elif job.cancel.is_set():
+                self._finish(job, CANCELLED, "⏹️ Cancelled")
+            else:
+                self._finish(job, FAILED, job.status.message)
+
+    def _finish(self, job: _Job, state: str, message: str):
+        # Caller holds self._lock
+        job.status.state = state
+        job.status.message = message
+        job.status.finished_at = time.time()
+        if state == DONE:
+            job.status.percent = 100
+        job.upload = None
+
+    def _prune(self):
+        # Caller holds self._lock
+        finished = [job_id for job_id, job in self._jobs.items() if job.status.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
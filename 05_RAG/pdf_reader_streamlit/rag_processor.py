@@ -1,103 +1,187 @@
 # rag_processor.py - Handles both indexing and querying functionality
 
-import tempfile
 import os
-import time
-from typing import List, Optional, Callable
-
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
-from openai import OpenAI
+import sys
+import threading
+from typing import Optional, Callable
+
+from qdrant_client import QdrantClient, models
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.answer_cache import get_answer_cache, replay_stream
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.chunking import TokenTextChunker
+from rag_common.clients import (VECTOR_BACKEND, collection_status, get_ingestion_pipeline, get_local_replica_store,
+                                get_openai_client, get_qdrant_client, get_vector_store, invalidate_collection)
+from rag_common.collection_profiles import get_profile
+from rag_common.context_packer import DEFAULT_BUDGET, ContextPacker
+from rag_common.dedup import get_dedup_filter
+from rag_common.local_index import drop_local_index
+from rag_common.page_cache import file_sha256, get_page_cache
+from rag_common.pdf_extract import count_pdf_pages, lazy_load_pdf_buffer
+from rag_common.pipeline import IngestCancelled
+from rag_common.snapshot import default_snapshot_path
+
 load_dotenv()
 
 
+def render_context(content: str, metadata: dict) -> str:
+    """One page's retrieved text with its page number and file, as the model sees it"""
+    return (
+        f"Page Content: {content}\n"
+        f"Page Number: {metadata.get('page_label', 'Unknown')}\n"
+        f"Also On Pages: {', '.join(str(dup.get('page_label')) for dup in metadata.get('also_in', [])) or '-'}\n"
+        f"File Location: {metadata.get('source', 'Unknown')}"
+    )
+
+
 class RAGProcessor:
     # def __init__(self, qdrant_url: str = "http://localhost:6333"):
-    def __init__(self, qdrant_url: str = "https://4ec974df-8488-4fe4-b46e-e4df3d23ce7d.eu-central-1-0.aws.cloud.qdrant.io:6333"):
+    def __init__(self, qdrant_url: str = "https://4ec974df-8488-4fe4-b46e-e4df3d23ce7d.eu-central-1-0.aws.cloud.qdrant.io:6333",
+                 pdf_workers: Optional[int] = None, page_timeout: Optional[float] = 30.0,
+                 embedding_dimensions: Optional[int] = None, collection_profile: Optional[str] = None,
+                 dedup_threshold: Optional[float] = None, context_budget: int = DEFAULT_BUDGET):
         self.qdrant_url = qdrant_url
-        self.embedding_model = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.openai_client = OpenAI()
+        self.pdf_workers = pdf_workers  # None = one extraction process per CPU, 1 = no process pool
+        self.page_timeout = page_timeout  # seconds before a single pathological page is skipped
+        # Size of new collections (e.g. 512; None = EMBEDDING_DIMENSIONS or 1536). Existing
+        # collections keep the size they were created with, for indexing and queries alike
+        self.embedding_dimensions = embedding_dimensions
+        # "default", "low-latency", "low-memory" or "bulk-load" (None = COLLECTION_PROFILE);
+        # applied to collections this processor creates. Searches use the settings of the
+        # profile the collection they query was created with
+        self.profile = get_profile(collection_profile)
+        # Similarity at which a chunk counts as a near-duplicate and is not embedded
+        # (None = DEDUP_THRESHOLD or 0.9, 0 = keep everything)
+        self.dedup_threshold = dedup_threshold
+        # Extracted page text by file content, shared with every processor in this process
+        self.page_cache = get_page_cache()
+        # Answers to questions asked before (or close enough), until the collection changes
+        self.answer_cache = get_answer_cache()
+        # Retrieved chunks merged where they overlap and packed into this many prompt tokens
+        # (default: CONTEXT_TOKEN_BUDGET or 1500)
+        self.context_packer = ContextPacker(render_context, budget=context_budget, model="gpt-4o-mini")
+        # Long-lived clients shared by every processor (and Streamlit session) in this process
+        self.openai_client = get_openai_client()
         self.collection_name = 'my_rag_pdf'
 
-    def process_pdf(self, uploaded_file, collection_name: Optional[str] = None, progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+    def _qdrant_client(self) -> QdrantClient:
+        return get_qdrant_client(self.qdrant_url, api_key=os.getenv("QDRANT_API_KEY"), prefer_grpc=True, timeout=30)
+
+    def already_ingested(self, uploaded_file, collection_name: Optional[str] = None,
+                         file_hash: Optional[str] = None) -> bool:
+        """
+        Check whether this exact file (same bytes, same name) was the last one processed into the collection
+
+        Args:
+            uploaded_file: The uploaded PDF file
+            collection_name: Name of the collection (defaults to this processor's)
+            file_hash: SHA-256 of the file, if already computed
+        """
+        try:
+            collection_name = collection_name or self.collection_name
+            source = getattr(uploaded_file, "name", None) or "<buffer>"
+            file_hash = file_hash or file_sha256(uploaded_file)
+            if self.page_cache.ingested_hash(collection_name, source) != file_hash:
+                return False
+            # The record outlives the collection if it was deleted elsewhere, so make sure the points are there
+            if VECTOR_BACKEND == "local":
+                store = get_local_replica_store(collection_name)
+                return store is not None and store.index.count(lambda metadata: metadata.get("source") == source) > 0
+            client = self._qdrant_client()
+            if not collection_status(client, collection_name).exists:
+                return False
+            source_filter = models.Filter(must=[
+                models.FieldCondition(key="metadata.source", match=models.MatchValue(value=source))
+            ])
+            return client.count(collection_name, count_filter=source_filter, exact=True).count > 0
+        except Exception as e:
+            print(f"Error checking for a duplicate upload: {e}")
+            return False
+
+    def process_pdf(self, uploaded_file, collection_name: Optional[str] = None, progress_callback: Optional[Callable[[int, str], None]] = None,
+                    cancel: Optional[threading.Event] = None) -> bool:
         """
         Process uploaded PDF file and store in vector database with real-time progress updates
 
+        Load, split, embed and upsert run as overlapping pipeline stages, and progress is
+        measured from the pages parsed, chunks produced, vectors embedded and points written.
+        Re-uploading a mostly unchanged PDF only embeds the chunks that changed, and
+        re-uploading the very same PDF returns at once without parsing or embedding anything.
+
         Args:
             uploaded_file: The uploaded PDF file
             collection_name: Name of the collection to store documents
             progress_callback: Optional callback function to report progress (progress_percent, status_message)
+            cancel: Optional event; setting it stops processing after the current batch
         """
         try:
             if collection_name is None:
                 collection_name = self.collection_name
-            # Step 1: Save uploaded file to temporary location
-            if progress_callback:
-                progress_callback(10, "📄 Saving PDF file...")
-            time.sleep(0.5)  # Small delay to show progress
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_file_path = tmp_file.name
-
-            # Step 2: Load PDF
+            # Step 1: Open the upload in place. It is never read into a second bytes object;
+            # workers share one memory-mapped spill file instead of each loading a copy
             if progress_callback:
-                progress_callback(25, "📖 Loading PDF content...")
-            time.sleep(0.5)
-
-            loader = PyPDFLoader(tmp_file_path)
-            docs = loader.load()
-
-            # Clean up temporary file
-            os.unlink(tmp_file_path)
+                progress_callback(0, "📄 Opening PDF file...")
+            file_hash = file_sha256(uploaded_file)
+            if self.already_ingested(uploaded_file, collection_name, file_hash):
+                if progress_callback:
+                    progress_callback(100, "✅ Already processed, ready to chat!")
+                return True
+            # Pages parsed before (this file under any name) come from the page cache
+            total_pages = self.page_cache.total_pages(file_hash) or count_pdf_pages(uploaded_file)
 
-            # Step 3: Chunking
-            if progress_callback:
-                progress_callback(50, "✂️ Chunking text...")
-            time.sleep(0.5)
-
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len,
-                is_separator_regex=False,
+            # Step 2: Stream pages (extracted in parallel, in page order) through chunking,
+            # embedding and upserting. Chunk IDs are content hashes, so only new or changed
+            # chunks are embedded and chunks of the previous upload that are gone get deleted
+            text_splitter = TokenTextChunker(
+                chunk_size=250,
+                chunk_overlap=50,
+                model="text-embedding-3-small",
             )
-            split_docs = text_splitter.split_documents(documents=docs)
-
-            # Step 4: Create embeddings and store
-            if progress_callback:
-                progress_callback(75, "🧠 Creating embeddings...")
-            time.sleep(0.5)
-
-            # Check if collection exists and delete it
-            if self.collection_exists(collection_name):
-                if progress_callback:
-                    progress_callback(70, "🗑️ Deleting existing collection...")
-                self.delete_collection(collection_name)
-                time.sleep(0.5)
-
-            # Store in vector database
-            QdrantVectorStore.from_documents(
-                documents=split_docs,
-                embedding=self.embedding_model,
-                url=self.qdrant_url,
-                prefer_grpc=True,
-                api_key=os.getenv("QDRANT_API_KEY"),
-                collection_name=collection_name,
-                # client_options={"check_compatibility": False}
+            # Into the Qdrant collection, or with VECTOR_BACKEND=local into its local index
+            client = self._qdrant_client()
+            pipeline = get_ingestion_pipeline(
+                client,
+                collection_name,
+                text_splitter,
+                dimensions=self.embedding_dimensions,
+                profile=self.profile,
+                dedup=get_dedup_filter(self.dedup_threshold),
             )
+            source = getattr(uploaded_file, "name", None)
+            pages = lazy_load_pdf_buffer(uploaded_file, max_workers=self.pdf_workers, page_timeout=self.page_timeout,
+                                         source=source, page_cache=self.page_cache, file_hash=file_hash)
+            # Written batches are checkpointed, so uploading the same file again after a
+            # failure or cancel picks up where it stopped instead of writing it all again
+            checkpoint = IngestCheckpoint.for_job(f"{collection_name}-{source or 'upload'}",
+                                                  run_key=f"{text_splitter.chunk_size}/{text_splitter.chunk_overlap}")
+            try:
+                stats = pipeline.run(
+                    pages,
+                    total_pages=total_pages,
+                    on_progress=(lambda p: progress_callback(p.percent, p.message())) if progress_callback else None,
+                    cancel=cancel,
+                    checkpoint=checkpoint,
+                )
+            finally:
+                # The collection may have been created, even by a run that failed part way
+                invalidate_collection(client, collection_name)
+            if not stats.pages_failed:
+                # with a page that failed, uploading the file again has to retry it
+                self.page_cache.mark_ingested(collection_name, source or "<buffer>", file_hash)
 
-            # Step 5: Complete
+            # Step 3: Complete
             if progress_callback:
-                progress_callback(100, "✅ Processing complete!")
+                failed = f" ({stats.pages_failed} pages could not be read)" if stats.pages_failed else ""
+                progress_callback(100, f"✅ Processing complete!{failed}")
 
             return True
 
+        except IngestCancelled:
+            if progress_callback:
+                progress_callback(0, "⏹️ Cancelled")
+            return False
         except Exception as e:
             if progress_callback:
                 progress_callback(0, f"❌ Error: {str(e)}")
@@ -107,33 +191,38 @@ class RAGProcessor:
     def query_documents(self, query: str, collection_name: str = "my_documents", num_results: int = 4, stream: bool = False):
         """
         Query the vector database and get AI response
+
+        A question answered before from the same version of the collection (after
+        normalization, or by embedding similarity) is answered from the cache, replayed as a
+        stream when stream=True.
         """
         try:
-            # Connect to existing collection
-            vector_store = QdrantVectorStore.from_existing_collection(
-                collection_name=collection_name,
-                url=self.qdrant_url,
-                prefer_grpc=True,
-                api_key=os.getenv("QDRANT_API_KEY"),
-                embedding=self.embedding_model,
-                # client_options={"check_compatibility": False}
-            )
+            # Shared handle on the collection, embedding the query at the size it was indexed with;
+            # no connection setup or collection lookups, just the search
+            vector_store = get_vector_store(self._qdrant_client(), collection_name)
 
             # Search for similar documents
-            results = vector_store.similarity_search(query, k=num_results)
+            results = []
+            if vector_store is not None:
+                cache_variant = f"gpt-4o-mini/k{num_results}/hybrid/ctx{self.context_packer.budget}"
+                version = self.answer_cache.collection_version(collection_name)
+                cached = self.answer_cache.get_exact(collection_name, cache_variant, query)
+                query_vector = None
+                if cached is None:
+                    query_vector = vector_store.embeddings.embed_query(query)
+                    cached = self.answer_cache.get_similar(collection_name, cache_variant, query_vector)
+                if cached is not None:
+                    return replay_stream(cached.answer) if stream else cached.answer
+                # dense and BM25 rankings fused, so exact commands and identifiers are found at small k
+                results = vector_store.hybrid_search(query, query_vector, k=num_results)
 
             if not results:
                 if stream:
                     return iter(["No relevant documents found for your query."])
                 return "No relevant documents found for your query."
 
-            # Format context
-            context = "\n\n".join([
-                f"Page Content: {res.page_content}\n"
-                f"Page Number: {res.metadata.get('page_label', 'Unknown')}\n"
-                f"File Location: {res.metadata.get('source', 'Unknown')}"
-                for res in results
-            ])
+            # Format context: overlapping chunks of a page merged, one header per page, within the token budget
+            context = self.context_packer.pack(results).text
 
             # Create system prompt
             system_prompt = f"""
@@ -163,11 +252,16 @@ class RAGProcessor:
             )
 
             if stream:
-                return response
+                return self.answer_cache.record_stream(collection_name, cache_variant, query, response,
+                                                       query_vector, version)
             else:
-                return response.choices[0].message.content
+                answer = response.choices[0].message.content
+                self.answer_cache.put(collection_name, cache_variant, query, answer, query_vector, version)
+                return answer
 
         except Exception as e:
+            # e.g. the collection was deleted by another process: look it up again next time
+            invalidate_collection(self._qdrant_client(), collection_name)
             error_msg = f"Error querying documents: {str(e)}"
             if stream:
                 return iter([error_msg])
@@ -178,16 +272,18 @@ class RAGProcessor:
         Delete a collection from the vector database
         """
         try:
-            from qdrant_client import QdrantClient
-
-            client = QdrantClient(
-                url=self.qdrant_url,
-                prefer_grpc=True,
-                api_key=os.getenv("QDRANT_API_KEY"),
-                timeout=30
-            )
-
-            client.delete_collection(collection_name=collection_name)
+            client = self._qdrant_client()
+            if VECTOR_BACKEND == "local":
+                # The snapshot goes too, or the local index would be rebuilt from it
+                snapshot_path = default_snapshot_path(collection_name)
+                if os.path.exists(snapshot_path):
+                    os.remove(snapshot_path)
+                drop_local_index(collection_name)
+            else:
+                client.delete_collection(collection_name=collection_name)
+            invalidate_collection(client, collection_name)
+            self.answer_cache.bump_version(collection_name)
+            self.page_cache.forget_collection(collection_name)
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
@@ -195,17 +291,11 @@ class RAGProcessor:
 
     def collection_exists(self, collection_name: str) -> bool:
         """
-        Check if a collection exists in the vector database
+        Check if a collection exists in the vector database (cached until it is ingested into or deleted)
         """
         try:
-            vector_store = QdrantVectorStore.from_existing_collection(
-                collection_name=collection_name,
-                url=self.qdrant_url,
-                prefer_grpc=True,
-                api_key=os.getenv("QDRANT_API_KEY"),
-                embedding=self.embedding_model,
-                # client_options={"check_compatibility": False}
-            )
-            return True
+            if VECTOR_BACKEND == "local":
+                return get_local_replica_store(collection_name) is not None
+            return collection_status(self._qdrant_client(), collection_name).exists
         except:
             return False
@@ -1,4 +1,6 @@
+import os
 from dotenv import load_dotenv
+from ingest_jobs import IngestJobQueue
 from rag_processor import RAGProcessor
 import streamlit as st
 
@@ -15,8 +17,49 @@ load_dotenv()
 # Initialize RAG processor
 
 
-rag = RAGProcessor()
+@st.cache_resource
+def get_rag_processor() -> RAGProcessor:
+    # Created once per server, not on every rerun: its clients and vector stores are shared by all sessions
+    return RAGProcessor()
+
+
+@st.cache_resource
+def get_job_queue() -> IngestJobQueue:
+    # One queue for the whole server, so concurrent uploads share INGEST_WORKERS workers
+    return IngestJobQueue(get_rag_processor(), max_workers=int(os.getenv("INGEST_WORKERS", "2")))
+
+
+rag = get_rag_processor()
 collection_name = rag.collection_name
+jobs = get_job_queue()
+# Cached status, looked up again only after an ingest or delete invalidates it
+collection_found = rag.collection_exists(collection_name)
+if "ingest_jobs" not in st.session_state:
+    st.session_state.ingest_jobs = []  # IDs of this session's jobs, survive reruns
+if "announced_jobs" not in st.session_state:
+    st.session_state.announced_jobs = set()
+
+
+@st.fragment(run_every=1.0)
+def show_ingest_jobs():
+    # Reruns on its own every second, so progress updates never block the rest of the page
+    for status in jobs.statuses(st.session_state.ingest_jobs):
+        st.caption(f"📄 {status.name}")
+        if status.state == "done":
+            st.success(status.message)
+            if status.job_id not in st.session_state.announced_jobs:
+                st.session_state.announced_jobs.add(status.job_id)
+                st.session_state.collection_ready = True
+                st.balloons()
+        elif status.state == "failed":
+            st.error(f"❌ Error processing PDF. Please try again. {status.message}")
+        elif status.state == "cancelled":
+            st.warning(status.message)
+        else:
+            st.progress(status.percent)
+            st.info(status.message)
+            if st.button("⏹️ Cancel", key=f"cancel_{status.job_id}"):
+                jobs.cancel(status.job_id)
 
 # Main title
 st.title("📚 RAG Chat Application")
@@ -41,34 +84,15 @@ with st.sidebar:
         key="pdf_uploader"
     )
 
-    # Upload button
+    # Upload button: processing runs in the background job queue, progress is polled below
     if uploaded_file and st.button("🚀 Process PDF", type="primary"):
-        # Create progress bar and status containers
-        progress_bar = st.progress(0)
-        status_container = st.empty()
-
-        # Define progress callback function
-        def update_progress(progress: int, message: str):
-            progress_bar.progress(progress)
-            status_container.info(message)
-
-        # Process the PDF with real-time progress
-        success = rag.process_pdf(uploaded_file, progress_callback=update_progress)
-
-        if success:
-            status_container.success("✅ PDF processed successfully!")
-            st.balloons()
-            # Update collection status
-            st.session_state.collection_ready = True
-        else:
-            status_container.error(f"❌ Error processing PDF. Please try again.: {status_container.error}")
-            st.session_state.collection_ready = False
+        st.session_state.ingest_jobs.append(jobs.submit(uploaded_file))
+
+    show_ingest_jobs()
 
     # Check if collection exists
 
-    if rag.collection_exists('my_rag_pdf'):
-        pass
-    else:
+    if not collection_found:
         st.warning(f"⚠️ Collection not found. Please upload a PDF first.")
 
 
@@ -78,7 +102,7 @@ if "messages" not in st.session_state:
 
 # Initialize collection status in session state
 if "collection_ready" not in st.session_state:
-    st.session_state.collection_ready = rag.collection_exists(collection_name)
+    st.session_state.collection_ready = collection_found
 
 # Display chat messages
 for message in st.session_state.messages:
@@ -0,0 +1,7 @@
+# rag_common - Helpers shared by the pdf_reader, pdf_reader_streamlit and website_reader apps
+#
+# The apps are run as plain scripts from their own folder, so they put 05_RAG on
+# sys.path before importing from here:
+#
+#     sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+#     from rag_common.pdf_extract import load_pdf_parallel
@@ -0,0 +1,260 @@
+# answer_cache.py - Two-tier cache of RAG answers, invalidated when a collection changes
+#
+# Chat traffic repeats itself: the same few questions come in all day, each paying for a
+# query embedding, a vector search and a full completion. Answers are stored per collection
+# and "variant" (LLM, k, prompt) with the normalized question and its embedding:
+#
+#   1. exact: the normalized question (case, punctuation and spacing folded) was answered
+#      before -> the answer, without even embedding the question
+#   2. semantic: the question's embedding has cosine similarity >= threshold with one that
+#      was answered before -> its answer, without a search or completion
+#
+# Every collection has a version number that ingestion bumps whenever it writes or deletes
+# points, and entries only count for the version they were answered from, so re-indexing
+# invalidates them without any bookkeeping by the chat side.
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from openai.types.chat import ChatCompletionChunk
+
+DEFAULT_ANSWER_CACHE_PATH = os.getenv(
+    "ANSWER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "answers.sqlite"),
+)
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_MAX_ENTRIES = 10000
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, punctuation dropped, whitespace collapsed: "How do I install Node?" -> "how do i install node\""""
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    exact: bool  # False for a semantic (similar question) hit
+    similarity: float = 1.0
+
+
+class AnswerCache:
+    """
+    SQLite-backed answer cache with an exact and a semantic tier.
+
+    Safe to share between threads, and between processes through SQLite's WAL mode
+    (entries stored by another process are picked up on the next semantic lookup).
+    `exact_hits`, `semantic_hits` and `misses` count lookups made through this instance.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway cache)
+        threshold: Cosine similarity at which another question's answer is reused (0 = exact tier only)
+        max_entries: Answers kept before the least recently used are evicted
+    """
+
+    def __init__(self, path: str = DEFAULT_ANSWER_CACHE_PATH, threshold: float = DEFAULT_THRESHOLD,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (collection, variant, version) -> (last answer id loaded, answer ids, unit vectors)
+        self._matrices: Dict[Tuple[str, str, int], Tuple[int, List[int], np.ndarray]] = {}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions (collection TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, variant TEXT NOT NULL,"
+            " version INTEGER NOT NULL, query TEXT NOT NULL, answer TEXT NOT NULL, vector BLOB,"
+            " last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0,"
+            " UNIQUE (collection, variant, version, query))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self._conn.commit()
+
+    def collection_version(self, collection: str) -> int:
+        with self._lock:
+            return self._version(collection)
+
+    def _version(self, collection: str) -> int:
+        # Caller holds self._lock
+        row = self._conn.execute("SELECT version FROM versions WHERE collection = ?", (collection,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, collection: str):
+        """Mark a collection as changed: answers given from its earlier content no longer count"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versions (collection, version) VALUES (?, 1)"
+                " ON CONFLICT (collection) DO UPDATE SET version = version + 1", (collection,)
+            )
+            self._conn.execute("DELETE FROM answers WHERE collection = ?", (collection,))
+            self._conn.commit()
+            for key in [key for key in self._matrices if key[0] == collection]:
+                del self._matrices[key]
+
+    def get_exact(self, collection: str, variant: str, query: str) -> Optional[CachedAnswer]:
+        """Answer to the same (normalized) question, asked of the current version of the collection"""
+        with self._lock:
+            version = self._version(collection)
+            row = self._conn.execute(
+                "SELECT id, answer FROM answers WHERE collection = ? AND variant = ? AND version = ? AND query = ?",
+                (collection, variant, version, normalize_query(query)),
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(row[0])
+            self.exact_hits += 1
+        return CachedAnswer(answer=row[1], exact=True)
+
+    def get_similar(self, collection: str, variant: str, query_vector: List[float]) -> Optional[CachedAnswer]:
+        """Answer to the most similar question at or above the threshold (None counts as a miss)"""
+        if self.threshold <= 0:
+            with self._lock:
+                self.misses += 1
+            return None
+        vector = _unit(query_vector)
+        with self._lock:
+            version = self._version(collection)
+            ids, matrix = self._matrix(collection, variant, version)
+            if len(ids) and matrix.shape[1] == len(vector):
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    row = self._conn.execute("SELECT answer FROM answers WHERE id = ?", (ids[best],)).fetchone()
+                    if row is not None:  # None: evicted since it was loaded
+                        self._touch(ids[best])
+                        self.semantic_hits += 1
+                        return CachedAnswer(answer=row[0], exact=False, similarity=float(similarities[best]))
+            self.misses += 1
+        return None
+
+    def _matrix(self, collection: str, variant: str, version: int) -> Tuple[List[int], np.ndarray]:
+        """Unit vectors of the answered questions, extended with entries added since the last call"""
+        # Caller holds self._lock
+        key = (collection, variant, version)
+        last_id, ids, matrix = self._matrices.get(key, (0, [], None))
+        rows = self._conn.execute(
+            "SELECT id, vector FROM answers WHERE collection = ? AND variant = ? AND version = ? AND id > ?"
+            " AND vector IS NOT NULL ORDER BY id",
+            (collection, variant, version, last_id),
+        ).fetchall()
+        if rows:
+            fresh = np.stack([_unit(array("f", blob)) for _, blob in rows])
+            matrix = fresh if matrix is None else np.vstack([matrix, fresh])
+            ids = ids + [row_id for row_id, _ in rows]
+            last_id = rows[-1][0]
+            self._matrices[key] = (last_id, ids, matrix)
+        return ids, matrix if matrix is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def put(self, collection: str, variant: str, query: str, answer: str, query_vector: Optional[List[float]] = None,
+            version: Optional[int] = None):
+        """
+        Store an answer. Pass the `version` read before searching, so an answer found while
+        the collection was being re-indexed is not filed under the new version.
+        """
+        blob = array("f", query_vector).tobytes() if query_vector is not None else None
+        with self._lock:
+            if version is None:
+                version = self._version(collection)
+            elif version != self._version(collection):
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (collection, variant, version, query, answer, vector, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (collection, variant, version, normalize_query(query), answer, blob, time.time()),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def record_stream(self, collection: str, variant: str, query: str, stream: Iterable[ChatCompletionChunk],
+                      query_vector: Optional[List[float]] = None,
+                      version: Optional[int] = None) -> Iterator[ChatCompletionChunk]:
+        """Pass a streamed completion through, storing the answer once the stream has completed"""
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        self.put(collection, variant, query, "".join(parts), query_vector, version)
+
+    def _touch(self, answer_id: int):
+        # Caller holds self._lock
+        self._conn.execute("UPDATE answers SET last_used = ?, hits = hits + 1 WHERE id = ?", (time.time(), answer_id))
+        self._conn.commit()
+
+    def _evict(self):
+        """Drop the least recently used answers beyond max_entries"""
+        # Caller holds self._lock
+        count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def replay_stream(answer: str, model: str = "answer-cache") -> Iterator[ChatCompletionChunk]:
+    """A cached answer as streamed completion chunks (a word at a time), so streaming callers need no special case"""
+    created = int(time.time())
+    for piece in re.findall(r"\s*\S+\s*", answer) or [answer]:
+        yield ChatCompletionChunk(
+            id="cached", object="chat.completion.chunk", created=created, model=model,
+            choices=[{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}],
+        )
+
+
+_shared_cache: Optional[AnswerCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """The process-wide cache opened at DEFAULT_ANSWER_CACHE_PATH (threshold: ANSWER_CACHE_THRESHOLD, else 0.95)"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AnswerCache(threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", DEFAULT_THRESHOLD)))
+        return _shared_cache
+
+
+def bump_collection_version(collection: str):
+    """Invalidate the cached answers of a collection; called by everything that writes to or deletes one"""
+    get_answer_cache().bump_version(collection)
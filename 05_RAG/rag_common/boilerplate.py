@@ -0,0 +1,186 @@
+# boilerplate.py - Corpus-level removal of text blocks repeated across pages
+#
+# Sidebars, lesson lists and headers survive tag-based cleanup because they are ordinary
+# <ul>/<div> content, but they repeat on every page of a site. Pages are seen as lists of
+# blocks (one per line of page_content); each distinct block is hashed to 64 bits and its
+# page count goes into a count-min sketch of fixed size, so memory does not grow with the
+# crawl. Blocks found on more than `ratio` of the pages are removed before chunking.
+#
+# Counts are kept for the whole site across runs: every page's block hashes are stored, so a
+# page fetched again replaces its old contribution and pages gone from the site are taken
+# out. An incremental crawl that only fetches the changed pages still judges them against
+# every page of the site. Every page of a run is counted before the first one is stripped,
+# so what is removed does not depend on the order the pages were crawled in.
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+DEFAULT_BOILERPLATE_PATH = os.getenv(
+    "BOILERPLATE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "boilerplate.sqlite"),
+)
+
+
+def block_hash(block: str) -> int:
+    """64-bit hash of a block, ignoring case and whitespace"""
+    normalized = " ".join(block.lower().split()).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(normalized, digest_size=8).digest(), "little")
+
+
+def split_blocks(text: str) -> List[str]:
+    return [line for line in text.split("\n") if line.strip()]
+
+
+class CountMinSketch:
+    """Approximate counts of 64-bit keys in depth x width counters (never undercounts)"""
+
+    def __init__(self, width: int = 1 << 18, depth: int = 4, seed: int = 7):
+        self.width = width
+        self.depth = depth
+        self.counts = np.zeros((depth, width), dtype=np.uint32)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=depth, dtype=np.uint64)
+
+    def _columns(self, keys: np.ndarray) -> np.ndarray:
+        return ((keys[None, :] * self._a[:, None] + self._b[:, None]) >> np.uint64(32)) % np.uint64(self.width)
+
+    def add(self, keys: Iterable[int]):
+        keys = np.fromiter(keys, dtype=np.uint64)
+        if len(keys):
+            columns = self._columns(keys)
+            for row in range(self.depth):
+                np.add.at(self.counts[row], columns[row], 1)
+
+    def remove(self, keys: Iterable[int]):
+        """Take back keys added before (counts of keys never added would be wrong afterwards)"""
+        keys = np.fromiter(keys, dtype=np.uint64)
+        if len(keys):
+            columns = self._columns(keys)
+            for row in range(self.depth):
+                np.subtract.at(self.counts[row], columns[row], 1)
+
+    def estimate(self, keys: Iterable[int]) -> np.ndarray:
+        keys = np.fromiter(keys, dtype=np.uint64)
+        if not len(keys):
+            return np.zeros(0, dtype=np.uint32)
+        columns = self._columns(keys)
+        return self.counts[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+class BoilerplateStripper:
+    """
+    Strips blocks found on more than `ratio` of a site's pages.
+
+    strip_all() counts a run's pages (each replacing what the same page counted on an
+    earlier run), then strips every one of them against the counts of the whole site.
+    Sites with fewer than `min_pages` pages are left as they are.
+
+    Args:
+        ratio: Share of pages a block must appear on to count as boilerplate
+        min_pages: Pages the site must have before anything is stripped
+        path: SQLite file the counts and every page's block hashes are kept in (None = this run only)
+        key: Metadata key that identifies a page across runs
+        width, depth: Count-min sketch size (memory is width * depth * 4 bytes)
+    """
+
+    def __init__(self, ratio: float = 0.5, min_pages: int = 10, path: Optional[str] = DEFAULT_BOILERPLATE_PATH,
+                 key: str = "link", width: int = 1 << 18, depth: int = 4):
+        self.ratio = ratio
+        self.min_pages = min_pages
+        self.key = key
+        self.sketch = CountMinSketch(width, depth)
+        self.pages = 0
+        self.pages_stripped = 0
+        self.blocks_removed = 0
+        self.chars_removed = 0
+        self._lock = threading.Lock()
+
+        if path and path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, hashes BLOB NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sketch (width INTEGER NOT NULL, depth INTEGER NOT NULL, counts BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT width, depth, counts FROM sketch").fetchone()
+        if row is not None and (row[0], row[1]) == (width, depth):
+            self.sketch.counts = np.frombuffer(row[2], dtype=np.uint32).reshape(depth, width).copy()
+            self.pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        elif row is not None:
+            # counted with another sketch size: start over
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM sketch")
+            self._conn.commit()
+
+    def count(self, page: Document):
+        """Add a page's blocks to the site's counts, replacing the page's earlier version"""
+        hashes = np.fromiter({block_hash(block) for block in split_blocks(page.page_content)}, dtype=np.uint64)
+        key = page.metadata.get(self.key)
+        with self._lock:
+            if key is None:
+                self.pages += 1
+            else:
+                row = self._conn.execute("SELECT hashes FROM pages WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.pages += 1
+                else:
+                    self.sketch.remove(np.frombuffer(row[0], dtype=np.uint64))
+                self._conn.execute("INSERT OR REPLACE INTO pages (key, hashes) VALUES (?, ?)", (key, hashes.tobytes()))
+            self.sketch.add(hashes)
+
+    def forget(self, keys: Iterable[str]):
+        """Take pages that are gone from the site out of the counts"""
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute("SELECT hashes FROM pages WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.sketch.remove(np.frombuffer(row[0], dtype=np.uint64))
+                    self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                    self.pages -= 1
+
+    def strip(self, page: Document) -> Document:
+        """Copy of `page` without the blocks that are boilerplate by the counts so far"""
+        blocks = split_blocks(page.page_content)
+        with self._lock:
+            if self.pages < self.min_pages:
+                return page
+            counts = self.sketch.estimate(block_hash(block) for block in blocks)
+            cutoff = self.ratio * self.pages
+        kept = []
+        for block, count in zip(blocks, counts):
+            if count > cutoff:
+                self.blocks_removed += 1
+                self.chars_removed += len(block)
+            else:
+                kept.append(block)
+        self.pages_stripped += 1
+        return Document(page_content="\n".join(kept), metadata=page.metadata)
+
+    def strip_all(self, pages: Iterable[Document]) -> List[Document]:
+        """Count all pages, save the counts, then strip each page against them"""
+        pages = list(pages)
+        for page in pages:
+            self.count(page)
+        self.save()
+        return [self.strip(page) for page in pages]
+
+    def save(self):
+        """Persist the counts and page hashes (strip_all does this before stripping)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sketch")
+            self._conn.execute("INSERT INTO sketch (width, depth, counts) VALUES (?, ?, ?)",
+                               (self.sketch.width, self.sketch.depth, self.sketch.counts.tobytes()))
+            self._conn.commit()
+
+    def summary(self) -> str:
+        return (f"Boilerplate: {self.blocks_removed} repeated blocks removed from {self.pages_stripped} pages "
+                f"({self.chars_removed} characters), {self.pages} pages of the site counted")
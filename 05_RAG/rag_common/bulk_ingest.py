@@ -0,0 +1,225 @@
+# bulk_ingest.py - Ingest whole directory trees of PDFs into one collection
+#
+# PDFs are parsed and chunked in a process pool (one file per task, so throughput scales
+# with cores), and their chunks are streamed into a single IngestionPipeline, whose shared
+# embed and upsert stages keep the embedding API busy up to its rate limit. Every file's
+# outcome and timings end up in a BulkReport that can be written out as JSON.
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.chunking import TokenTextChunker
+from rag_common.incremental import fetch_point_sources
+from rag_common.page_cache import DEFAULT_PAGE_CACHE_PATH, PageCache
+from rag_common.pdf_extract import load_pdf_parallel
+from rag_common.pipeline import FAILED_KEY, IngestionPipeline, IngestProgress
+
+
+@dataclass
+class FileReport:
+    path: str
+    status: str = "pending"  # "ok", "resumed" (finished by an interrupted run) or "failed"
+    pages: int = 0
+    cached_pages: int = 0  # served from the page cache instead of parsed
+    failed_pages: int = 0  # timed out or unreadable: the file's stored points are kept
+    chunks: int = 0
+    parse_seconds: float = 0.0
+    chunk_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class BulkReport:
+    collection_name: str
+    roots: List[str]
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    files: List[FileReport] = field(default_factory=list)
+    progress: Optional[IngestProgress] = None
+    points_pruned: int = 0
+
+    @property
+    def failed(self) -> List[FileReport]:
+        return [report for report in self.files if report.status not in ("ok", "resumed")]
+
+    def summary(self) -> str:
+        elapsed = self.finished_at - self.started_at
+        pages = sum(report.pages for report in self.files)
+        cached = sum(report.cached_pages for report in self.files)
+        progress = self.progress or IngestProgress()
+        resumed = sum(1 for report in self.files if report.status == "resumed")
+        return (f"{len(self.files) - len(self.failed)}/{len(self.files)} files ({resumed} resumed), "
+                f"{pages} pages ({cached} from cache) in {elapsed:.1f}s "
+                f"({pages / elapsed if elapsed else 0:.1f} pages/s): {progress.chunks_produced} chunks, "
+                f"{progress.chunks_unchanged} unchanged, {progress.vectors_embedded} embedded, "
+                f"{self.points_pruned} stale deleted, {len(self.failed)} files failed")
+
+    def write(self, path: str):
+        data = asdict(self)
+        data["elapsed_seconds"] = round(self.finished_at - self.started_at, 3)
+        data["failed"] = [report.path for report in self.failed]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+def find_pdfs(paths: List[str]) -> List[str]:
+    """Absolute paths of the given PDF files and every *.pdf below the given directories"""
+    found = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                found.update(os.path.join(dirpath, name) for name in filenames if name.lower().endswith(".pdf"))
+        else:
+            found.add(path)
+    return sorted(found)
+
+
+_chunker: Optional[TokenTextChunker] = None
+_page_cache: Optional[PageCache] = None
+
+
+def parse_and_chunk(path: str, chunk_size: int, chunk_overlap: int, page_timeout: Optional[float],
+                    page_cache_path: Optional[str] = None) -> Tuple[FileReport, List[Document]]:
+    """Worker: extract and chunk one PDF. Errors are reported, never raised"""
+    global _chunker, _page_cache
+    report = FileReport(path=path)
+    try:
+        start = time.perf_counter()
+        if page_cache_path and (_page_cache is None or _page_cache.path != page_cache_path):
+            _page_cache = PageCache(page_cache_path)
+        page_cache = _page_cache if page_cache_path else None
+        hits_before = page_cache.hits if page_cache else 0
+        pages = load_pdf_parallel(path, max_workers=1, page_timeout=page_timeout, page_cache=page_cache)
+        report.cached_pages = page_cache.hits - hits_before if page_cache else 0
+        report.parse_seconds = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        if _chunker is None or (_chunker.chunk_size, _chunker.chunk_overlap) != (chunk_size, chunk_overlap):
+            _chunker = TokenTextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        failed = [page for page in pages if page.metadata.get(FAILED_KEY)]
+        # failed pages go on as they are, so the pipeline keeps the file's points and retries it next run
+        chunks = _chunker.split_documents(pages) + failed
+        report.failed_pages = len(failed)
+        report.chunk_seconds = round(time.perf_counter() - start, 3)
+    except Exception as e:
+        report.status = "failed"
+        report.error = f"{type(e).__name__}: {e}"
+        return report, []
+    report.status = "ok"
+    report.pages = len(pages)
+    report.chunks = len(chunks) - report.failed_pages
+    return report, chunks
+
+
+class BulkIngestor:
+    """
+    Parse/chunk PDFs across processes and write them through one shared pipeline.
+
+    The input is treated as the complete content of its roots: with prune=True, chunks of
+    files that changed and points of PDFs under a root that no longer exist are deleted.
+    Points of files that failed to parse, or that have a page that failed, are kept as they are.
+
+    With a checkpoint, files finished by an interrupted run are not parsed again. With a
+    page cache, files whose content was parsed by any earlier run are not parsed either.
+
+    Args:
+        pipeline: Pipeline created with text_splitter=None and delete_stale=False
+        workers: Parsing processes (defaults to the CPU count)
+        chunk_size, chunk_overlap: Token sizes for TokenTextChunker
+        page_timeout: Seconds allowed per page
+        prune: Have the pipeline delete stale points once every chunk is written
+        checkpoint: Resume from (and record progress in) this checkpoint; its source_key must be "source"
+        page_cache_path: SQLite page text cache shared by the workers (None = always parse)
+    """
+
+    def __init__(self, pipeline: IngestionPipeline, workers: Optional[int] = None, chunk_size: int = 250,
+                 chunk_overlap: int = 50, page_timeout: Optional[float] = 30.0, prune: bool = True,
+                 checkpoint: Optional[IngestCheckpoint] = None,
+                 page_cache_path: Optional[str] = DEFAULT_PAGE_CACHE_PATH):
+        if pipeline.text_splitter is not None or pipeline.delete_stale:
+            raise ValueError("BulkIngestor needs a pipeline with text_splitter=None and delete_stale=False")
+        self.pipeline = pipeline
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.page_timeout = page_timeout
+        self.prune = prune
+        self.checkpoint = checkpoint
+        self.page_cache_path = page_cache_path
+
+    def run(self, paths: List[str]) -> BulkReport:
+        roots = [os.path.abspath(path) for path in paths]
+        files = find_pdfs(roots)
+        report = BulkReport(collection_name=self.pipeline.collection_name, roots=roots, started_at=time.time())
+        # read before the run, which clears the checkpoint once it completes
+        resumed = self.checkpoint.done_sources() if self.checkpoint is not None else set()
+
+        # The pipeline deletes the pruned points itself, so chunks of other files that were
+        # folded into one of them as near-duplicates are written back instead of lost
+        report.progress = self.pipeline.run(self._chunks(files, report, resumed), checkpoint=self.checkpoint,
+                                            prune=(lambda: self._stale(roots, report)) if self.prune else None)
+        report.points_pruned = report.progress.points_deleted
+        report.finished_at = time.time()
+        return report
+
+    def _chunks(self, files: List[str], report: BulkReport, resumed: Set[str]) -> Iterator[Document]:
+        """Chunks of every file in completion order, recording each file's report on the way"""
+        window = self.workers * 2  # files in flight, bounds the chunks waiting in memory
+        pending = {}  # future -> path
+        report.files.extend(FileReport(path, "resumed") for path in files if path in resumed)
+        next_file = iter([path for path in files if path not in resumed])
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit_next():
+                for path in next_file:
+                    future = executor.submit(parse_and_chunk, path, self.chunk_size, self.chunk_overlap,
+                                             self.page_timeout, self.page_cache_path)
+                    pending[future] = path
+                    return
+
+            for _ in range(window):
+                submit_next()
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = pending.pop(future)
+                        submit_next()
+                        try:
+                            file_report, chunks = future.result()
+                        except Exception as e:  # the worker process died
+                            file_report, chunks = FileReport(path, "failed", error=f"{type(e).__name__}: {e}"), []
+                        report.files.append(file_report)
+                        print(f"[{len(report.files)}/{len(files)}] {file_report.status:<6} {file_report.path} "
+                              f"({file_report.pages} pages, {file_report.cached_pages} cached, "
+                              f"{file_report.chunks} chunks, "
+                              f"{file_report.parse_seconds + file_report.chunk_seconds:.2f}s)"
+                              + (f": {file_report.error}" if file_report.error else ""))
+                        yield from chunks
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _stale(self, roots: List[str], report: BulkReport) -> List[str]:
+        """
+        Points of ingested files and of deleted PDFs; the pipeline keeps the ones this run
+        produced and deletes the rest
+        """
+        ingested = {file_report.path for file_report in report.files if file_report.status in ("ok", "resumed")}
+
+        def under_roots(source: str) -> bool:
+            return any(source == root or source.startswith(root.rstrip(os.sep) + os.sep) for root in roots)
+
+        client, collection_name = self.pipeline.client, self.pipeline.collection_name
+        return [
+            point_id
+            for point_id, source in fetch_point_sources(client, collection_name).items()
+            if source and (source in ingested or (under_roots(source) and not os.path.exists(source)))
+        ]
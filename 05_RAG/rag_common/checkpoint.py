@@ -0,0 +1,140 @@
+# checkpoint.py - Durable progress of an ingestion run, so a failed run can resume
+#
+# After every batch the pipeline writes to Qdrant, the batch's point IDs are committed
+# here, and so is every source (a PDF path, a page URL) whose chunks are all written,
+# together with its point IDs and the near-duplicates it folded into kept chunks. A
+# restarted run skips the finished sources entirely (no re-parsing or re-crawling) and keeps
+# their points and folds; within an unfinished source, chunks already in Qdrant are
+# recognized by their content-hash point IDs and never re-embedded or written twice. The
+# checkpoint is cleared once a run completes.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+DEFAULT_CHECKPOINT_DIR = os.getenv(
+    "CHECKPOINT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "checkpoints"),
+)
+
+
+class IngestCheckpoint:
+    """
+    Processed sources and upserted point IDs of one ingestion job, in SQLite.
+
+    Every commit is synchronous, so a crash or kill loses at most the batch being written.
+    A checkpoint written with a different `run_key` (e.g. other chunk settings) is discarded
+    on open, since its point IDs would not match what this run produces.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway checkpoint)
+        run_key: Identifies the job configuration the checkpoint is valid for
+        source_key: Metadata key of a chunk that names its source ("source" for PDFs, "link" for pages)
+    """
+
+    def __init__(self, path: str, run_key: str = "", source_key: str = "source"):
+        self.path = path
+        self.run_key = run_key
+        self.source_key = source_key
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS run (run_key TEXT NOT NULL, started_at REAL NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS upserted (point_id TEXT PRIMARY KEY)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, chunks INTEGER NOT NULL, done_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS source_points (point_id TEXT NOT NULL, source TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS source_points_source ON source_points (source)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS source_folds (kept_id TEXT NOT NULL, entry TEXT NOT NULL, source TEXT NOT NULL)"
+        )
+        row = self._conn.execute("SELECT run_key FROM run").fetchone()
+        if row is None or row[0] != run_key:
+            self._clear_tables()
+            self._conn.execute("INSERT INTO run (run_key, started_at) VALUES (?, ?)", (run_key, time.time()))
+        self._conn.commit()
+
+    @classmethod
+    def for_job(cls, name: str, run_key: str = "", source_key: str = "source",
+                directory: str = DEFAULT_CHECKPOINT_DIR) -> "IngestCheckpoint":
+        """Checkpoint file of a named job (e.g. the collection name) in the checkpoint directory"""
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        return cls(os.path.join(directory, f"{safe_name}.sqlite"), run_key=run_key, source_key=source_key)
+
+    def source_of(self, metadata: dict) -> Optional[str]:
+        source = metadata.get(self.source_key)
+        return str(source) if source is not None else None
+
+    def done_sources(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT source FROM sources")}
+
+    def is_done(self, source: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sources WHERE source = ?", (source,)).fetchone() is not None
+
+    def done_points(self) -> Set[str]:
+        """Point IDs of every finished source"""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT point_id FROM source_points")}
+
+    def upserted_points(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT point_id FROM upserted")}
+
+    def commit_batch(self, point_ids: Iterable[str]):
+        """Record a batch of points that Qdrant acknowledged"""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO upserted (point_id) VALUES (?)",
+                                   [(point_id,) for point_id in point_ids])
+            self._conn.commit()
+
+    def folds(self) -> List[Tuple[str, dict]]:
+        """(kept point ID, dropped chunk) of every near-duplicate folded by a finished source"""
+        with self._lock:
+            return [(kept_id, json.loads(entry))
+                    for kept_id, entry in self._conn.execute("SELECT kept_id, entry FROM source_folds")]
+
+    def commit_source(self, source: str, point_ids: List[str], folds: Iterable[Tuple[str, dict]] = ()):
+        """
+        Record a source whose chunks are all in Qdrant, with the point IDs it produced and the
+        near-duplicates it folded into kept points, as (kept point ID, dropped chunk)
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM source_points WHERE source = ?", (source,))
+            self._conn.executemany("INSERT INTO source_points (point_id, source) VALUES (?, ?)",
+                                   [(point_id, source) for point_id in point_ids])
+            self._conn.execute("DELETE FROM source_folds WHERE source = ?", (source,))
+            self._conn.executemany("INSERT INTO source_folds (kept_id, entry, source) VALUES (?, ?, ?)",
+                                   [(kept_id, json.dumps(entry, default=str), source) for kept_id, entry in folds])
+            self._conn.execute("INSERT OR REPLACE INTO sources (source, chunks, done_at) VALUES (?, ?, ?)",
+                               (source, len(point_ids), time.time()))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sources = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+            upserted = self._conn.execute("SELECT COUNT(*) FROM upserted").fetchone()[0]
+        return {"sources_done": sources, "points_upserted": upserted}
+
+    def clear(self):
+        """Forget all progress: the run completed (or must start over)"""
+        with self._lock:
+            self._clear_tables()
+            self._conn.execute("INSERT INTO run (run_key, started_at) VALUES (?, ?)", (self.run_key, time.time()))
+            self._conn.commit()
+
+    def _clear_tables(self):
+        # Caller holds self._lock (or is __init__)
+        for table in ("run", "upserted", "sources", "source_points", "source_folds"):
+            self._conn.execute(f"DELETE FROM {table}")
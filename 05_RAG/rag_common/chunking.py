@@ -0,0 +1,145 @@
+# chunking.py - Token-sized chunking, a drop-in for RecursiveCharacterTextSplitter
+#
+# Chunk sizes are measured in tiktoken tokens of the embedding model instead of characters.
+# Every document is encoded exactly once; chunk boundaries are then picked from the token
+# boundaries with numpy (byte offsets from a per-token length table, separator scores for
+# every boundary at once), preferring paragraph > line > sentence > word breaks.
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import tiktoken
+from langchain_core.documents import Document
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+_token_lengths: Dict[str, np.ndarray] = {}
+_token_lengths_lock = threading.Lock()
+
+
+def get_encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def token_byte_lengths(encoding: tiktoken.Encoding) -> np.ndarray:
+    """UTF-8 byte length of every token id of `encoding` (built once per encoding)"""
+    with _token_lengths_lock:
+        if encoding.name not in _token_lengths:
+            lengths = np.zeros(encoding.n_vocab, dtype=np.int64)
+            for token in range(encoding.n_vocab):
+                try:
+                    lengths[token] = len(encoding.decode_single_token_bytes(token))
+                except KeyError:
+                    pass  # unused id in the vocabulary
+            _token_lengths[encoding.name] = lengths
+        return _token_lengths[encoding.name]
+
+
+class TokenTextChunker:
+    """
+    Split documents into chunks of at most `chunk_size` tokens, overlapping by about
+    `chunk_overlap` tokens, cut at the best separator in the last part of each window.
+
+    Args:
+        chunk_size: Maximum tokens per chunk
+        chunk_overlap: Tokens repeated at the start of the next chunk
+        model: Embedding model whose tokenizer measures the chunks
+        separators: Preferred break points, best first
+        min_chunk_ratio: A window is never cut before this fraction of chunk_size
+    """
+
+    def __init__(self, chunk_size: int = 250, chunk_overlap: int = 50, model: str = "text-embedding-3-small",
+                 separators: Sequence[str] = DEFAULT_SEPARATORS, min_chunk_ratio: float = 0.5):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_chunk = max(1, int(chunk_size * min_chunk_ratio))
+        self.separators = [sep.encode("utf-8") for sep in separators]
+        self.encoding = get_encoding(model)
+        self.token_lengths = token_byte_lengths(self.encoding)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def split_text(self, text: str) -> List[str]:
+        return self._split_encoded(text.encode("utf-8"), self.encoding.encode_ordinary(text))
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        metadatas = metadatas or [{} for _ in texts]
+        if len(texts) > 1:
+            # encode_ordinary_batch tokenizes the texts on tiktoken's own threads
+            encoded = self.encoding.encode_ordinary_batch(texts, num_threads=os.cpu_count() or 1)
+        else:
+            encoded = [self.encoding.encode_ordinary(text) for text in texts]
+        chunks = []
+        for text, tokens, metadata in zip(texts, encoded, metadatas):
+            for chunk in self._split_encoded(text.encode("utf-8"), tokens):
+                chunks.append(Document(page_content=chunk, metadata=dict(metadata)))
+        return chunks
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        documents = list(documents)
+        return self.create_documents([doc.page_content for doc in documents], [doc.metadata for doc in documents])
+
+    def _boundary_scores(self, data: bytes, bounds: np.ndarray) -> np.ndarray:
+        """
+        Score of cutting at each token boundary: len(separators) for the first separator down
+        to 1 for the last, 0 for no separator, -1 inside a UTF-8 character.
+        """
+        # zero padding on both sides lets every lookup below skip bounds checks
+        pad = max(len(sep) for sep in self.separators) + 1
+        raw = np.zeros(len(data) + 2 * pad, dtype=np.uint8)
+        raw[pad:pad + len(data)] = np.frombuffer(data, dtype=np.uint8)
+        at = bounds + pad
+        scores = np.zeros(len(bounds), dtype=np.int64)
+        for rank, sep in enumerate(self.separators):
+            hit = np.zeros(len(bounds), dtype=bool)
+            # the boundary may sit anywhere after the separator's last non-whitespace byte,
+            # so ". " matches before the space but never before the period
+            for shift in range(len(sep.rstrip()), len(sep) + 1):
+                match = raw[at - shift] == sep[0]
+                for i in range(1, len(sep)):
+                    match &= raw[at - shift + i] == sep[i]
+                hit |= match
+            scores[hit & (scores == 0)] = len(self.separators) - rank
+        scores[(raw[at] & 0xC0) == 0x80] = -1  # inside a UTF-8 character
+        return scores
+
+    def _split_encoded(self, data: bytes, tokens: List[int]) -> List[str]:
+        count = len(tokens)
+        if not count:
+            return []
+        bounds = np.zeros(count + 1, dtype=np.int64)  # byte offset before token i
+        np.cumsum(self.token_lengths[np.asarray(tokens, dtype=np.int64)], out=bounds[1:])
+        scores = self._boundary_scores(data, bounds)
+
+        chunks = []
+        start = 0
+        while start < count:
+            end = min(start + self.chunk_size, count)
+            cut = end
+            if end < count:
+                # latest best-scoring boundary in [start + min_chunk, end]
+                window = scores[start + min(self.min_chunk, end - start):end + 1]
+                best = len(window) - 1 - int(np.argmax(window[::-1]))
+                if window[best] >= 0:
+                    cut = end - (len(window) - 1 - best)
+            chunk = data[bounds[start]:bounds[cut]].decode("utf-8", errors="ignore").strip()
+            if chunk:
+                chunks.append(chunk)
+            if cut >= count:
+                break
+            # overlap starts at the first word (or better) break of its range
+            low = max(start + 1, cut - self.chunk_overlap)
+            overlap = scores[low:cut]
+            breaks = np.flatnonzero(overlap > 0)
+            if not len(breaks):
+                breaks = np.flatnonzero(overlap >= 0)
+            start = low + int(breaks[0]) if len(breaks) else cut
+        return chunks
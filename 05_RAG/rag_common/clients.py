@@ -0,0 +1,202 @@
+# clients.py - Process-wide Qdrant/OpenAI clients, vector store handles and collection status
+#
+# QdrantClient (one HTTP connection pool or gRPC channel) and OpenAI (one httpx pool) are
+# thread-safe and expensive to set up, so each configuration is created once per process and
+# shared by every request, Streamlit rerun and session. On top of them, whether a collection
+# exists, its vector size, whether it has BM25 sparse vectors and the search params of the
+# profile it was built with are cached, and so is a
+# HybridQdrantVectorStore per collection, built from that status without validation round
+# trips. A query is then one search RPC (plus an embedding call on a cache miss) and the
+# LLM call.
+#
+# Status is cached until invalidate_collection() is called by whatever creates, fills or
+# deletes the collection; COLLECTION_STATUS_TTL bounds how long changes made by another
+# process (an indexer run from the command line) go unnoticed.
+#
+# VECTOR_BACKEND=local keeps each collection in an in-process local index instead
+# (local_index.py), with no Qdrant involved: get_ingestion_pipeline() writes to it and
+# get_vector_store() answers queries from it. An index starts from the collection's snapshot
+# if there is one, and a store is reloaded whenever its index or snapshot changes.
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+from openai import OpenAI
+from qdrant_client import QdrantClient, models
+
+from rag_common.collection_config import collection_dimensions, get_collection_embedding_model, sized_embedding_model
+from rag_common.collection_profiles import collection_search_params
+from rag_common.embedding_cache import CachedEmbeddings, get_embedding_model
+from rag_common.hybrid import HybridQdrantVectorStore, collection_has_lexical
+from rag_common.local_index import (LocalIngestionPipeline, LocalReplicaStore, load_local_index,
+                                    local_index_dimensions, local_index_mtime)
+from rag_common.pipeline import IngestionPipeline
+from rag_common.snapshot import default_snapshot_path
+
+STATUS_TTL = float(os.getenv("COLLECTION_STATUS_TTL", "60"))
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")  # "qdrant" or "local"
+
+_lock = threading.Lock()
+_qdrant_clients: Dict[Tuple, QdrantClient] = {}
+_openai_client: Optional[OpenAI] = None
+
+
+@dataclass(frozen=True)
+class CollectionStatus:
+    exists: bool
+    dimensions: Optional[int]
+    checked_at: float
+    lexical: bool = False  # has BM25 sparse vectors for hybrid search
+    search_params: Optional[models.SearchParams] = None  # of the profile the collection was created with
+
+
+_statuses: Dict[Tuple[int, str], CollectionStatus] = {}
+_vector_stores: Dict[Tuple[int, str, str], HybridQdrantVectorStore] = {}
+# -> ((snapshot mtime, index mtime), store)
+_local_stores: Dict[Tuple[str, str], Tuple[Tuple[Optional[float], Optional[float]], LocalReplicaStore]] = {}
+_local_index_locks: Dict[str, threading.Lock] = {}  # per collection, held while its local index is loaded or rebuilt
+
+
+def get_qdrant_client(url: str = "http://localhost:6333", api_key: Optional[str] = None, prefer_grpc: bool = True,
+                      timeout: int = 30) -> QdrantClient:
+    """The process-wide client for a Qdrant endpoint, created on first use"""
+    key = (url, api_key, prefer_grpc, timeout)
+    with _lock:
+        client = _qdrant_clients.get(key)
+        if client is None:
+            client = _qdrant_clients[key] = QdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc,
+                                                         timeout=timeout)
+        return client
+
+
+def get_openai_client() -> OpenAI:
+    """The process-wide OpenAI client"""
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            _openai_client = OpenAI()
+        return _openai_client
+
+
+def collection_status(client: QdrantClient, collection_name: str, max_age: float = STATUS_TTL) -> CollectionStatus:
+    """Whether a collection exists and its vector size, from the cache unless older than `max_age` seconds"""
+    key = (id(client), collection_name)
+    with _lock:
+        status = _statuses.get(key)
+    if status is not None and time.time() - status.checked_at < max_age:
+        return status
+    dimensions = collection_dimensions(client, collection_name)
+    exists = dimensions is not None
+    status = CollectionStatus(exists=exists, dimensions=dimensions, checked_at=time.time(),
+                              lexical=exists and collection_has_lexical(client, collection_name),
+                              search_params=collection_search_params(client, collection_name) if exists else None)
+    with _lock:
+        _statuses[key] = status
+        if not status.exists:
+            # a collection that was deleted (or recreated) must not be searched through an old handle
+            for store_key in [k for k in _vector_stores if k[:2] == key]:
+                del _vector_stores[store_key]
+    return status
+
+
+def invalidate_collection(client: QdrantClient, collection_name: str):
+    """Forget the cached status and vector store of a collection; call after ingesting into or deleting it"""
+    key = (id(client), collection_name)
+    with _lock:
+        _statuses.pop(key, None)
+        for store_key in [k for k in _vector_stores if k[:2] == key]:
+            del _vector_stores[store_key]
+        for store_key in [k for k in _local_stores if k[0] == collection_name]:
+            del _local_stores[store_key]
+
+
+def get_vector_store(client: QdrantClient, collection_name: str,
+                     model: str = "text-embedding-3-small") -> Optional[Union[HybridQdrantVectorStore, LocalReplicaStore]]:
+    """
+    Shared vector store for an existing collection (None if it does not exist).
+
+    Query vectors get the size the collection was indexed with, and go through the shared
+    embedding cache, so repeating a question costs no embedding call. Either kind of store
+    has hybrid_search() (dense + BM25, fused by RRF), which searches a Qdrant collection
+    with the ef/rescoring of the profile it was created with. With VECTOR_BACKEND=local
+    the store is a LocalReplicaStore and `client` is not used.
+    """
+    if VECTOR_BACKEND == "local":
+        return get_local_replica_store(collection_name, model)
+    status = collection_status(client, collection_name)
+    if not status.exists:
+        return None
+    key = (id(client), collection_name, model)
+    with _lock:
+        vector_store = _vector_stores.get(key)
+        if vector_store is None:
+            vector_store = _vector_stores[key] = HybridQdrantVectorStore(
+                client=client,
+                collection_name=collection_name,
+                embedding=get_embedding_model(model, status.dimensions),
+                validate_collection_config=False,  # the status lookup above already read the config
+                lexical=status.lexical,
+                search_params=status.search_params,
+            )
+        return vector_store
+
+
+def get_local_replica_store(collection_name: str, model: str = "text-embedding-3-small") -> Optional[LocalReplicaStore]:
+    """
+    Shared store over a collection's local index (None if it has neither an index nor a
+    snapshot). Checking the mtimes of the snapshot and the index is two stat() calls per
+    query, so a new export or an ingestion is picked up by the next query, from any process.
+    """
+    snapshot_path = default_snapshot_path(collection_name)
+    mtime = (os.path.getmtime(snapshot_path) if os.path.exists(snapshot_path) else None,
+             local_index_mtime(collection_name))
+    key = (collection_name, model)
+    with _lock:
+        cached = _local_stores.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        index_lock = _local_index_locks.setdefault(collection_name, threading.Lock())
+    # A rebuild from the snapshot can take a while: only queries of this collection wait for it
+    with index_lock:
+        with _lock:
+            cached = _local_stores.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]  # loaded by the query we waited for
+        index = load_local_index(collection_name, snapshot_path=snapshot_path)
+        store = LocalReplicaStore(index, get_embedding_model(model, index.dimensions)) if index is not None else None
+        mtime = (mtime[0], local_index_mtime(collection_name))  # a rebuild from the snapshot rewrote the index
+        with _lock:
+            if store is None:
+                _local_stores.pop(key, None)
+            else:
+                _local_stores[key] = (mtime, store)
+        return store
+
+
+def get_embedding_model_for(client: QdrantClient, collection_name: str, model: str = "text-embedding-3-small",
+                            dimensions: Optional[int] = None) -> CachedEmbeddings:
+    """
+    get_collection_embedding_model() for the configured backend: with VECTOR_BACKEND=local the
+    size is read from the collection's local index (or snapshot), and `client` is not used.
+    """
+    if VECTOR_BACKEND == "local":
+        return sized_embedding_model(collection_name, local_index_dimensions(collection_name), model, dimensions)
+    return get_collection_embedding_model(client, collection_name, model, dimensions)
+
+
+def get_ingestion_pipeline(client: QdrantClient, collection_name: str, text_splitter,
+                           model: str = "text-embedding-3-small", dimensions: Optional[int] = None,
+                           **kwargs) -> IngestionPipeline:
+    """
+    IngestionPipeline into a collection of the configured backend, embedding at the size the
+    collection has (or `dimensions` for a new one). With VECTOR_BACKEND=local it is a
+    LocalIngestionPipeline writing to the collection's local index, and `client` is not used.
+    `kwargs` go to the pipeline (profile, dedup, scope, ...).
+    """
+    embedding = get_embedding_model_for(client, collection_name, model, dimensions)
+    if VECTOR_BACKEND == "local":
+        return LocalIngestionPipeline(collection_name, embedding, text_splitter, **kwargs)
+    return IngestionPipeline(client, collection_name, embedding, text_splitter, **kwargs)
@@ -0,0 +1,53 @@
+# collection_config.py - Keep query embeddings matched to the collection they search
+#
+# The vector size a collection was created with is its record of the embedding dimensions
+# (this qdrant-client has no collection metadata), so indexers and query paths build their
+# embedding model from it instead of assuming the model's full 1536 dimensions.
+
+from typing import Optional
+
+from qdrant_client import QdrantClient
+
+from rag_common.embedding_cache import MODEL_DIMENSIONS, CachedEmbeddings, default_dimensions, get_embedding_model
+
+
+class DimensionMismatchError(ValueError):
+    """The requested embedding size differs from the one an existing collection was built with"""
+
+
+def collection_dimensions(client: QdrantClient, collection_name: str) -> Optional[int]:
+    """Vector size of an existing collection (None if it does not exist)"""
+    if not client.collection_exists(collection_name):
+        return None
+    vectors = client.get_collection(collection_name).config.params.vectors
+    if isinstance(vectors, dict):  # named vectors: use the default (unnamed) one
+        vectors = vectors.get("")
+    return vectors.size if vectors else None
+
+
+def get_collection_embedding_model(client: QdrantClient, collection_name: str,
+                                   model: str = "text-embedding-3-small",
+                                   dimensions: Optional[int] = None) -> CachedEmbeddings:
+    """
+    Embedding model whose output size matches `collection_name`.
+
+    For an existing collection the size is read from it; passing a different `dimensions`
+    raises DimensionMismatchError (re-index into a new collection to change it). For a new
+    collection `dimensions` (default: EMBEDDING_DIMENSIONS, else the model's full size)
+    decides the size it will be created with.
+    """
+    return sized_embedding_model(collection_name, collection_dimensions(client, collection_name), model, dimensions)
+
+
+def sized_embedding_model(collection_name: str, stored: Optional[int], model: str = "text-embedding-3-small",
+                          dimensions: Optional[int] = None) -> CachedEmbeddings:
+    """get_collection_embedding_model() for a collection whose size is known (`stored`, None if it is new)"""
+    requested = dimensions or default_dimensions() or MODEL_DIMENSIONS.get(model)
+    if stored is None:
+        return get_embedding_model(model, requested)
+    if dimensions and dimensions != stored:
+        raise DimensionMismatchError(
+            f"Collection {collection_name!r} stores {stored}-dimension vectors, not {dimensions}; "
+            f"index into a new collection to change the size"
+        )
+    return get_embedding_model(model, stored)
@@ -0,0 +1,172 @@
+# collection_profiles.py - Named Qdrant collection settings for different workloads
+#
+# A profile decides how a new collection is built (HNSW graph, what lives on disk, vector
+# quantization) and how it is searched (ef, rescoring of quantized hits):
+#   default      Qdrant's defaults: float32 vectors and HNSW graph in RAM
+#   low-latency  denser graph, int8 vectors in RAM, rescored against the originals
+#   low-memory   originals, graph and payload on disk, only quantized vectors in RAM
+#   bulk-load    no HNSW graph while points are uploaded, built once after the upload
+# Pick one with COLLECTION_PROFILE, or pass its name to the indexers and RAGProcessor.
+# Queries do not look at COLLECTION_PROFILE: collection_search_params() recognises the
+# profile from the collection's own config, so the search settings always match how the
+# collection was built.
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from qdrant_client import QdrantClient, models
+
+from rag_common.hybrid import sparse_vectors_config
+
+# Binary quantization keeps 1 bit per dimension, which only preserves ranking well for
+# large vectors; smaller ones (reduced-dimension embeddings) get int8 instead
+BINARY_MIN_DIMENSIONS = 1024
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """
+    Creation and search settings for a collection.
+
+    Args:
+        name: Profile name
+        m: HNSW edges per node (more = better recall and latency, more RAM)
+        ef_construct: Candidates considered while building the graph
+        search_ef: Candidates considered per search (None = Qdrant's default)
+        on_disk_vectors: Keep the original vectors memory-mapped on disk
+        on_disk_payload: Keep payloads (chunk texts) on disk
+        on_disk_index: Keep the HNSW graph on disk
+        quantization: None, "scalar" (int8) or "binary" (1 bit per dimension)
+        rescore: Re-rank quantized hits with the original vectors
+        oversampling: Quantized candidates fetched per requested hit before rescoring
+        defer_index: Build the HNSW graph only after the upload (finish_load)
+        lexical: Also store BM25 sparse vectors, for hybrid search (hybrid.py)
+    """
+    name: str
+    m: int = 16
+    ef_construct: int = 100
+    search_ef: Optional[int] = None
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+    on_disk_index: bool = False
+    quantization: Optional[str] = None
+    rescore: bool = True
+    oversampling: float = 1.0
+    defer_index: bool = False
+    lexical: bool = True
+
+    def quantization_config(self, vector_size: int):
+        quantization = self.quantization
+        if quantization == "binary" and vector_size < BINARY_MIN_DIMENSIONS:
+            quantization = "scalar"
+        if quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def create_collection(self, client: QdrantClient, collection_name: str, vector_size: int,
+                          distance: models.Distance = models.Distance.COSINE):
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=vector_size, distance=distance, on_disk=self.on_disk_vectors),
+            hnsw_config=models.HnswConfigDiff(
+                m=0 if self.defer_index else self.m,  # m=0 disables graph building
+                ef_construct=self.ef_construct,
+                on_disk=self.on_disk_index,
+            ),
+            quantization_config=self.quantization_config(vector_size),
+            on_disk_payload=self.on_disk_payload,
+            sparse_vectors_config=sparse_vectors_config() if self.lexical else None,
+        )
+
+    def finish_load(self, client: QdrantClient, collection_name: str, wait: bool = False,
+                    timeout: float = 600.0):
+        """
+        Build the HNSW graph deferred by defer_index (no-op otherwise, or if already built).
+        Searches stay correct meanwhile, as exact scans. With wait=True, block until the
+        collection is green again.
+        """
+        if not self.defer_index:
+            return
+        if client.get_collection(collection_name).config.hnsw_config.m != 0:
+            return
+        client.update_collection(collection_name, hnsw_config=models.HnswConfigDiff(m=self.m))
+        deadline = time.monotonic() + timeout
+        while wait and time.monotonic() < deadline:
+            if client.get_collection(collection_name).status == models.CollectionStatus.GREEN:
+                return
+            time.sleep(0.5)
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        """SearchParams for queries against a collection created with this profile"""
+        if self.search_ef is None and self.quantization is None:
+            return None
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.search_ef, quantization=quantization)
+
+    def similarity(self, config: models.CollectionConfig) -> int:
+        """
+        How many of this profile's creation settings a collection's config shows (-1 if its
+        quantization differs, which would make the search params wrong)
+        """
+        vectors = config.params.vectors
+        if isinstance(vectors, dict):
+            vectors = vectors.get("")
+        if vectors is None or type(config.quantization_config) is not type(self.quantization_config(vectors.size)):
+            return -1
+        return sum((
+            config.hnsw_config.m in ((0, self.m) if self.defer_index else (self.m,)),
+            config.hnsw_config.ef_construct == self.ef_construct,
+            bool(config.hnsw_config.on_disk) == self.on_disk_index,
+            bool(vectors.on_disk) == self.on_disk_vectors,
+            bool(config.params.on_disk_payload) == self.on_disk_payload,
+        ))
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    profile.name: profile
+    for profile in (
+        CollectionProfile("default"),
+        CollectionProfile("low-latency", m=32, ef_construct=256, search_ef=128, quantization="scalar",
+                          oversampling=1.5),
+        CollectionProfile("low-memory", m=16, ef_construct=100, search_ef=64, on_disk_vectors=True,
+                          on_disk_payload=True, on_disk_index=True, quantization="binary", oversampling=3.0),
+        CollectionProfile("bulk-load", m=16, ef_construct=100, on_disk_payload=True, quantization="scalar",
+                          oversampling=1.5, defer_index=True),
+    )
+}
+
+
+def get_profile(name: Optional[str] = None) -> CollectionProfile:
+    """Profile by name (default: COLLECTION_PROFILE, else "default")"""
+    name = name or os.getenv("COLLECTION_PROFILE") or "default"
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile {name!r}, expected one of: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def profile_of_collection(client: QdrantClient, collection_name: str) -> Optional[CollectionProfile]:
+    """
+    The profile an existing collection was created with, recognised from its config (the
+    closest one, since servers may normalize settings; None if its quantization fits none)
+    """
+    config = client.get_collection(collection_name).config
+    similarity, profile = max(((profile.similarity(config), profile) for profile in PROFILES.values()),
+                              key=lambda pair: pair[0])
+    return profile if similarity >= 0 else None
+
+
+def collection_search_params(client: QdrantClient, collection_name: str) -> Optional[models.SearchParams]:
+    """SearchParams for an existing collection: those of the profile it was created with"""
+    profile = profile_of_collection(client, collection_name)
+    if profile is None:
+        # quantized some other way: still rescore its hits with the original vectors
+        return models.SearchParams(quantization=models.QuantizationSearchParams(rescore=True))
+    return profile.search_params()
@@ -0,0 +1,200 @@
+# context_packer.py - Token-budgeted prompt context from retrieved chunks
+#
+# Joining the top-k chunks as they come pays for the same text several times: neighbouring
+# chunks of a page repeat chunk_overlap tokens of each other, and every chunk brings its own
+# header. ContextPacker assembles the context instead:
+#
+#   1. chunks of the same page (or URL) that overlap, or contain one another, are merged
+#      into one span with the repeated text kept once
+#   2. spans are packed greedily by score per token (rank-based unless scores are given)
+#      until the tiktoken budget is reached
+#   3. the packed spans of a page are written under a single header, pages in order of their
+#      best span
+#
+# PackedContext reports the tokens of the result next to those of the plain join, so the
+# chat scripts can show what a question saved.
+
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from rag_common.chunking import get_encoding
+
+DEFAULT_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+MIN_OVERLAP = 20  # characters a suffix/prefix match needs before two chunks count as neighbours
+RANK_OFFSET = 2  # rank-based score: 1 / (RANK_OFFSET + rank)
+SPAN_SEPARATOR = "\n...\n"
+
+
+def page_key(metadata: dict) -> Hashable:
+    """Chunks with the same key may be merged: the same page of a file, or the same URL"""
+    return metadata.get("source") or metadata.get("link"), metadata.get("page")
+
+
+def _overlap(a: str, b: str, min_chars: int = MIN_OVERLAP) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b` (0 if shorter than min_chars)"""
+    probe = b[:min_chars]
+    if len(probe) < min_chars:
+        return 0
+    start = a.find(probe, max(0, len(a) - len(b)))
+    while start != -1:
+        if b.startswith(a[start:]):
+            return len(a) - start
+        start = a.find(probe, start + 1)
+    return 0
+
+
+def merge_spans(a: str, b: str) -> Optional[str]:
+    """`a` and `b` as one text with their shared part once, or None if they do not overlap"""
+    if b in a:
+        return a
+    if a in b:
+        return b
+    overlap = _overlap(a, b)
+    if overlap:
+        return a + b[overlap:]
+    overlap = _overlap(b, a)
+    if overlap:
+        return b + a[overlap:]
+    return None
+
+
+@dataclass
+class _Span:
+    key: Hashable
+    text: str
+    metadata: dict
+    score: float
+    chunks: int = 1
+    tokens: int = 0
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int  # tokens of `text`
+    naive_tokens: int  # tokens of every chunk joined with its own header
+    chunks: int  # chunks received
+    chunks_packed: int  # of which are in `text` (whole, or merged into a span)
+    spans: List[str] = field(default_factory=list)
+
+    @property
+    def saved(self) -> int:
+        return self.naive_tokens - self.tokens
+
+    def summary(self) -> str:
+        return (f"Context: {self.tokens} tokens from {self.chunks_packed}/{self.chunks} chunks "
+                f"({self.saved} saved of {self.naive_tokens})")
+
+
+class ContextPacker:
+    """
+    Builds the context of a prompt from retrieved chunks within a token budget.
+
+    Args:
+        render: Formats one page's text and metadata (the header lines around the content)
+        budget: Tokens the context may take
+        model: LLM whose tokenizer counts the tokens
+        key: Which chunks may be merged (default: same page of the same file, or same URL)
+        separator: Between pages
+    """
+
+    def __init__(self, render: Callable[[str, dict], str], budget: int = DEFAULT_BUDGET, model: str = "gpt-4o-mini",
+                 key: Callable[[dict], Hashable] = page_key, separator: str = "\n\n"):
+        self.render = render
+        self.budget = budget
+        self.key = key
+        self.separator = separator
+        self.encoding = get_encoding(model)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def pack(self, docs: Sequence[Document], scores: Optional[Sequence[float]] = None) -> PackedContext:
+        """
+        Context from `docs` (best first).
+
+        Args:
+            docs: Retrieved chunks
+            scores: Their relevance, higher is better (default: by rank)
+        """
+        if scores is None:
+            scores = [1 / (RANK_OFFSET + rank) for rank in range(len(docs))]
+        naive_tokens = self.count_tokens(self.separator.join(self.render(doc.page_content, doc.metadata)
+                                                             for doc in docs))
+
+        spans = self._merge(docs, scores)
+        separator_tokens = self.count_tokens(self.separator)
+        header_tokens = {span.key: self.count_tokens(self.render("", span.metadata)) + separator_tokens
+                         for span in spans}
+        for span in spans:
+            span.tokens = self.count_tokens(span.text + SPAN_SEPARATOR)
+
+        # greedy by score per token; a span opening a new page also pays for its header
+        packed: List[_Span] = []
+        used, pages = 0, set()
+        for span in sorted(spans, key=lambda s: s.score / (s.tokens + header_tokens[s.key]), reverse=True):
+            cost = span.tokens + (0 if span.key in pages else header_tokens[span.key])
+            if used + cost <= self.budget:
+                packed.append(span)
+                used += cost
+                pages.add(span.key)
+        if not packed and spans:
+            # not even the best span fits: its beginning, rather than no context at all
+            best = max(spans, key=lambda s: s.score)
+            room = max(0, self.budget - header_tokens[best.key])
+            best.text = self.encoding.decode(self.encoding.encode_ordinary(best.text)[:room])
+            packed.append(best)
+
+        text = self._render(packed)
+        tokens = self.count_tokens(text)
+        while tokens > self.budget and len(packed) > 1:
+            # the estimate was off by a few tokens where spans meet: drop the least valuable span
+            packed.remove(min(packed, key=lambda s: s.score / s.tokens))
+            text = self._render(packed)
+            tokens = self.count_tokens(text)
+        return PackedContext(text=text, tokens=tokens, naive_tokens=naive_tokens, chunks=len(docs),
+                             chunks_packed=sum(span.chunks for span in packed), spans=[span.text for span in packed])
+
+    def _render(self, spans: List[_Span]) -> str:
+        """Spans grouped by page under one header each, best page and span first"""
+        by_page: Dict[Hashable, List[_Span]] = {}
+        for span in sorted(spans, key=lambda s: s.score, reverse=True):
+            by_page.setdefault(span.key, []).append(span)
+        return self.separator.join(
+            self.render(SPAN_SEPARATOR.join(span.text for span in page_spans), page_spans[0].metadata)
+            for page_spans in by_page.values()
+        )
+
+    def _merge(self, docs: Sequence[Document], scores: Sequence[float]) -> List[_Span]:
+        """Spans of overlapping chunks of the same page, with the scores of their chunks added up"""
+        spans: List[_Span] = []
+        for doc, score in zip(docs, scores):
+            span = _Span(key=self.key(doc.metadata), text=doc.page_content, metadata=dict(doc.metadata), score=score)
+            # a new chunk can bridge two spans of its page, so keep merging until nothing overlaps
+            while True:
+                for other in spans:
+                    if other.key != span.key:
+                        continue
+                    merged = merge_spans(other.text, span.text)
+                    if merged is not None:
+                        spans.remove(other)
+                        span = _Span(key=span.key, text=merged, metadata=_merged_metadata(other.metadata, span.metadata),
+                                     score=other.score + span.score, chunks=other.chunks + span.chunks)
+                        break
+                else:
+                    break
+            spans.append(span)
+        return spans
+
+
+def _merged_metadata(first: dict, second: dict) -> dict:
+    """Metadata of the better-ranked chunk, listing the near-duplicates of both"""
+    metadata = dict(first)
+    also_in = list(first.get("also_in", []))
+    also_in += [dup for dup in second.get("also_in", []) if dup not in also_in]
+    if also_in:
+        metadata["also_in"] = also_in
+    return metadata
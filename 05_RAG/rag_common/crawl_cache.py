@@ -0,0 +1,116 @@
+# crawl_cache.py - Persistent ETag / Last-Modified / content-hash store for conditional crawling
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+DEFAULT_CRAWL_CACHE_PATH = os.getenv(
+    "CRAWL_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "crawl.sqlite"),
+)
+
+
+@dataclass
+class CrawlEntry:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+    fetched_at: float
+
+
+class CrawlCache:
+    """
+    Remembers what each URL looked like when it was last indexed.
+
+    The crawler sends If-None-Match / If-Modified-Since from here, and a page that comes back
+    304 (or 200 with an identical body hash) is added to `unchanged` and never parsed again.
+    New validators are only staged during a crawl: call commit() once the pages were indexed,
+    so a failed run is retried in full next time. URLs that could not be fetched or parsed are
+    collected in `failed` (see fail()), so callers can keep their previously indexed content.
+    """
+
+    def __init__(self, path: str = DEFAULT_CRAWL_CACHE_PATH):
+        self.path = path
+        self.unchanged: Set[str] = set()
+        self.failed: Set[str] = set()
+        self._staged: Dict[str, CrawlEntry] = {}
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def hash_content(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def get(self, url: str) -> Optional[CrawlEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, content_hash, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return CrawlEntry(*row) if row else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Request headers that let the server answer 304 Not Modified"""
+        entry = self.get(url)
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def check(self, url: str, status: int, headers: Dict[str, str], content: bytes) -> bool:
+        """
+        Record a response and return True if the page is unchanged since it was last indexed.
+
+        `headers` must have lower-cased names. A 304 for a page with no stored entry is a miss
+        and records nothing: its empty body is not the page.
+        """
+        entry = self.get(url)
+        if status == 304:
+            if entry is None:
+                return False
+            self.unchanged.add(url)
+            return True
+        content_hash = self.hash_content(content)
+        if entry and entry.content_hash == content_hash:
+            self.unchanged.add(url)
+            return True
+        self._staged[url] = CrawlEntry(url, headers.get("etag"), headers.get("last-modified"), content_hash, time.time())
+        return False
+
+    def fail(self, url: str):
+        """Record that a fetched page could not be used: nothing is staged for it, so it is retried next run"""
+        self.failed.add(url)
+        self._staged.pop(url, None)
+
+    def commit(self):
+        """Persist validators of the pages fetched since the last commit"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                [(e.url, e.etag, e.last_modified, e.content_hash, e.fetched_at) for e in self._staged.values()],
+            )
+            self._conn.commit()
+            self._staged.clear()
+
+    def reset(self):
+        """Forget every page, e.g. when the collection they were indexed into is gone"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+            self._staged.clear()
+            self.unchanged.clear()
+            self.failed.clear()
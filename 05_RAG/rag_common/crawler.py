@@ -0,0 +1,168 @@
+# crawler.py - Concurrent, polite async web fetching
+#
+# One pooled keep-alive aiohttp session fetches many URLs at once, bounded by a global
+# concurrency limit and a token bucket per host, and reads bodies in streamed chunks.
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from langchain_core.documents import Document
+
+from rag_common.crawl_cache import CrawlCache
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int = 0
+    content: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class AsyncCrawler:
+    """
+    Fetch pages concurrently while staying polite to each host.
+
+    Args:
+        concurrency: Requests in flight across all hosts
+        rate_per_host: Requests per second allowed per host
+        burst: Requests a host may receive back-to-back before the rate applies
+        timeout: Seconds allowed per request
+        max_bytes: Bodies larger than this are cut off
+        cache: Optional CrawlCache; pages it reports unchanged are not parsed or returned
+    """
+
+    def __init__(self, concurrency: int = 8, rate_per_host: float = 4.0, burst: int = 4,
+                 timeout: float = 10, max_bytes: int = 10 * 1024 * 1024,
+                 user_agent: str = "GenAI-Cohort-RAG-crawler/1.0", cache: Optional[CrawlCache] = None):
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self.cache = cache
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[host]
+
+    def session(self) -> aiohttp.ClientSession:
+        """A new pooled session; must be created inside the event loop that uses it"""
+        self._buckets = {}  # buckets hold asyncio locks, so each session gets its own
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": self.user_agent},
+        )
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        await self._bucket(url).acquire()
+        try:
+            async with session.get(url, headers=headers) as response:
+                result = FetchResult(url=url, status=response.status,
+                                     headers={k.lower(): v for k, v in response.headers.items()})
+                if response.status >= 400:
+                    result.error = f"HTTP {response.status}"
+                    return result
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body.extend(chunk)
+                    if len(body) > self.max_bytes:
+                        result.error = f"body larger than {self.max_bytes} bytes"
+                        return result
+                result.content = bytes(body)
+                return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return FetchResult(url=url, error=str(e) or type(e).__name__)
+
+    async def fetch_all(self, urls: List[str]) -> List[FetchResult]:
+        """Fetch every URL (results in the same order as `urls`)"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with self.session() as session:
+            async def bounded(url):
+                async with semaphore:
+                    return await self.fetch(session, url)
+            return await asyncio.gather(*(bounded(url) for url in urls))
+
+    async def crawl(self, urls: List[str], parse: Callable[[str, bytes], Document],
+                    executor: Optional[Executor] = None) -> List[Document]:
+        """
+        Fetch and parse every URL, returning Documents in the order of `urls`.
+
+        `parse(url, content)` runs on `executor` (the loop's default thread pool if None) so
+        fetching continues meanwhile. Pass a ProcessPoolExecutor to parse on other cores; the
+        parse function must then be picklable (defined at module level).
+        Pages that fail to fetch or parse are reported and skipped. With a cache, requests
+        are conditional, unchanged pages are skipped (see CrawlCache.unchanged) and pages
+        that failed are recorded in CrawlCache.failed.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async with self.session() as session:
+            async def fetch_and_parse(url):
+                nonlocal done
+                headers = self.cache.conditional_headers(url) if self.cache else None
+                async with semaphore:
+                    result = await self.fetch(session, url, headers=headers)
+                    if result.status == 304 and not (self.cache and self.cache.get(url)):
+                        # Not modified, but nothing is cached to reuse (the entry went away since
+                        # the request was sent, or it was not conditional): fetch the page itself
+                        result = await self.fetch(session, url)
+                        if result.status == 304:
+                            result.error = "HTTP 304 to an unconditional request"
+                done += 1
+                if result.error:
+                    print(f"Error scraping {url}: {result.error}")
+                    if self.cache:
+                        self.cache.fail(url)
+                    return None
+                if self.cache and self.cache.check(url, result.status, result.headers, result.content):
+                    print(f"Unchanged {done}/{len(urls)}: {url}")
+                    return None
+                print(f"Scraped {done}/{len(urls)}: {url}")
+                try:
+                    return await loop.run_in_executor(executor, parse, url, result.content)
+                except Exception as e:
+                    print(f"Error parsing {url}: {e}")
+                    if self.cache:
+                        # check() staged the new validator; without this the page would count as indexed
+                        self.cache.fail(url)
+                    return None
+
+            docs = await asyncio.gather(*(fetch_and_parse(url) for url in urls))
+        return [doc for doc in docs if doc is not None]
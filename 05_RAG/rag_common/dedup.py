@@ -0,0 +1,122 @@
+# dedup.py - Near-duplicate chunk detection with MinHash + LSH
+#
+# Every chunk is reduced to a MinHash signature of its word 5-gram shingles; chunks whose
+# estimated Jaccard similarity to an already kept chunk reaches the threshold are dropped
+# before embedding. Candidates are found through LSH banding, so each chunk is compared
+# with a handful of lookalikes instead of every chunk seen so far. All hashing is seeded
+# and process-independent, so the same corpus always keeps the same chunks (and point IDs).
+
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rag_common.chunking import get_encoding
+
+DEFAULT_THRESHOLD = 0.9
+SHINGLE_WORDS = 5
+# USD per 1M input tokens, to report the embedding spend a run avoided
+EMBEDDING_PRICES: Dict[str, float] = {
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+    "text-embedding-ada-002": 0.10,
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def _lsh_shape(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose LSH S-curve rises around a bit below `threshold`, so few true pairs are missed"""
+    target = threshold * 0.9
+    shapes = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(shapes, key=lambda shape: abs((1 / shape[0]) ** (1 / shape[1]) - target))
+
+
+class NearDuplicateFilter:
+    """
+    Drops chunks that are near-duplicates of an earlier chunk of the same run.
+
+    check() returns the point ID of the kept chunk a new chunk duplicates (None if it is
+    new, in which case it becomes a candidate for later chunks). Counts of dropped chunks
+    and their tokens, i.e. embedding calls saved, accumulate until reset().
+
+    Args:
+        threshold: Estimated Jaccard similarity of word 5-grams at which a chunk is a duplicate
+        num_perm: MinHash permutations (more = more precise estimates, slower)
+        model: Embedding model, for counting the tokens and spend saved
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = 128,
+                 model: str = "text-embedding-3-small"):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.model = model
+        self.bands, self.rows = _lsh_shape(num_perm, threshold)
+        rng = np.random.default_rng(1)  # fixed: decisions must not change between runs
+        self._a = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._encoding = get_encoding(model)
+        self.reset()
+
+    def reset(self):
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = defaultdict(list)
+        self._signatures: Dict[str, np.ndarray] = {}
+        self.kept = 0
+        self.dropped = 0
+        self.tokens_saved = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        if len(words) > SHINGLE_WORDS:
+            shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+        else:
+            shingles = {" ".join(words)}
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        # multiply-shift hashing: one independent 32-bit hash per permutation, min over shingles
+        permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+        return permuted.min(axis=0)
+
+    def check(self, point_id: str, text: str) -> Optional[str]:
+        signature = self.signature(text)
+        keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+        candidates = {candidate for key in keys for candidate in self._buckets.get(key, ())}
+        best, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None and best_similarity >= self.threshold:
+            self.dropped += 1
+            self.tokens_saved += len(self._encoding.encode_ordinary(text))
+            return best
+
+        self.kept += 1
+        self._signatures[point_id] = signature
+        for key in keys:
+            self._buckets[key].append(point_id)
+        return None
+
+    @property
+    def cost_saved(self) -> float:
+        """USD of embedding calls the dropped chunks would have cost"""
+        return self.tokens_saved / 1e6 * EMBEDDING_PRICES.get(self.model, 0.0)
+
+    def summary(self) -> str:
+        total = self.kept + self.dropped
+        share = 100 * self.dropped / total if total else 0.0
+        return (f"Dedup (threshold {self.threshold}): {self.dropped}/{total} chunks dropped ({share:.1f}%), "
+                f"{self.tokens_saved} tokens / ${self.cost_saved:.4f} of embeddings saved")
+
+
+def get_dedup_filter(threshold: Optional[float] = None,
+                     model: str = "text-embedding-3-small") -> Optional[NearDuplicateFilter]:
+    """Filter at `threshold` (default: DEDUP_THRESHOLD, else 0.9); None when set to 0 (disabled)"""
+    if threshold is None:
+        threshold = float(os.getenv("DEDUP_THRESHOLD", DEFAULT_THRESHOLD))
+    return NearDuplicateFilter(threshold, model=model) if threshold > 0 else None
@@ -0,0 +1,220 @@
+# embedding_cache.py - Persistent SQLite cache of embedding vectors
+#
+# Vectors are keyed by (model, dimensions, SHA-256 of the text), so the indexers, the chat
+# scripts and the Streamlit app all share one cache and never pay twice for the same text.
+# text-embedding-3 vectors are Matryoshka embeddings: a reduced-dimension vector is the
+# normalized prefix of the full one, so reduced sizes are also served from full-size entries.
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from rag_common.embedding_engine import BatchedEmbeddings, get_embedding_engine
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "embeddings.sqlite"),
+)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GiB of float32 vectors, ~170k vectors at 1536 dimensions
+
+# Full output size of the models that accept `dimensions` (and can be truncated locally)
+MODEL_DIMENSIONS: Dict[str, int] = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+def default_dimensions() -> Optional[int]:
+    """Output size from EMBEDDING_DIMENSIONS (None = the model's full size)"""
+    value = os.getenv("EMBEDDING_DIMENSIONS")
+    return int(value) if value else None
+
+
+def truncate_embedding(vector: Sequence[float], dimensions: int) -> List[float]:
+    """Matryoshka truncation: keep the first `dimensions` values and re-normalize to unit length"""
+    prefix = list(vector[:dimensions])
+    norm = math.sqrt(sum(value * value for value in prefix)) or 1.0
+    return [value / norm for value in prefix]
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed vector cache with size-bounded LRU eviction.
+
+    Safe to share between threads, and between processes through SQLite's WAL mode.
+    `hits` and `misses` count lookups made through this instance.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, dimensions: Optional[int], text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{dimensions or 0}:{text_hash}"
+
+    def get_many(self, model: str, dimensions: Optional[int], texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vectors for `texts`, with None for every miss"""
+        keys = [self.key(model, dimensions, text) for text in texts]
+        found = {}
+        with self._lock:
+            unique = list(set(keys))
+            for start in range(0, len(unique), 500):  # stay under SQLite's bound-parameter limit
+                part = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+                self._conn.commit()
+            hits = sum(1 for k in keys if k in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return [array("f", found[k]).tolist() if k in found else None for k in keys]
+
+    def put_many(self, model: str, dimensions: Optional[int], texts: Sequence[str], vectors: Sequence[List[float]]):
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob = array("f", vector).tobytes()
+            rows.append((self.key(model, dimensions, text), blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used vectors until the cache is back under 90% of max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Drop-in LangChain Embeddings that only sends cache misses to the wrapped model.
+
+    Args:
+        embeddings: The real embedding model (e.g. OpenAIEmbeddings)
+        cache: Where vectors are looked up and stored
+        model: Model name, part of the cache key
+        dimensions: Output dimensions, part of the cache key (None = model default). Misses
+            are first served by truncating cached full-size vectors of the same text
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str, dimensions: Optional[int] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+        self.dimensions = dimensions
+
+    def _from_full_size(self, texts: List[str], vectors: List[Optional[List[float]]]):
+        """Fill misses from cached full-size vectors of the same texts, truncated"""
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing or not self.dimensions or self.model not in MODEL_DIMENSIONS:
+            return
+        full = self.cache.get_many(self.model, None, [texts[i] for i in missing])
+        found = [(i, truncate_embedding(vector, self.dimensions)) for i, vector in zip(missing, full) if vector]
+        if found:
+            self.cache.put_many(self.model, self.dimensions, [texts[i] for i, _ in found], [v for _, v in found])
+            for i, vector in found:
+                vectors[i] = vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_many(self.model, self.dimensions, texts)
+        self._from_full_size(texts, vectors)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Embed each distinct missing text once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            fresh = dict(zip(unique, self.embeddings.embed_documents(unique)))
+            self.cache.put_many(self.model, self.dimensions, unique, [fresh[text] for text in unique])
+            for i in missing:
+                vectors[i] = fresh[texts[i]]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        vectors = self.cache.get_many(self.model, self.dimensions, [text])
+        self._from_full_size([text], vectors)
+        vector = vectors[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many(self.model, self.dimensions, [text], [vector])
+        return vector
+
+
+_shared_cache: Optional[EmbeddingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """The process-wide cache opened at DEFAULT_CACHE_PATH"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = EmbeddingCache()
+        return _shared_cache
+
+
+def get_embedding_model(model: str = "text-embedding-3-small", dimensions: Optional[int] = None) -> CachedEmbeddings:
+    """
+    OpenAI embeddings behind the shared on-disk cache; use this instead of OpenAIEmbeddings(...).
+
+    Misses go through the shared AsyncEmbeddingEngine, which packs them into token-sized
+    requests and keeps several in flight. `dimensions` equal to the model's full size is
+    treated as None, so both spellings share cache entries.
+    """
+    if dimensions and dimensions == MODEL_DIMENSIONS.get(model):
+        dimensions = None
+    return CachedEmbeddings(
+        BatchedEmbeddings(get_embedding_engine(model, dimensions)),
+        get_embedding_cache(),
+        model=model,
+        dimensions=dimensions,
+    )
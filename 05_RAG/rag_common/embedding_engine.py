@@ -0,0 +1,194 @@
+# embedding_engine.py - Token-aware batching and concurrent embedding requests
+#
+# Texts are packed into requests by tiktoken token count (up to the per-request limits),
+# several requests are kept in flight on a background asyncio loop, and 429/5xx responses
+# are retried with jittered exponential backoff. Output order always matches input order.
+
+import asyncio
+import random
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import openai
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+MAX_TOKENS_PER_INPUT = 8191  # text-embedding-3-* context length
+MAX_TOKENS_PER_REQUEST = 300_000  # OpenAI's limit summed over all inputs of one request
+MAX_INPUTS_PER_REQUEST = 2048
+
+
+class AsyncEmbeddingEngine:
+    """
+    Embeds lists of texts with packed, concurrent, retried requests.
+
+    All requests run on one background event loop, so `max_concurrency` caps the requests
+    in flight across every caller sharing the engine (threads included). Interactive calls
+    (query embeddings) have their own `interactive_concurrency` slots, so a bulk ingestion
+    holding every regular slot never delays a user's search.
+
+    Args:
+        model: Embedding model name
+        dimensions: Optional reduced output size (None = model default)
+        max_concurrency: Requests allowed in flight at once
+        interactive_concurrency: Extra requests reserved for interactive calls
+        max_tokens_per_request: Token budget of one request
+        max_inputs_per_request: Number of texts in one request
+        max_retries: Retries of a 429/5xx/connection failure before giving up
+        client: Optional openai.AsyncOpenAI (e.g. pointed at another base_url)
+    """
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        dimensions: Optional[int] = None,
+        max_concurrency: int = 8,
+        interactive_concurrency: int = 2,
+        max_tokens_per_request: int = MAX_TOKENS_PER_REQUEST,
+        max_inputs_per_request: int = MAX_INPUTS_PER_REQUEST,
+        max_retries: int = 6,
+        client: Optional[openai.AsyncOpenAI] = None,
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.max_concurrency = max_concurrency
+        self.interactive_concurrency = interactive_concurrency
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_inputs_per_request = max_inputs_per_request
+        self.max_retries = max_retries
+        self._client = client
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+
+        self.requests_sent = 0
+        self.retries = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._interactive_semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+
+    def pack(self, texts: List[str]) -> Tuple[List[List[int]], List[str]]:
+        """
+        Group text indices into requests by token count.
+
+        Returns the batches of indices and the texts to send (inputs longer than the
+        model's context are truncated to it).
+        """
+        tokens = self.encoding.encode_ordinary_batch(texts)
+        inputs = list(texts)
+        batches, current, current_tokens = [], [], 0
+        for i, text_tokens in enumerate(tokens):
+            if len(text_tokens) > MAX_TOKENS_PER_INPUT:
+                text_tokens = text_tokens[:MAX_TOKENS_PER_INPUT]
+                inputs[i] = self.encoding.decode(text_tokens)
+            count = max(1, len(text_tokens))
+            if current and (current_tokens + count > self.max_tokens_per_request
+                            or len(current) >= self.max_inputs_per_request):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += count
+        if current:
+            batches.append(current)
+        return batches, inputs
+
+    async def aembed(self, texts: List[str], interactive: bool = False) -> List[List[float]]:
+        """Embed texts on the current event loop (use embed()/submit() from sync code)"""
+        if not texts:
+            return []
+        batches, inputs = self.pack(texts)
+        results = await asyncio.gather(*(self._request([inputs[i] for i in batch], interactive) for batch in batches))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def submit(self, texts: List[str], interactive: bool = False) -> Future:
+        """Schedule texts on the engine's loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(self.aembed(texts, interactive), self._ensure_loop())
+
+    def embed(self, texts: List[str], interactive: bool = False) -> List[List[float]]:
+        return self.submit(texts, interactive).result()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="embedding-engine", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _request(self, inputs: List[str], interactive: bool = False) -> List[List[float]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._interactive_semaphore = asyncio.Semaphore(self.interactive_concurrency)
+        semaphore = self._interactive_semaphore if interactive else self._semaphore
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(max_retries=0)  # retries are handled below
+
+        kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+        attempt = 0
+        while True:
+            async with semaphore:
+                try:
+                    self.requests_sent += 1
+                    response = await self._client.embeddings.create(
+                        model=self.model, input=inputs, encoding_format="float", **kwargs
+                    )
+                    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+                except (openai.RateLimitError, openai.InternalServerError,
+                        openai.APIConnectionError, openai.APITimeoutError) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+            # Back off outside the semaphore so other requests keep flowing
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Full-jitter exponential backoff, never shorter than a server-sent Retry-After"""
+        delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+
+class BatchedEmbeddings(Embeddings):
+    """LangChain Embeddings backed by an AsyncEmbeddingEngine"""
+
+    def __init__(self, engine: AsyncEmbeddingEngine):
+        self.engine = engine
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.engine.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.engine.embed([text], interactive=True)[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.wrap_future(self.engine.submit(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await asyncio.wrap_future(self.engine.submit([text], interactive=True)))[0]
+
+
+_engines: Dict[Tuple[str, Optional[int]], AsyncEmbeddingEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_embedding_engine(model: str = "text-embedding-3-small", dimensions: Optional[int] = None) -> AsyncEmbeddingEngine:
+    """The process-wide engine for a model, so every caller shares one concurrency budget"""
+    with _engines_lock:
+        key = (model, dimensions)
+        if key not in _engines:
+            _engines[key] = AsyncEmbeddingEngine(model=model, dimensions=dimensions)
+        return _engines[key]
@@ -0,0 +1,230 @@
+# frontier.py - URL discovery (sitemap.xml or in-scope links) and a persistent crawl frontier
+#
+# The frontier remembers every discovered URL with its sitemap <lastmod> and when it was last
+# indexed, so each run only hands new or updated URLs to the scraper. Child sitemaps whose
+# <lastmod> did not change since the last run are not even downloaded again.
+
+import gzip
+import io
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin
+
+from rag_common.crawler import AsyncCrawler
+
+DEFAULT_FRONTIER_PATH = os.getenv(
+    "FRONTIER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "frontier.sqlite"),
+)
+
+
+def normalize_lastmod(value: Optional[str]) -> Optional[str]:
+    """W3C datetime from a sitemap -> comparable UTC ISO string (None if missing/invalid)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+class Frontier:
+    """
+    Persistent set of known URLs, where each came from, and whether it needs (re)indexing.
+
+    A URL is due when it was never indexed, its lastmod is newer than the lastmod it was
+    indexed at, or it has no lastmod and was indexed more than `recheck_after` seconds ago.
+    URLs that disappear from their source are flagged as removed until mark_indexed() is
+    called, so the caller can delete their points first.
+    """
+
+    def __init__(self, path: str = DEFAULT_FRONTIER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " url TEXT PRIMARY KEY, source TEXT NOT NULL, lastmod TEXT, first_seen REAL NOT NULL,"
+            " indexed_at REAL, indexed_lastmod TEXT, removed_at REAL);"
+            "CREATE INDEX IF NOT EXISTS urls_source ON urls (source);"
+            "CREATE TABLE IF NOT EXISTS sitemaps (url TEXT PRIMARY KEY, lastmod TEXT, read_at REAL NOT NULL);"
+        )
+        self._conn.commit()
+
+    def record(self, source: str, entries: Dict[str, Optional[str]]):
+        """
+        Store the complete list of URLs (url -> lastmod) currently listed by `source`.
+
+        Known URLs of that source that are no longer listed get flagged as removed.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO urls (url, source, lastmod, first_seen) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET source = excluded.source, lastmod = excluded.lastmod, removed_at = NULL",
+                [(url, source, lastmod, now) for url, lastmod in entries.items()],
+            )
+            listed = set(entries)
+            gone = [url for (url,) in self._conn.execute("SELECT url FROM urls WHERE source = ? AND removed_at IS NULL", (source,))
+                    if url not in listed]
+            self._conn.executemany("UPDATE urls SET removed_at = ? WHERE url = ?", [(now, url) for url in gone])
+            self._conn.commit()
+
+    def due(self, recheck_after: float = 0) -> List[str]:
+        cutoff = time.time() - recheck_after
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM urls WHERE removed_at IS NULL AND ("
+                " indexed_at IS NULL"
+                " OR (lastmod IS NOT NULL AND (indexed_lastmod IS NULL OR lastmod > indexed_lastmod))"
+                " OR (lastmod IS NULL AND indexed_at <= ?)"
+                ") ORDER BY url",
+                (cutoff,),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def removed(self) -> List[str]:
+        with self._lock:
+            return [url for (url,) in self._conn.execute("SELECT url FROM urls WHERE removed_at IS NOT NULL ORDER BY url")]
+
+    def mark_indexed(self, urls: List[str], removed: Optional[List[str]] = None):
+        """Record that `urls` are indexed as of their current lastmod and forget `removed` URLs"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE urls SET indexed_at = ?, indexed_lastmod = lastmod WHERE url = ?", [(now, url) for url in urls]
+            )
+            self._conn.executemany("DELETE FROM urls WHERE url = ? AND removed_at IS NOT NULL",
+                                   [(url,) for url in removed or []])
+            self._conn.commit()
+
+    def reset_indexed(self):
+        """Mark everything as never indexed (e.g. the collection was dropped)"""
+        with self._lock:
+            self._conn.execute("UPDATE urls SET indexed_at = NULL, indexed_lastmod = NULL")
+            self._conn.execute("DELETE FROM sitemaps")
+            self._conn.commit()
+
+    def sitemap_lastmod(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT lastmod FROM sitemaps WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def set_sitemap_lastmod(self, url: str, lastmod: Optional[str]):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sitemaps VALUES (?, ?, ?)", (url, lastmod, time.time()))
+            self._conn.commit()
+
+
+def iter_sitemap(content: bytes) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Stream (kind, loc, lastmod) entries out of a sitemap or sitemap index, where kind is
+    "url" or "sitemap". Gzipped sitemaps are accepted.
+    """
+    if content[:2] == b"\x1f\x8b":
+        content = gzip.decompress(content)
+    loc = lastmod = None
+    for _, element in ET.iterparse(io.BytesIO(content), events=("end",)):
+        tag = element.tag.rsplit("}", 1)[-1]
+        if tag == "loc":
+            loc = (element.text or "").strip()
+        elif tag == "lastmod":
+            lastmod = normalize_lastmod(element.text)
+        elif tag in ("url", "sitemap"):
+            if loc:
+                yield tag, loc, lastmod
+            loc = lastmod = None
+            element.clear()
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+
+def extract_links(base_url: str, content: bytes) -> List[str]:
+    parser = _LinkParser()
+    parser.feed(content.decode("utf-8", errors="replace"))
+    return [urldefrag(urljoin(base_url, href))[0] for href in parser.links]
+
+
+async def discover_from_sitemap(crawler: AsyncCrawler, sitemap_url: str, scope: str, frontier: Frontier) -> int:
+    """
+    Walk a sitemap (index) and record the in-scope URLs of every child sitemap that changed.
+
+    Returns the number of URLs recorded; child sitemaps whose <lastmod> matches the last run
+    are skipped, so their URLs keep their stored state without being downloaded again.
+    """
+    recorded = 0
+    pending = [(sitemap_url, None)]
+    async with crawler.session() as session:
+        while pending:
+            url, lastmod = pending.pop()
+            if lastmod and frontier.sitemap_lastmod(url) == lastmod:
+                continue
+            result = await crawler.fetch(session, url)
+            if result.error:
+                raise RuntimeError(f"could not fetch sitemap {url}: {result.error}")
+            entries = {}
+            for kind, loc, loc_lastmod in iter_sitemap(result.content):
+                if kind == "sitemap":
+                    pending.append((loc, loc_lastmod))
+                elif loc.startswith(scope):
+                    entries[loc] = loc_lastmod
+            frontier.record(f"sitemap:{url}", entries)
+            frontier.set_sitemap_lastmod(url, lastmod)
+            recorded += len(entries)
+    return recorded
+
+
+async def discover_from_links(crawler: AsyncCrawler, seeds: List[str], scope: str, frontier: Frontier,
+                              max_pages: int = 10000) -> int:
+    """Breadth-first crawl from `seeds`, following only links that start with `scope`"""
+    seen = {url for url in seeds if url.startswith(scope)}
+    level = sorted(seen)
+    while level and len(seen) < max_pages:
+        next_level = []
+        for result in await crawler.fetch_all(level):
+            if result.error:
+                continue
+            for link in extract_links(result.url, result.content):
+                if link.startswith(scope) and link not in seen and len(seen) < max_pages:
+                    seen.add(link)
+                    next_level.append(link)
+        level = next_level
+    frontier.record(f"links:{scope}", {url: None for url in seen})
+    return len(seen)
+
+
+async def discover(frontier: Frontier, scope: str, sitemap_url: Optional[str] = None,
+                   seeds: Optional[List[str]] = None, crawler: Optional[AsyncCrawler] = None) -> int:
+    """Discover URLs via the sitemap, falling back to following links from `seeds`"""
+    crawler = crawler or AsyncCrawler()
+    if sitemap_url:
+        try:
+            found = await discover_from_sitemap(crawler, sitemap_url, scope, frontier)
+            print(f"Sitemap {sitemap_url}: {found} in-scope URLs in changed sitemaps")
+            return found
+        except Exception as e:
+            print(f"Sitemap discovery failed ({e}), following links instead")
+    found = await discover_from_links(crawler, seeds or [scope], scope, frontier)
+    print(f"Link discovery: {found} in-scope URLs")
+    return found
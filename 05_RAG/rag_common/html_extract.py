@@ -0,0 +1,200 @@
+# html_extract.py - Pluggable HTML-to-text extractors
+#
+# "bs4" builds a full BeautifulSoup tree (the original behaviour). "stream" feeds the page
+# through the stdlib HTMLParser once, dropping script/style/nav/footer subtrees as they
+# stream past without ever building a tree, and produces the same text. It only keeps the
+# names of the open elements, so it can close them the way the tree builder does: an end
+# tag closes every element opened after its match (an unclosed <nav> ends with its parent),
+# and an end tag without an open match is ignored.
+#
+# Both also return the text split into blocks (paragraphs, list items, headings, ...), the
+# unit boilerplate.py recognizes repeated sidebars and headers by.
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Tuple, Type
+
+SKIPPED_TAGS = ("script", "style", "nav", "footer")
+# Elements that start a new block of text; inline tags (a, span, code, ...) do not
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "blockquote", "body", "dd", "details", "div", "dl", "dt",
+    "figcaption", "figure", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "li", "main",
+    "ol", "p", "pre", "section", "summary", "table", "td", "th", "tr", "ul",
+))
+# Elements that never have content, so they are never open (BeautifulSoup's list)
+VOID_TAGS = frozenset((
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image", "img",
+    "input", "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+))
+
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+@dataclass
+class ExtractedPage:
+    text: str  # visible text, whitespace collapsed to single spaces
+    title: str  # contents of <title> ("" if missing)
+    blocks: List[str] = field(default_factory=list)  # text per block element; " ".join(blocks) == text
+
+
+def decode_html(content: bytes) -> str:
+    """Decode with the charset the page declares, defaulting to UTF-8"""
+    match = _CHARSET_RE.search(content[:2048])
+    encoding = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return content.decode(encoding, errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+
+class HtmlExtractor:
+    name = ""
+
+    def extract(self, content: bytes) -> ExtractedPage:
+        raise NotImplementedError
+
+
+class SoupExtractor(HtmlExtractor):
+    """Reference backend: full BeautifulSoup tree, then get_text()"""
+    name = "bs4"
+
+    def extract(self, content: bytes) -> ExtractedPage:
+        from bs4 import BeautifulSoup, CData, NavigableString
+
+        soup = BeautifulSoup(content, "html.parser")
+        title = soup.title.string if soup.title and soup.title.string else ""
+        for element in soup(list(SKIPPED_TAGS)):
+            element.extract()
+        blocks, current, current_block = [], [], None
+        for node in soup.descendants:
+            if type(node) not in (NavigableString, CData):  # the strings get_text() would use
+                continue
+            string = node.strip()
+            if not string:
+                continue
+            block = next((parent for parent in node.parents if parent.name in BLOCK_TAGS), None)
+            if block is not current_block and current:
+                blocks.append(" ".join(" ".join(current).split()))
+                current = []
+            current_block = block
+            current.append(string)
+        if current:
+            blocks.append(" ".join(" ".join(current).split()))
+        return ExtractedPage(text=" ".join(blocks), title=title, blocks=blocks)
+
+
+class _StreamingTextParser(HTMLParser):
+    """
+    Text and blocks in the same strings and blocks as SoupExtractor: a text run between two
+    events the tree builder would split it at becomes one string, and a string starts a new
+    block when its innermost open block element differs from the previous string's
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.blocks: List[str] = []
+        self.block_start = 0  # index into parts where the current block began
+        self.block = None  # serial number of the innermost open block element of the last string
+        self.title_parts: List[str] = []
+        self.open_tags: List[Tuple[str, int]] = []  # (name, serial number) of the open elements, outermost first
+        self.elements = 0
+        self.closed_void: List[str] = []  # void elements whose end tag is ignored if it comes, as BeautifulSoup does
+        self.pending = ""  # text since the last event that ends a string
+        self.skip_depth = 0  # open elements that are skipped
+        self.in_title = False
+
+    def end_block(self):
+        text = " ".join(" ".join(self.parts[self.block_start:]).split())
+        if text:
+            self.blocks.append(text)
+        self.block_start = len(self.parts)
+
+    def end_string(self):
+        text, self.pending = self.pending, ""
+        if not text.strip():
+            return
+        block = next((serial for tag, serial in reversed(self.open_tags) if tag in BLOCK_TAGS), None)
+        if block != self.block:
+            self.end_block()
+            self.block = block
+        self.parts.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self.end_string()
+        if tag in VOID_TAGS:
+            self.closed_void.append(tag)
+            return
+        self.open_tags.append((tag, self.elements))
+        self.elements += 1
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == "title":
+            self.in_title = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.end_string()  # <tag/> opens and closes an element with nothing in it
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_void:
+            self.closed_void.remove(tag)
+            return
+        self.end_string()
+        if not any(name == tag for name, _ in self.open_tags):
+            return
+        # Close back to the matching open tag, like the tree builder does
+        while True:
+            closed, _ = self.open_tags.pop()
+            if closed in SKIPPED_TAGS:
+                self.skip_depth -= 1
+            elif closed == "title":
+                self.in_title = False
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+        if not self.skip_depth:
+            self.pending += data
+
+    def handle_comment(self, data):
+        self.end_string()
+
+    def handle_decl(self, decl):
+        self.end_string()
+
+    def handle_pi(self, data):
+        self.end_string()
+
+    def unknown_decl(self, data):
+        self.end_string()
+
+    def close(self):
+        super().close()
+        self.end_string()
+        self.end_block()
+
+
+class StreamingExtractor(HtmlExtractor):
+    """Fast backend: one pass of HTMLParser events, no tree"""
+    name = "stream"
+
+    def extract(self, content: bytes) -> ExtractedPage:
+        parser = _StreamingTextParser()
+        parser.feed(decode_html(content))
+        parser.close()
+        return ExtractedPage(text=" ".join(parser.blocks), title="".join(parser.title_parts), blocks=parser.blocks)
+
+
+EXTRACTORS: Dict[str, Type[HtmlExtractor]] = {
+    SoupExtractor.name: SoupExtractor,
+    StreamingExtractor.name: StreamingExtractor,
+}
+
+
+def get_extractor(name: str = "stream") -> HtmlExtractor:
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor {name!r}, choose one of {sorted(EXTRACTORS)}")
+    return EXTRACTORS[name]()
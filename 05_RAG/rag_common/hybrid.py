@@ -0,0 +1,141 @@
+# hybrid.py - Lexical (BM25) retrieval next to the dense vectors, merged by reciprocal-rank fusion
+#
+# Embeddings match meaning but blur exact identifiers: a chunk about `git stash pop`, `npm ci`
+# or ERR_REQUIRE_ESM often ranks below chunks that merely discuss the same topic, so k has to
+# grow (and with it the prompt) before it makes the context. Every chunk therefore also gets
+# a sparse BM25 vector: hashed lowercase words plus dotted/dashed compounds (package.json,
+# ts-node), weighted by BM25's saturated term frequency. Qdrant stores it as the named sparse
+# vector "bm25" and multiplies in the IDF itself (Modifier.IDF), so nothing is recomputed as
+# the collection grows. The local backend (local_index.py) keeps an FTS5 index of the same
+# tokens instead.
+#
+# A query runs the dense and the lexical search together (one batched Qdrant request, or
+# two threads locally) and merges the rankings with reciprocal-rank fusion: each chunk scores
+# sum(1 / (RRF_K + rank)), so the two kinds of scores never have to be calibrated.
+
+import hashlib
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient, models
+
+SPARSE_VECTOR = "bm25"
+DENSE_VECTOR = ""  # the collection's default (unnamed) vector
+RRF_K = 60
+CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # depth of each ranking before fusion
+K1, B = 1.2, 0.75
+AVG_LENGTH = 150.0  # tokens (as counted here) of a typical 250-token chunk
+
+_WORD = re.compile(r"\w+")
+_COMPOUND = re.compile(r"\w+(?:[.\-/]\w+)+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its me my not of on or "
+    "so that the their there these this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words (stopwords dropped), then dotted/dashed compounds such as package.json or ts-node"""
+    text = text.lower()
+    return [word for word in _WORD.findall(text) if word not in STOPWORDS] + _COMPOUND.findall(text)
+
+
+@lru_cache(maxsize=1 << 16)
+def token_index(token: str) -> int:
+    """32-bit sparse vector index of a token"""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def sparse_vector(text: str) -> models.SparseVector:
+    """BM25 term weights of a chunk (Qdrant applies the IDF at search time)"""
+    tokens = tokenize(text)
+    counts = Counter(token_index(token) for token in tokens)
+    norm = K1 * (1 - B + B * len(tokens) / AVG_LENGTH)
+    return models.SparseVector(indices=list(counts), values=[tf * (K1 + 1) / (tf + norm) for tf in counts.values()])
+
+
+def query_sparse_vector(query: str) -> models.SparseVector:
+    indices = sorted({token_index(token) for token in tokenize(query)})
+    return models.SparseVector(indices=indices, values=[1.0] * len(indices))
+
+
+def sparse_vectors_config() -> dict:
+    return {SPARSE_VECTOR: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def collection_has_lexical(client: QdrantClient, collection_name: str) -> bool:
+    """Whether a collection has the BM25 sparse vector (collections created before it was added do not)"""
+    if not client.collection_exists(collection_name):
+        return False
+    return SPARSE_VECTOR in (client.get_collection(collection_name).config.params.sparse_vectors or {})
+
+
+def _key(doc: Document) -> str:
+    return str(doc.id or doc.metadata.get("_id") or doc.page_content)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[Document]], limit: int, k: int = RRF_K) -> List[Document]:
+    """The `limit` best documents of several rankings (best first), by summed 1 / (k + rank)"""
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _key(doc)
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:limit]]
+
+
+class HybridQdrantVectorStore(QdrantVectorStore):
+    """
+    QdrantVectorStore that can also rank by the collection's BM25 sparse vectors.
+
+    Args:
+        lexical: Whether the collection has them (see collection_has_lexical); without
+            them hybrid_search() is a plain dense search
+        search_params: Default dense search params (see collection_search_params)
+    """
+
+    def __init__(self, *args, lexical: bool = False, search_params: Optional[models.SearchParams] = None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lexical = lexical
+        self.search_params = search_params
+
+    def hybrid_search(self, query: str, query_vector: Optional[List[float]] = None, k: int = 4,
+                      search_params: Optional[models.SearchParams] = None,
+                      candidates: int = CANDIDATES) -> List[Document]:
+        """
+        Top `k` chunks of the dense and the BM25 ranking (`candidates` deep each) fused by RRF.
+
+        Args:
+            query: Question, for the lexical search
+            query_vector: Its embedding (embedded here if not given)
+            k: Chunks to return
+            search_params: Dense search params (default: the store's)
+            candidates: Depth of each ranking
+        """
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        search_params = search_params or self.search_params
+        sparse = query_sparse_vector(query)
+        if not self.lexical or not sparse.indices:
+            return self.similarity_search_by_vector(query_vector, k=k, search_params=search_params)
+        depth = max(candidates, k)
+        # one round trip; the server runs both searches
+        dense_hits, lexical_hits = self.client.query_batch_points(self.collection_name, requests=[
+            models.QueryRequest(query=query_vector, limit=depth, params=search_params, with_payload=True),
+            models.QueryRequest(query=sparse, using=SPARSE_VECTOR, limit=depth, with_payload=True),
+        ])
+        return reciprocal_rank_fusion([self._documents(dense_hits.points), self._documents(lexical_hits.points)], k)
+
+    def _documents(self, points) -> List[Document]:
+        return [
+            self._document_from_point(point, self.collection_name, self.content_payload_key,
+                                      self.metadata_payload_key)
+            for point in points
+        ]
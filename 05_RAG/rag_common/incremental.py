@@ -0,0 +1,87 @@
+# incremental.py - Deterministic chunk point IDs and diffing against a Qdrant collection
+
+import hashlib
+import json
+import uuid
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient, models
+
+HASH_KEY = "content_hash"  # top-level payload key, invisible to QdrantVectorStore's Documents
+
+_POINT_NAMESPACE = uuid.UUID("5b0c3f3e-8a57-4d37-9a63-2f0b8f9a4e10")
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of a chunk's text, used to reuse vectors of moved/re-labelled chunks"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(doc: Document) -> str:
+    """
+    Deterministic point ID for a chunk: the same text with the same metadata always maps to
+    the same ID, so re-indexing an unchanged chunk is a no-op.
+    """
+    metadata = json.dumps(doc.metadata, sort_keys=True, default=str)
+    digest = hashlib.sha256(f"{metadata}\0{doc.page_content}".encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(_POINT_NAMESPACE, digest))
+
+
+def fetch_point_hashes(client: QdrantClient, collection_name: str, scope: Optional[models.Filter] = None,
+                       batch_size: int = 1000) -> Dict[str, Optional[str]]:
+    """
+    Map every point ID in the collection (or in `scope`) to its stored content hash.
+
+    Points written before hashes were stored map to None, so they are treated as stale.
+    """
+    if not client.collection_exists(collection_name):
+        return {}
+    hashes = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scope,
+            limit=batch_size,
+            offset=offset,
+            with_payload=[HASH_KEY],
+            with_vectors=False,
+        )
+        for point in points:
+            hashes[str(point.id)] = (point.payload or {}).get(HASH_KEY)
+        if offset is None:
+            return hashes
+
+
+def fetch_point_sources(client: QdrantClient, collection_name: str, source_key: str = "metadata.source",
+                        batch_size: int = 1000) -> Dict[str, Optional[str]]:
+    """Map every point ID in the collection to the document source it was chunked from"""
+    if not client.collection_exists(collection_name):
+        return {}
+    path = source_key.split(".")
+    sources = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=[source_key],
+            with_vectors=False,
+        )
+        for point in points:
+            value = point.payload or {}
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            sources[str(point.id)] = value
+        if offset is None:
+            return sources
+
+
+def delete_points(client: QdrantClient, collection_name: str, point_ids: List[str], batch_size: int = 1000):
+    for start in range(0, len(point_ids), batch_size):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=point_ids[start:start + batch_size]),
+        )
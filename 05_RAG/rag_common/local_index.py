@@ -0,0 +1,694 @@
+# local_index.py - Embedded in-process vector index for small collections and offline use
+#
+# A collection of up to ~100k chunks fits comfortably in the process that queries it, and
+# searching it there costs no network round trip. LocalVectorIndex keeps unit-length vectors
+# in a directory as a memory-mapped .npy matrix (float16, or int8 with one scale per vector),
+# with the chunk text and metadata in SQLite. Searches scan the vectors exactly, a block of
+# rows at a time straight from the memory map (so no float32 copy of the matrix is ever
+# made), or walk an HNSW graph when the index is built with one (needs the optional hnswlib
+# package). An FTS5 table over the chunks' BM25 tokens (hybrid.py) serves the lexical half
+# of hybrid search.
+#
+# LocalReplicaStore puts an index behind LangChain's VectorStore interface (similarity_search*,
+# hybrid_search, add_texts, delete), the one QdrantVectorStore offers, so query code runs on
+# either. An index is (re)built from a collection's snapshot (snapshot.py) whenever a newer one
+# appears, and LocalIngestionPipeline ingests into it directly. With VECTOR_BACKEND=local,
+# clients.get_vector_store() and clients.get_ingestion_pipeline() return these, so documents
+# are indexed and questions answered without Qdrant.
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from qdrant_client import QdrantClient, models
+
+from rag_common.collection_config import collection_dimensions
+from rag_common.hybrid import CANDIDATES, DENSE_VECTOR, reciprocal_rank_fusion, tokenize
+from rag_common.incremental import content_hash
+from rag_common.pipeline import (CONTENT_KEY, METADATA_KEY, IngestionPipeline, conditions_match, filter_conditions,
+                                 page_source)
+from rag_common.snapshot import default_snapshot_path, read_snapshot, snapshot_info
+
+DEFAULT_LOCAL_INDEX_DIR = os.getenv(
+    "LOCAL_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "local_index"),
+)
+VECTOR_TYPES = ("float16", "int8")
+INFO_FILE = "index.json"
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+GRAPH_FILE = "graph.bin"
+POINTS_FILE = "points.sqlite"
+SCAN_BLOCK_ROWS = 4096  # rows an exact scan decodes to float32 at a time
+
+
+def default_index_dir(collection_name: str) -> str:
+    return os.path.join(DEFAULT_LOCAL_INDEX_DIR, collection_name)
+
+
+def _hnswlib():
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise ImportError("A local index with an HNSW graph needs hnswlib (pip install hnswlib)") from e
+    return hnswlib
+
+
+def _unit_rows(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class LocalVectorIndex:
+    """
+    Cosine-similarity index of (id, vector, text, metadata) points stored in one directory.
+
+    Adding an ID that is already there replaces its point; deleted points are skipped by
+    searches and their rows are reclaimed by compact() or the next rebuild. Exact searches read the matrix
+    in blocks of SCAN_BLOCK_ROWS rows, each decoded to float32 just for its product with the
+    query, so a scan holds no full-size copy. Safe to share between threads.
+    Open an existing index with LocalVectorIndex(directory), create one with create().
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, INFO_FILE), encoding="utf-8") as f:
+            self.info = json.load(f)
+        self._lock = threading.Lock()
+        self._vectors = np.lib.format.open_memmap(os.path.join(directory, VECTORS_FILE), mode="r+")
+        self._scales = None
+        if self.dtype == "int8":
+            self._scales = np.lib.format.open_memmap(os.path.join(directory, SCALES_FILE), mode="r+")
+        self._conn = sqlite3.connect(os.path.join(directory, POINTS_FILE), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT NOT NULL, text TEXT NOT NULL,"
+            " metadata TEXT NOT NULL, live INTEGER NOT NULL DEFAULT 1, duplicates TEXT NOT NULL DEFAULT '[]')"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS points_id ON points (id)")
+        columns = [column[1] for column in self._conn.execute("PRAGMA table_info(points)")]
+        if "duplicates" not in columns:
+            # an index built before ingestion could write to it
+            self._conn.execute("ALTER TABLE points ADD COLUMN duplicates TEXT NOT NULL DEFAULT '[]'")
+        has_lexical = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lexical'").fetchone() is not None
+        if not has_lexical:
+            # rowid = row; compounds such as package.json stay single tokens
+            self._conn.execute("CREATE VIRTUAL TABLE lexical USING fts5(tokens, tokenize=\"unicode61 tokenchars '._-/'\")")
+            # an index built before the lexical table existed
+            self._conn.executemany("INSERT INTO lexical (rowid, tokens) VALUES (?, ?)", [
+                (row, " ".join(tokenize(text)))
+                for row, text in self._conn.execute("SELECT row, text FROM points WHERE live = 1").fetchall()
+            ])
+        self._conn.commit()
+
+        rows = self.info["rows"]
+        self._live = np.zeros(rows, dtype=bool)
+        self._row_of = {}
+        for row, point_id in self._conn.execute("SELECT row, id FROM points WHERE live = 1 AND row < ?", (rows,)):
+            self._live[row] = True
+            self._row_of[point_id] = row
+
+        self._graph = None
+        if self.info.get("hnsw_m"):
+            self._graph = _hnswlib().Index(space="ip", dim=self.dimensions)
+            graph_path = os.path.join(directory, GRAPH_FILE)
+            if os.path.exists(graph_path):
+                self._graph.load_index(graph_path, max_elements=len(self._vectors))
+            else:
+                self._graph.init_index(max_elements=len(self._vectors), M=self.info["hnsw_m"],
+                                       ef_construction=self.info["ef_construct"])
+
+    @classmethod
+    def create(cls, directory: str, dimensions: int, dtype: str = "float16", hnsw_m: int = 0,
+               ef_construct: int = 200, ef: int = 64, capacity: int = 1024, **info) -> "LocalVectorIndex":
+        """
+        Create an empty index in `directory` (which must not hold one yet).
+
+        Args:
+            dimensions: Vector size
+            dtype: "float16" (half the size of float32, no practical loss) or "int8" (a quarter)
+            hnsw_m: Edges per node of an HNSW graph (0 = no graph, exact scans)
+            ef_construct, ef: HNSW build and default search beam widths
+            capacity: Rows allocated up front (the matrix doubles when full)
+            info: Extra values kept in index.json (e.g. where the points came from)
+        """
+        if dtype not in VECTOR_TYPES:
+            raise ValueError(f"dtype must be one of {VECTOR_TYPES}, got {dtype!r}")
+        if cls.exists(directory):
+            raise ValueError(f"{directory} already holds a local index")
+        if hnsw_m:
+            _hnswlib()  # fail before writing anything
+        os.makedirs(directory, exist_ok=True)
+        np.lib.format.open_memmap(os.path.join(directory, VECTORS_FILE), mode="w+", dtype=dtype,
+                                  shape=(capacity, dimensions)).flush()
+        if dtype == "int8":
+            np.lib.format.open_memmap(os.path.join(directory, SCALES_FILE), mode="w+", dtype=np.float32,
+                                      shape=(capacity,)).flush()
+        info = dict(info, dimensions=dimensions, dtype=dtype, hnsw_m=hnsw_m, ef_construct=ef_construct, ef=ef,
+                    rows=0)
+        with open(os.path.join(directory, INFO_FILE), "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        return cls(directory)
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, INFO_FILE))
+
+    @property
+    def dimensions(self) -> int:
+        return self.info["dimensions"]
+
+    @property
+    def dtype(self) -> str:
+        return self.info["dtype"]
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def add(self, ids: Sequence[str], vectors, texts: Sequence[str], metadatas: Sequence[dict]):
+        """Add points (vectors are normalized to unit length), replacing any with the same ID"""
+        vectors = _unit_rows(vectors)
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Index stores {self.dimensions}-dimension vectors, not {vectors.shape[1]}")
+        with self._lock:
+            self._delete_rows([self._row_of[point_id] for point_id in ids if point_id in self._row_of])
+            start = self.info["rows"]
+            stop = start + len(vectors)
+            self._reserve(stop)
+            if self.dtype == "int8":
+                scales = np.abs(vectors).max(axis=1) / 127
+                scales[scales == 0] = 1
+                self._vectors[start:stop] = np.round(vectors / scales[:, None]).astype(np.int8)
+                self._scales[start:stop] = scales
+                self._scales.flush()
+            else:
+                self._vectors[start:stop] = vectors.astype(self.dtype)
+            self._vectors.flush()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO points (row, id, text, metadata, live) VALUES (?, ?, ?, ?, 1)",
+                [(start + i, point_id, text, json.dumps(metadata or {}, default=str))
+                 for i, (point_id, text, metadata) in enumerate(zip(ids, texts, metadatas))],
+            )
+            self._conn.executemany("INSERT INTO lexical (rowid, tokens) VALUES (?, ?)",
+                                   [(start + i, " ".join(tokenize(text))) for i, text in enumerate(texts)])
+            self._conn.commit()
+            self._live = np.concatenate([self._live, np.ones(len(vectors), dtype=bool)])
+            self._row_of.update((point_id, start + i) for i, point_id in enumerate(ids))
+            if self._graph is not None:
+                self._graph.add_items(vectors, np.arange(start, stop))
+            self.info["rows"] = stop
+            self._save()
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Delete points by ID (IDs that are not there are ignored); returns how many were deleted"""
+        with self._lock:
+            rows = [self._row_of[point_id] for point_id in set(ids) if point_id in self._row_of]
+            self._delete_rows(rows)
+            if rows:
+                self._save()
+            return len(rows)
+
+    def get(self, ids: Iterable[str]) -> Dict[str, Tuple[str, dict]]:
+        """(text, metadata) of each of the given points that is there"""
+        with self._lock:
+            rows = [self._row_of[point_id] for point_id in set(ids) if point_id in self._row_of]
+            return {point_id: (text, metadata) for point_id, _, text, metadata in self._fetch(rows, [0.0] * len(rows))}
+
+    def points(self, where: Optional[Callable[[dict], bool]] = None) -> List[Tuple[str, str, dict]]:
+        """(id, text, metadata) of every point, or of those whose metadata `where` accepts"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, text, metadata FROM points WHERE live = 1").fetchall()
+        points = [(point_id, text, json.loads(metadata)) for point_id, text, metadata in rows]
+        return [point for point in points if where is None or where(point[2])]
+
+    def count(self, where: Optional[Callable[[dict], bool]] = None) -> int:
+        """Number of points, or of those whose metadata `where` accepts"""
+        if where is None:
+            return len(self)
+        with self._lock:
+            return int(self._matching(where).sum())
+
+    def vectors(self, ids: Iterable[str]) -> Dict[str, List[float]]:
+        """Stored (unit-length) vector of each of the given points that is there"""
+        with self._lock:
+            found = {point_id: self._row_of[point_id] for point_id in set(ids) if point_id in self._row_of}
+            vectors = {}
+            for point_id, row in found.items():
+                vector = np.asarray(self._vectors[row], dtype=np.float32)
+                if self._scales is not None:
+                    vector = vector * self._scales[row]
+                vectors[point_id] = vector.tolist()
+            return vectors
+
+    def duplicates(self) -> Dict[str, List[dict]]:
+        """Point ID -> chunks folded into it (see pipeline.DUPLICATES_KEY), for every point that has any"""
+        with self._lock:
+            return {point_id: json.loads(duplicates) for point_id, duplicates in self._conn.execute(
+                "SELECT id, duplicates FROM points WHERE live = 1 AND duplicates != '[]'")}
+
+    def update(self, metadatas: Dict[str, dict], duplicates: Optional[Dict[str, List[dict]]] = None):
+        """Replace the metadata (and the folded chunks) of existing points; IDs that are not there are ignored"""
+        duplicates = duplicates or {}
+        with self._lock:
+            self._conn.executemany("UPDATE points SET metadata = ?, duplicates = ? WHERE row = ?", [
+                (json.dumps(metadata, default=str), json.dumps(duplicates.get(point_id, []), default=str),
+                 self._row_of[point_id])
+                for point_id, metadata in metadatas.items() if point_id in self._row_of
+            ])
+            self._conn.commit()
+            self._save()
+
+    @property
+    def dead_rows(self) -> int:
+        """Rows of deleted or replaced points, still taking space until compact()"""
+        return self.info["rows"] - len(self)
+
+    def compact(self) -> "LocalVectorIndex":
+        """Rebuild the index without its dead rows and return it opened; this one is closed"""
+        def batches(batch_size: int = 1000):
+            with self._lock:
+                rows = sorted(self._row_of.values())
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                with self._lock:
+                    found = self._fetch(batch, [0.0] * len(batch))
+                ids = [point_id for point_id, _, _, _ in found]
+                vectors = self.vectors(ids)
+                yield (ids, np.asarray([vectors[point_id] for point_id in ids]), [text for _, _, text, _ in found],
+                       [metadata for _, _, _, metadata in found])
+
+        duplicates = self.duplicates()
+        info = {key: value for key, value in self.info.items() if key not in ("dimensions", "dtype", "hnsw_m", "rows")}
+        index = _build(self.directory, batches(), self.dimensions, self.dtype, self.info["hnsw_m"], **info)
+        self.close()
+        if duplicates:
+            index.update({point_id: metadata for point_id, (_, metadata) in index.get(duplicates).items()}, duplicates)
+        return index
+
+    def _delete_rows(self, rows: List[int]):
+        # Caller holds self._lock
+        if not rows:
+            return
+        self._conn.executemany("UPDATE points SET live = 0 WHERE row = ?", [(row,) for row in rows])
+        self._conn.executemany("DELETE FROM lexical WHERE rowid = ?", [(row,) for row in rows])
+        self._conn.commit()
+        for row in rows:
+            self._live[row] = False
+            if self._graph is not None:
+                self._graph.mark_deleted(row)
+        dead = set(rows)
+        self._row_of = {point_id: row for point_id, row in self._row_of.items() if row not in dead}
+
+    def _reserve(self, rows: int):
+        """Grow the memory-mapped matrix (and the graph) to hold at least `rows` rows"""
+        # Caller holds self._lock
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2)
+        self._vectors = self._grown(VECTORS_FILE, self._vectors, (capacity, self.dimensions))
+        if self._scales is not None:
+            self._scales = self._grown(SCALES_FILE, self._scales, (capacity,))
+        if self._graph is not None:
+            self._graph.resize_index(capacity)
+
+    def _grown(self, name: str, old: np.memmap, shape: Tuple[int, ...]) -> np.memmap:
+        path = os.path.join(self.directory, name)
+        grown = np.lib.format.open_memmap(f"{path}.partial", mode="w+", dtype=old.dtype, shape=shape)
+        grown[:len(old)] = old
+        grown.flush()
+        del grown
+        os.replace(f"{path}.partial", path)
+        return np.lib.format.open_memmap(path, mode="r+")
+
+    def _save(self):
+        # Caller holds self._lock
+        if self._graph is not None:
+            self._graph.save_index(os.path.join(self.directory, GRAPH_FILE))
+        path = os.path.join(self.directory, INFO_FILE)
+        with open(f"{path}.partial", "w", encoding="utf-8") as f:
+            json.dump(self.info, f)
+        os.replace(f"{path}.partial", path)
+
+    @staticmethod
+    def _scan(vectors: np.ndarray, scales: Optional[np.ndarray], rows: int, query: np.ndarray) -> np.ndarray:
+        """Similarity of the query to each of the first `rows` rows, decoded block by block"""
+        # numpy has no fast float16/int8 product, but a block's float32 copy stays in cache
+        similarities = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, SCAN_BLOCK_ROWS):
+            stop = min(start + SCAN_BLOCK_ROWS, rows)
+            block = np.asarray(vectors[start:stop], dtype=np.float32) @ query
+            if scales is not None:
+                block *= scales[start:stop]
+            similarities[start:stop] = block
+        return similarities
+
+    def _matching(self, where: Callable[[dict], bool]) -> np.ndarray:
+        """Mask of the live rows whose metadata `where` accepts"""
+        # Caller holds self._lock
+        mask = np.zeros(len(self._live), dtype=bool)
+        for row, metadata in self._conn.execute("SELECT row, metadata FROM points WHERE live = 1"):
+            if row < len(mask) and where(json.loads(metadata)):
+                mask[row] = True
+        return mask
+
+    def search(self, vector: Sequence[float], k: int = 4, ef: Optional[int] = None, exact: bool = False,
+               where: Optional[Callable[[dict], bool]] = None) -> List[Tuple[str, float, str, dict]]:
+        """
+        (id, cosine similarity, text, metadata) of the `k` nearest points, best first.
+
+        Args:
+            vector: Query vector (normalized here)
+            k: Points to return
+            ef: HNSW beam width for this search (default: the index's ef)
+            exact: Scan every vector even if the index has a graph
+            where: Only points whose metadata it accepts (always an exact scan of those)
+        """
+        query = _unit_rows(vector)[0]
+        with self._lock:
+            live = self._matching(where) if where is not None else self._live.copy()
+            k = min(k, int(live.sum()))
+            if k <= 0:
+                return []
+            if self._graph is not None and not exact and where is None:
+                self._graph.set_ef(max(ef or self.info["ef"], k))
+                labels, distances = self._graph.knn_query(query, k=k)
+                return self._fetch(labels[0].tolist(), (1 - distances[0]).tolist())
+            # a grown matrix is a new file; the mapping of the old one stays valid for this scan
+            vectors, scales, rows = self._vectors, self._scales, self.info["rows"]
+        # the scan runs unlocked, next to a concurrent lexical search or another query
+        similarities = self._scan(vectors, scales, rows, query)
+        similarities[~live] = -np.inf
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        with self._lock:
+            return self._fetch(top.tolist(), similarities[top].tolist())
+
+    def lexical_search(self, query: str, k: int = 4) -> List[Tuple[str, float, str, dict]]:
+        """(id, BM25 score, text, metadata) of the `k` best points for the query's words, best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        match = " OR ".join('"{}"'.format(token.replace('"', '""')) for token in tokens)
+        with self._lock:
+            return [
+                (point_id, -score, text, json.loads(metadata))
+                for point_id, text, metadata, score in self._conn.execute(
+                    "SELECT p.id, p.text, p.metadata, bm25(lexical) FROM lexical JOIN points p ON p.row = lexical.rowid"
+                    " WHERE lexical MATCH ? ORDER BY bm25(lexical) LIMIT ?", (match, k)
+                )
+            ]
+
+    def _fetch(self, rows: List[int], scores: List[float]) -> List[Tuple[str, float, str, dict]]:
+        # Caller holds self._lock
+        found = {
+            row: (point_id, text, json.loads(metadata))
+            for row, point_id, text, metadata in self._conn.execute(
+                f"SELECT row, id, text, metadata FROM points WHERE row IN ({','.join('?' * len(rows))})", rows
+            )
+        }
+        return [(found[row][0], score, found[row][1], found[row][2]) for row, score in zip(rows, scores)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            self._vectors = self._scales = self._graph = None
+
+
+def _build(directory: str, batches: Iterable[Tuple[List[str], np.ndarray, List[str], List[dict]]],
+           dimensions: int, dtype: str, hnsw_m: int, **info) -> LocalVectorIndex:
+    """Build an index next to `directory` and swap it in, so readers never see a half-built one"""
+    building = f"{directory}.building"
+    shutil.rmtree(building, ignore_errors=True)
+    index = LocalVectorIndex.create(building, dimensions, dtype=dtype, hnsw_m=hnsw_m, **info)
+    for ids, vectors, texts, metadatas in batches:
+        index.add(ids, vectors, texts, metadatas)
+    index.close()
+    old = f"{directory}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old)
+    os.replace(building, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return LocalVectorIndex(directory)
+
+
+def build_from_snapshot(snapshot_path: str, directory: str, dtype: str = "float16",
+                        hnsw_m: int = 0) -> LocalVectorIndex:
+    """Local index of every point in a snapshot written by export_collection (no Qdrant needed)"""
+    def batches():
+        for batch in read_snapshot(snapshot_path):
+            vectors = batch.column("vector").flatten().to_numpy(zero_copy_only=False).reshape(len(batch), -1)
+            yield (batch.column("id").to_pylist(), vectors, batch.column("text").to_pylist(),
+                   [json.loads(metadata) for metadata in batch.column("metadata").to_pylist()])
+
+    return _build(directory, batches(), int(snapshot_info(snapshot_path)["dimensions"]), dtype, hnsw_m,
+                  snapshot=os.path.abspath(snapshot_path), snapshot_mtime=os.path.getmtime(snapshot_path))
+
+
+def build_from_collection(client: QdrantClient, collection_name: str, directory: str, dtype: str = "float16",
+                          hnsw_m: int = 0, batch_size: int = 1000) -> LocalVectorIndex:
+    """Local index of every point of a Qdrant collection"""
+    dimensions = collection_dimensions(client, collection_name)
+    if dimensions is None:
+        raise ValueError(f"Collection {collection_name!r} does not exist")
+
+    def batches():
+        offset = None
+        while True:
+            points, offset = client.scroll(collection_name, limit=batch_size, offset=offset,
+                                           with_payload=True, with_vectors=[DENSE_VECTOR])
+            if points:
+                payloads = [point.payload or {} for point in points]
+                yield ([str(point.id) for point in points], np.asarray([point.vector for point in points]),
+                       [payload.get(CONTENT_KEY, "") for payload in payloads],
+                       [payload.get(METADATA_KEY, {}) for payload in payloads])
+            if offset is None:
+                break
+
+    return _build(directory, batches(), dimensions, dtype, hnsw_m, collection=collection_name)
+
+
+def load_local_index(collection_name: str, directory: Optional[str] = None,
+                     snapshot_path: Optional[str] = None) -> Optional[LocalVectorIndex]:
+    """
+    Local index of a collection, (re)built from its snapshot when the snapshot is newer than
+    the index (or there is no index yet); None if there is neither. A new index gets its
+    settings from LOCAL_INDEX_DTYPE (default float16) and LOCAL_INDEX_HNSW_M (default 0, exact).
+    """
+    directory = directory or default_index_dir(collection_name)
+    snapshot_path = snapshot_path or default_snapshot_path(collection_name)
+    snapshot_mtime = os.path.getmtime(snapshot_path) if os.path.exists(snapshot_path) else None
+    if LocalVectorIndex.exists(directory):
+        index = LocalVectorIndex(directory)
+        if snapshot_mtime is None or index.info.get("snapshot_mtime", 0) >= snapshot_mtime:
+            return index
+        index.close()
+    if snapshot_mtime is None:
+        return None
+    return build_from_snapshot(snapshot_path, directory, **_index_settings())
+
+
+def _index_settings() -> dict:
+    """dtype and hnsw_m of a new index, from LOCAL_INDEX_DTYPE and LOCAL_INDEX_HNSW_M"""
+    return dict(dtype=os.getenv("LOCAL_INDEX_DTYPE", "float16"), hnsw_m=int(os.getenv("LOCAL_INDEX_HNSW_M", "0")))
+
+
+def local_index_dimensions(collection_name: str, directory: Optional[str] = None) -> Optional[int]:
+    """Vector size of a collection's local index, or of its snapshot if it has no index yet (None if neither)"""
+    directory = directory or default_index_dir(collection_name)
+    if LocalVectorIndex.exists(directory):
+        with open(os.path.join(directory, INFO_FILE), encoding="utf-8") as f:
+            return json.load(f)["dimensions"]
+    snapshot_path = default_snapshot_path(collection_name)
+    if os.path.exists(snapshot_path):
+        return int(snapshot_info(snapshot_path)["dimensions"])
+    return None
+
+
+def local_index_mtime(collection_name: str, directory: Optional[str] = None) -> Optional[float]:
+    """When a collection's local index was last written to (None if it has none)"""
+    path = os.path.join(directory or default_index_dir(collection_name), INFO_FILE)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def drop_local_index(collection_name: str, directory: Optional[str] = None):
+    """Delete a collection's local index (a no-op if it has none)"""
+    shutil.rmtree(directory or default_index_dir(collection_name), ignore_errors=True)
+
+
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical-search")
+
+
+class LocalReplicaStore(VectorStore):
+    """
+    LangChain VectorStore over a LocalVectorIndex, interchangeable with QdrantVectorStore
+    and with HybridQdrantVectorStore for hybrid_search(). Qdrant's `search_params` are
+    accepted and their hnsw_ef is used as the graph's beam width. A `filter` must be a
+    Qdrant Filter of `must` matches on payload fields (what pipeline.filter_conditions()
+    accepts); any other filter is rejected before searching. add_texts() and delete() write
+    to the index, so readers in other processes see the change on their next query.
+    """
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings):
+        self.index = index
+        self.embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """Embed and add texts (replacing points with the same IDs); returns their IDs"""
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        if texts:
+            self.index.add(ids, self.embedding.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            raise ValueError("Pass the IDs of the points to delete")
+        self.index.delete(ids)
+        return True
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[models.Filter] = None, search_params=None,
+                                               **kwargs: Any) -> List[Tuple[Document, float]]:
+        # ValueError for a filter only Qdrant can evaluate
+        where = partial(conditions_match, filter_conditions(filter)) if filter is not None else None
+        ef = getattr(search_params, "hnsw_ef", None)
+        return [
+            (Document(id=point_id, page_content=text, metadata=metadata), score)
+            for point_id, score, text, metadata in self.index.search(embedding, k, ef=ef, where=where)
+        ]
+
+    def hybrid_search(self, query: str, query_vector: Optional[List[float]] = None, k: int = 4,
+                      search_params=None, candidates: int = CANDIDATES) -> List[Document]:
+        """Top `k` chunks of the dense and the BM25 ranking (`candidates` deep each) fused by RRF"""
+        if query_vector is None:
+            query_vector = self.embedding.embed_query(query)
+        depth = max(candidates, k)
+        lexical = _search_pool.submit(self.index.lexical_search, query, depth)
+        dense = self.similarity_search_by_vector(query_vector, depth, search_params=search_params)
+        lexical = [Document(id=point_id, page_content=text, metadata=metadata)
+                   for point_id, _, text, metadata in lexical.result()]
+        return reciprocal_rank_fusion([dense, lexical], k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, collection_name: Optional[str] = None,
+                   directory: Optional[str] = None, **kwargs: Any) -> "LocalReplicaStore":
+        """
+        Store over the local index of `collection_name` (or the one in `directory`), created
+        with the size of the first embedding if it does not exist yet, with `texts` added.
+        """
+        if directory is None and collection_name is None:
+            raise ValueError("Pass the collection_name or the directory of the local index")
+        directory = directory or default_index_dir(collection_name)
+        texts = list(texts)
+        if LocalVectorIndex.exists(directory):
+            store = cls(LocalVectorIndex(directory), embedding)
+            store.add_texts(texts, metadatas, ids)
+            return store
+        if not texts:
+            raise ValueError(f"{directory} holds no local index, and there are no texts to size a new one")
+        vectors = embedding.embed_documents(texts)
+        index = LocalVectorIndex.create(directory, len(vectors[0]), **_index_settings())
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        index.add(ids, vectors, texts, list(metadatas) if metadatas is not None else [{} for _ in texts])
+        return cls(index, embedding)
+
+
+class LocalIngestionPipeline(IngestionPipeline):
+    """
+    IngestionPipeline that writes to a collection's local index instead of a Qdrant
+    collection, so with VECTOR_BACKEND=local neither indexing nor queries need Qdrant.
+
+    The index is opened as load_local_index() opens it (an index that does not exist yet
+    starts from the collection's snapshot, if there is one) and otherwise created on the
+    first write, with LOCAL_INDEX_DTYPE and LOCAL_INDEX_HNSW_M. A run does what it does
+    against Qdrant: unchanged chunks are skipped, moved ones reuse their stored vector,
+    stale points are deleted and near-duplicate folds are kept. A completed run compacts
+    the index once it holds more dead rows than points. A `profile` configures Qdrant
+    collections and has no effect here.
+    """
+
+    def __init__(self, collection_name: str, embedding: Embeddings, text_splitter,
+                 directory: Optional[str] = None, **kwargs):
+        super().__init__(None, collection_name, embedding, text_splitter, **kwargs)
+        self.directory = directory or default_index_dir(collection_name)
+        self.index = load_local_index(collection_name, self.directory)
+
+    def _fetch_hashes(self) -> Dict[str, Optional[str]]:
+        if self.index is None:
+            return {}
+        in_scope = partial(conditions_match, self._scope_conditions)
+        return {point_id: content_hash(text) for point_id, text, _ in self.index.points(in_scope)}
+
+    def _finish_load(self):
+        # Deleted and replaced points leave dead rows behind; once they outnumber the live
+        # ones, the index is rebuilt without them
+        if self.index is not None and self.index.dead_rows > len(self.index):
+            self.index = self.index.compact()
+
+    def _ensure_collection(self, vector_size: int):
+        if self.index is None:
+            self.index = LocalVectorIndex.create(self.directory, vector_size, collection=self.collection_name,
+                                                 **_index_settings())
+
+    def _fetch_duplicates(self, batch_size: int = 1000) -> Dict[str, List[dict]]:
+        return self.index.duplicates() if self.index is not None else {}
+
+    def _set_duplicates(self, duplicates: Dict[str, List[dict]], batch_size: int = 256):
+        if not duplicates:
+            return
+        metadatas = {
+            point_id: self._with_also_in(metadata, duplicates[point_id])
+            for point_id, (_, metadata) in self.index.get(duplicates).items()
+        }
+        self.index.update(metadatas, duplicates)
+
+    def _point_sources(self, point_ids: List[str], batch_size: int = 1000) -> Dict[str, Optional[str]]:
+        if self.index is None:
+            return {}
+        return {point_id: page_source(metadata) for point_id, (_, metadata) in self.index.get(point_ids).items()}
+
+    def _reuse_vectors(self, point_ids: List[Optional[str]]) -> List[Optional[List[float]]]:
+        index = self.index
+        stored = index.vectors([point_id for point_id in point_ids if point_id]) if index is not None else {}
+        return [stored.get(point_id) if point_id else None for point_id in point_ids]
+
+    def _upsert(self, batch: List[Tuple[str, Document]], hashes: List[str], vectors: List[List[float]]):
+        if not batch:
+            return
+        self._ensure_collection(len(vectors[0]))
+        self.index.add([point_id for point_id, _ in batch], vectors, [doc.page_content for _, doc in batch],
+                       [doc.metadata for _, doc in batch])
+
+    def _delete(self, point_ids: List[str]):
+        if self.index is not None:
+            self.index.delete(point_ids)
@@ -0,0 +1,235 @@
+# page_cache.py - Persistent cache of extracted PDF page text, keyed by file content
+#
+# Pages are keyed by (SHA-256 of the PDF bytes, page number, extractor version), so the same
+# file is only ever parsed once, whatever its name or path and whether it arrives as an
+# upload or from disk. The document-level metadata is kept next to the pages, so a fully
+# cached PDF yields its Documents without being opened at all. Bumping EXTRACTOR_VERSION (or
+# upgrading pypdf) invalidates every entry. Whole files are evicted least recently used
+# first once the cached text exceeds max_bytes.
+#
+# The cache also remembers which file was last ingested under a source name into a
+# collection, so an app can recognize a repeated upload before doing any work.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+import pypdf
+
+DEFAULT_PAGE_CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "pages.sqlite"),
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MiB of text, roughly 100k pages
+# Part of every key: bump the suffix whenever extraction changes what text a page yields
+EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}/1"
+
+HASH_BLOCK = 1024 * 1024
+
+
+def file_sha256(pdf: Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]) -> str:
+    """SHA-256 of a PDF given as a path, bytes or binary file object (read from 0 in blocks, then rewound)"""
+    digest = hashlib.sha256()
+    if isinstance(pdf, (str, os.PathLike)):
+        with open(pdf, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                digest.update(block)
+    elif isinstance(pdf, (bytes, bytearray, memoryview)):
+        digest.update(pdf)
+    else:
+        pdf.seek(0)
+        for block in iter(lambda: pdf.read(HASH_BLOCK), b""):
+            digest.update(block)
+        pdf.seek(0)
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedPdf:
+    """What the cache holds for one file: its metadata (without `source`) and the pages extracted so far"""
+    metadata: Dict
+    total_pages: int
+    pages: Dict[int, Tuple[str, str]] = field(default_factory=dict)  # page number -> (page label, text)
+
+    @property
+    def complete(self) -> bool:
+        return len(self.pages) == self.total_pages
+
+    def page_tuples(self, start: int = 0, stop: Optional[int] = None) -> List[Tuple[int, str, str]]:
+        """(page_number, page_label, text) of pages [start, stop), as the extractor returns them"""
+        stop = self.total_pages if stop is None else stop
+        return [(number, *self.pages[number]) for number in range(start, stop)]
+
+    def has_range(self, start: int, stop: int) -> bool:
+        return all(number in self.pages for number in range(start, stop))
+
+
+class PageCache:
+    """
+    SQLite-backed page text cache with size-bounded LRU eviction of whole files.
+
+    Safe to share between threads, and between processes through SQLite's WAL mode.
+    `hits` and `misses` count pages looked up through this instance.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway cache)
+        max_bytes: Text kept before the least recently used files are evicted
+        version: Extractor version the entries are valid for
+    """
+
+    def __init__(self, path: str = DEFAULT_PAGE_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 version: str = EXTRACTOR_VERSION):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " file_hash TEXT NOT NULL, version TEXT NOT NULL, metadata TEXT NOT NULL, total_pages INTEGER NOT NULL,"
+            " last_used REAL NOT NULL, PRIMARY KEY (file_hash, version))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " file_hash TEXT NOT NULL, page INTEGER NOT NULL, version TEXT NOT NULL, page_label TEXT NOT NULL,"
+            " text TEXT NOT NULL, size INTEGER NOT NULL, PRIMARY KEY (file_hash, version, page))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingested ("
+            " collection TEXT NOT NULL, source TEXT NOT NULL, file_hash TEXT NOT NULL, ingested_at REAL NOT NULL,"
+            " PRIMARY KEY (collection, source))"
+        )
+        self._conn.commit()
+
+    def get(self, file_hash: str) -> Optional[CachedPdf]:
+        """Cached metadata and pages of a file (None if it was never opened with this extractor version)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT metadata, total_pages FROM files WHERE file_hash = ? AND version = ?", (file_hash, self.version)
+            ).fetchone()
+            if row is None:
+                return None
+            cached = CachedPdf(metadata=json.loads(row[0]), total_pages=row[1])
+            for page, page_label, text in self._conn.execute(
+                "SELECT page, page_label, text FROM pages WHERE file_hash = ? AND version = ?", (file_hash, self.version)
+            ):
+                cached.pages[page] = (page_label, text)
+            self._conn.execute("UPDATE files SET last_used = ? WHERE file_hash = ? AND version = ?",
+                               (time.time(), file_hash, self.version))
+            self._conn.commit()
+            self.hits += len(cached.pages)
+            self.misses += cached.total_pages - len(cached.pages)
+        return cached
+
+    def total_pages(self, file_hash: str) -> Optional[int]:
+        """Page count of a cached file, without reading (or counting a lookup of) its pages"""
+        with self._lock:
+            row = self._conn.execute("SELECT total_pages FROM files WHERE file_hash = ? AND version = ?",
+                                     (file_hash, self.version)).fetchone()
+        return row[0] if row else None
+
+    def put_file(self, file_hash: str, metadata: Dict, total_pages: int):
+        """Record a file's document-level metadata; `source` is left out, it depends on how the file arrived"""
+        metadata = {key: value for key, value in metadata.items() if key != "source"}
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                               (file_hash, self.version, json.dumps(metadata, default=str), total_pages, time.time()))
+            self._conn.commit()
+
+    def put_pages(self, file_hash: str, pages: Iterable[Tuple[int, str, Optional[str]]]):
+        """Store extracted (page_number, page_label, text) tuples; pages whose text is None (failed) are skipped"""
+        rows = [(file_hash, page, self.version, page_label, text, len(text.encode("utf-8")))
+                for page, page_label, text in pages if text is not None]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until the cache is back under 90% of max_bytes"""
+        # Caller holds self._lock
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for file_hash, version, size in self._conn.execute(
+            "SELECT f.file_hash, f.version, COALESCE(SUM(p.size), 0) FROM files f"
+            " LEFT JOIN pages p ON p.file_hash = f.file_hash AND p.version = f.version"
+            " GROUP BY f.file_hash, f.version ORDER BY f.last_used"
+        ).fetchall():
+            if total <= target:
+                break
+            doomed.append((file_hash, version))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE file_hash = ? AND version = ?", doomed)
+        self._conn.executemany("DELETE FROM files WHERE file_hash = ? AND version = ?", doomed)
+        # Entries of an older extractor version are dead weight, and pages still arriving for an
+        # evicted file (one larger than the whole cache) have no files row to be evicted through
+        self._conn.execute("DELETE FROM files WHERE version != ?", (self.version,))
+        self._conn.execute(
+            "DELETE FROM pages WHERE NOT EXISTS"
+            " (SELECT 1 FROM files f WHERE f.file_hash = pages.file_hash AND f.version = pages.version)"
+        )
+        self._conn.commit()
+
+    def mark_ingested(self, collection: str, source: str, file_hash: str):
+        """Remember that `file_hash` is the file whose chunks `collection` now holds under `source`"""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO ingested VALUES (?, ?, ?, ?)",
+                               (collection, source, file_hash, time.time()))
+            self._conn.commit()
+
+    def ingested_hash(self, collection: str, source: str) -> Optional[str]:
+        """Hash of the file last ingested into `collection` under `source`, if any"""
+        with self._lock:
+            row = self._conn.execute("SELECT file_hash FROM ingested WHERE collection = ? AND source = ?",
+                                     (collection, source)).fetchone()
+        return row[0] if row else None
+
+    def forget_collection(self, collection: str):
+        """Drop the ingestion records of a collection, e.g. after deleting it"""
+        with self._lock:
+            self._conn.execute("DELETE FROM ingested WHERE collection = ?", (collection,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            pages, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "files": files,
+            "pages": pages,
+            "bytes": size,
+        }
+
+
+_shared_cache: Optional[PageCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """The process-wide cache opened at DEFAULT_PAGE_CACHE_PATH"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PageCache()
+        return _shared_cache
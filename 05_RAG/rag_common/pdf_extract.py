@@ -0,0 +1,338 @@
+# pdf_extract.py - Page-parallel PDF text extraction
+
+import io
+import mmap
+import os
+import shutil
+import signal
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import pypdf
+from langchain_core.documents import Document
+
+from rag_common.page_cache import CachedPdf, PageCache, file_sha256
+from rag_common.pipeline import FAILED_KEY
+
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+_deadline_warned = False
+
+
+class PageTimeoutError(Exception):
+    """Raised inside a worker when a single page takes too long to extract"""
+
+
+def _off_main_thread() -> bool:
+    return threading.current_thread() is not threading.main_thread()
+
+
+def _needs_worker(page_timeout: Optional[float]) -> bool:
+    """
+    Whether pages must be parsed in a pool worker for `page_timeout` to be enforced: SIGALRM
+    only interrupts the main thread, and Streamlit ingests on worker threads
+    """
+    return bool(page_timeout) and hasattr(signal, "SIGALRM") and _off_main_thread()
+
+
+@contextmanager
+def _page_deadline(seconds: Optional[float]):
+    """
+    Abort the wrapped block with PageTimeoutError after `seconds`.
+
+    Uses SIGALRM, so it only arms on platforms that have it and when running in the
+    main thread of the process (always true for pool workers; callers on other threads
+    hand the pages to a worker, see _needs_worker). Otherwise it logs that the timeout
+    is not enforced and runs the block without one.
+    """
+    global _deadline_warned
+    if not seconds:
+        yield
+        return
+    if not hasattr(signal, "SIGALRM") or _off_main_thread():
+        if not _deadline_warned:
+            _deadline_warned = True
+            print(f"Page timeout of {seconds}s is not enforced here (needs SIGALRM on the main thread)")
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise PageTimeoutError()
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _document_metadata(reader: pypdf.PdfReader, source: str) -> Dict:
+    """Build the same document-level metadata keys PyPDFLoader produces"""
+    metadata = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+    for key, value in (reader.metadata or {}).items():
+        key = key.lstrip("/").lower()
+        metadata[key] = value.strip() if isinstance(value, str) else str(value)
+    metadata["source"] = source
+    metadata["total_pages"] = len(reader.pages)
+    return metadata
+
+
+@contextmanager
+def open_pdf(pdf: PdfSource) -> Iterator[pypdf.PdfReader]:
+    """
+    Open a PDF without making a private copy of it.
+
+    pypdf reads a whole file into a BytesIO when given a path, so paths are memory-mapped
+    instead (every process mapping the same file shares its pages). Binary file objects such
+    as Streamlit's UploadedFile and bytes are read in place; a bytearray or memoryview is
+    copied once, because BytesIO only shares immutable bytes.
+    """
+    if isinstance(pdf, (str, os.PathLike)):
+        with open(pdf, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield pypdf.PdfReader(mapped)
+    elif isinstance(pdf, (bytes, bytearray, memoryview)):
+        yield pypdf.PdfReader(io.BytesIO(pdf))
+    else:
+        yield pypdf.PdfReader(pdf)
+
+
+def _extract_pages(reader: pypdf.PdfReader, start: int, stop: int, page_timeout: Optional[float],
+                   name: str) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract pages [start, stop) and return (page_number, page_label, text) tuples.
+
+    A page that raises or exceeds `page_timeout` comes back with text None (an empty page
+    flagged with FAILED_KEY downstream) so one bad page never fails the whole document, and
+    is never cached.
+    """
+    page_labels = reader.page_labels
+    pages = []
+    for page_number in range(start, stop):
+        try:
+            with _page_deadline(page_timeout):
+                text = reader.pages[page_number].extract_text()
+        except PageTimeoutError:
+            print(f"Page {page_number + 1} of {name} timed out after {page_timeout}s, skipping its text")
+            text = None
+        except Exception as e:
+            print(f"Error extracting page {page_number + 1} of {name}: {e}")
+            text = None
+        pages.append((page_number, page_labels[page_number], text.strip() if text is not None else None))
+    return pages
+
+
+def _extract_page_range(file_path: str, start: int, stop: int,
+                        page_timeout: Optional[float]) -> List[Tuple[int, str, Optional[str]]]:
+    """Worker: memory-map the PDF and extract pages [start, stop)"""
+    with open_pdf(file_path) as reader:
+        return _extract_pages(reader, start, stop, page_timeout, file_path)
+
+
+def _to_documents(pages: List[Tuple[int, str, Optional[str]]], doc_metadata: Dict) -> Iterator[Document]:
+    for page_number, page_label, text in pages:
+        metadata = {**doc_metadata, "page": page_number, "page_label": page_label}
+        if text is None:
+            metadata[FAILED_KEY] = True
+        yield Document(page_content=text or "", metadata=metadata)
+
+
+def _page_ranges(total_pages: int, max_workers: int, pages_per_task: Optional[int]) -> List[Tuple[int, int]]:
+    """Split [0, total_pages) into contiguous ranges, a few per worker for load balancing"""
+    if pages_per_task is None:
+        pages_per_task = max(1, -(-total_pages // (max_workers * 4)))
+    return [(start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task)]
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process-wide extraction pool per size, so concurrent uploads share one set of workers
+    instead of each starting (and holding the memory of) its own
+    """
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None or getattr(pool, "_broken", False):
+            pool = _pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return pool
+
+
+def count_pdf_pages(pdf: PdfSource) -> int:
+    """Number of pages in a PDF (path, bytes or binary file object), without extracting any text"""
+    with open_pdf(pdf) as reader:
+        return len(reader.pages)
+
+
+def _store(page_cache: Optional[PageCache], file_hash: Optional[str],
+           pages: List[Tuple[int, str, Optional[str]]]) -> List[Tuple[int, str, Optional[str]]]:
+    if page_cache is not None:
+        page_cache.put_pages(file_hash, pages)
+    return pages
+
+
+def lazy_load_pdf_parallel(
+    file_path: str,
+    max_workers: Optional[int] = None,
+    page_timeout: Optional[float] = 30.0,
+    pages_per_task: Optional[int] = None,
+    source: Optional[str] = None,
+    page_cache: Optional[PageCache] = None,
+    file_hash: Optional[str] = None,
+) -> Iterator[Document]:
+    """
+    Extract a PDF page by page across a process pool, yielding one Document per page in page order.
+
+    Args:
+        file_path: Path of the PDF on disk (each worker memory-maps it on its own)
+        max_workers: Size of the process pool (defaults to the CPU count). 1 extracts in-process,
+            or in one pool worker when called off the main thread with a page_timeout
+        page_timeout: Seconds allowed per page before its text is dropped (None disables it)
+        pages_per_task: Pages handed to a worker at a time (defaults to ~4 tasks per worker)
+        source: Value for the `source` metadata key (defaults to file_path)
+        page_cache: Serve pages extracted before from here and store new ones (None = always parse)
+        file_hash: SHA-256 of the file, if the caller already has it
+    """
+    source = source or file_path
+    cached: Optional[CachedPdf] = None
+    if page_cache is not None:
+        file_hash = file_hash or file_sha256(file_path)
+        cached = page_cache.get(file_hash)
+        if cached is not None and cached.complete:
+            # Seen before: no parsing at all, not even of the document structure
+            yield from _to_documents(cached.page_tuples(), {**cached.metadata, "source": source})
+            return
+
+    with open_pdf(file_path) as reader:
+        doc_metadata = _document_metadata(reader, source)
+        total_pages = len(reader.pages)
+    if page_cache is not None and cached is None:
+        page_cache.put_file(file_hash, doc_metadata, total_pages)
+        cached = CachedPdf(metadata=doc_metadata, total_pages=total_pages)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    ranges = _page_ranges(total_pages, max_workers, pages_per_task)
+    if cached is not None:
+        # Pages cached by an earlier, interrupted load are served as they are
+        ranges = [(start, stop, cached.has_range(start, stop)) for start, stop in ranges]
+    else:
+        ranges = [(start, stop, False) for start, stop in ranges]
+
+    if max_workers == 1 or sum(1 for *_, hit in ranges if not hit) <= 1:
+        for start, stop, hit in ranges:
+            if hit:
+                pages = cached.page_tuples(start, stop)
+            elif _needs_worker(page_timeout):
+                # a worker process can time out a page, this thread cannot
+                pages = _get_pool(max_workers).submit(_extract_page_range, file_path, start, stop,
+                                                      page_timeout).result()
+                pages = _store(page_cache, file_hash, pages)
+            else:
+                pages = _store(page_cache, file_hash, _extract_page_range(file_path, start, stop, page_timeout))
+            yield from _to_documents(pages, doc_metadata)
+        return
+
+    # Keep only a couple of ranges per worker in flight so a slow consumer bounds memory
+    window = max_workers * 2
+    executor = _get_pool(max_workers)
+    pending = deque()  # (start, stop, future), future None for a cached range
+
+    def submit(start: int, stop: int, hit: bool):
+        future = None if hit else executor.submit(_extract_page_range, file_path, start, stop, page_timeout)
+        pending.append((start, stop, future))
+
+    try:
+        next_range = iter(ranges)
+        for page_range in islice(next_range, window):
+            submit(*page_range)
+        # Collect in submission order so pages come back in document order
+        while pending:
+            start, stop, future = pending.popleft()
+            if future is None:
+                pages = cached.page_tuples(start, stop)
+            else:
+                pages = _store(page_cache, file_hash, future.result())
+            for page_range in islice(next_range, 1):
+                submit(*page_range)
+            yield from _to_documents(pages, doc_metadata)
+    finally:
+        # The pool is shared: drop what we queued, but leave the workers running
+        for _, _, future in pending:
+            if future is not None:
+                future.cancel()
+
+
+def lazy_load_pdf_buffer(
+    pdf: Union[bytes, bytearray, memoryview, BinaryIO],
+    max_workers: Optional[int] = None,
+    page_timeout: Optional[float] = 30.0,
+    pages_per_task: Optional[int] = None,
+    source: Optional[str] = None,
+    page_cache: Optional[PageCache] = None,
+    file_hash: Optional[str] = None,
+) -> Iterator[Document]:
+    """
+    lazy_load_pdf_parallel for a PDF that is already in memory, such as an upload.
+
+    PDFs small enough for a single task (and max_workers=1) are parsed straight from the
+    buffer, except on a thread other than the main one when page_timeout is set. Otherwise
+    the buffer is streamed to a temporary file once (in $TMPDIR), which every worker
+    memory-maps, so the workers share one copy through the page cache. A PDF found
+    complete in `page_cache` is neither parsed nor spilled.
+
+    Args:
+        pdf: PDF bytes, or a binary file object (read from position 0)
+        source: Value for the `source` metadata key (defaults to the file object's name)
+        max_workers, page_timeout, pages_per_task, page_cache, file_hash: As for lazy_load_pdf_parallel
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    source = source or getattr(pdf, "name", None) or "<buffer>"
+    if page_cache is not None:
+        file_hash = file_hash or file_sha256(pdf)
+        cached = page_cache.get(file_hash)
+        if cached is not None and cached.complete:
+            yield from _to_documents(cached.page_tuples(), {**cached.metadata, "source": source})
+            return
+
+    with open_pdf(pdf) as reader:
+        ranges = _page_ranges(len(reader.pages), max_workers, pages_per_task)
+        # Parsed right here unless a page timeout has to be enforced from a thread that cannot
+        # (then the spilled file goes to a pool worker, even for max_workers=1)
+        if (max_workers == 1 or len(ranges) == 1) and not _needs_worker(page_timeout):
+            doc_metadata = _document_metadata(reader, source)
+            if page_cache is not None:
+                page_cache.put_file(file_hash, doc_metadata, len(reader.pages))
+            for start, stop in ranges:
+                pages = _extract_pages(reader, start, stop, page_timeout, source)
+                yield from _to_documents(_store(page_cache, file_hash, pages), doc_metadata)
+            return
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as spill:
+        if isinstance(pdf, (bytes, bytearray, memoryview)):
+            spill.write(pdf)
+        else:
+            pdf.seek(0)
+            shutil.copyfileobj(pdf, spill)  # in chunks, never a second full copy
+    try:
+        yield from lazy_load_pdf_parallel(spill.name, max_workers, page_timeout, pages_per_task, source,
+                                          page_cache, file_hash)
+    finally:
+        os.unlink(spill.name)
+
+
+def load_pdf_parallel(
+    file_path: str,
+    max_workers: Optional[int] = None,
+    page_timeout: Optional[float] = 30.0,
+    pages_per_task: Optional[int] = None,
+    source: Optional[str] = None,
+    page_cache: Optional[PageCache] = None,
+) -> List[Document]:
+    """Drop-in replacement for PyPDFLoader(file_path).load() that extracts pages in parallel"""
+    return list(lazy_load_pdf_parallel(file_path, max_workers, page_timeout, pages_per_task, source, page_cache))
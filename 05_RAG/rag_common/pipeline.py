@@ -0,0 +1,593 @@
+# pipeline.py - Streaming load -> split -> embed -> upsert ingestion
+#
+# Each stage runs in its own thread and hands work to the next one through a bounded
+# queue, so embedding of the first pages starts while later pages are still being
+# parsed, and memory is bounded by the queue depth rather than the document size.
+#
+# Point IDs are derived from chunk content (see incremental.py), so re-running a pipeline
+# over a mostly unchanged corpus only embeds new or changed chunks, reuses the stored
+# vector when a chunk merely moved, and deletes the points that are no longer produced.
+#
+# A near-duplicate chunk dropped by dedup is kept, text and all, in the payload of the point
+# it was folded into. A later run only decides such a fold again if the folded chunk's page
+# is part of its input (or, deleting stale points, is in its scope and so is gone); if it
+# deletes the point, the folded chunks of other pages are written back, so their text never
+# disappears with it.
+#
+# A loader marks a page it could not read (a PDF page that timed out) with FAILED_KEY
+# instead of passing it on as an empty page, so the chunks stored from its source survive.
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient, models
+
+from rag_common.answer_cache import bump_collection_version
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.collection_profiles import CollectionProfile
+from rag_common.dedup import NearDuplicateFilter
+from rag_common.hybrid import DENSE_VECTOR, SPARSE_VECTOR, collection_has_lexical, sparse_vector, sparse_vectors_config
+from rag_common.incremental import HASH_KEY, chunk_point_id, content_hash, delete_points, fetch_point_hashes
+
+CONTENT_KEY = "page_content"  # same payload keys QdrantVectorStore reads back
+METADATA_KEY = "metadata"
+DUPLICATES_KEY = "duplicates"  # top-level: {"id", page_content, metadata} of each chunk folded into the point
+FAILED_KEY = "extraction_failed"  # metadata flag of an input page whose text could not be extracted
+
+_DONE = object()  # end-of-stream marker passed down the queues
+
+
+@dataclass
+class IngestProgress:
+    """Measured counts reported while a pipeline runs"""
+    total_pages: Optional[int] = None
+    pages_parsed: int = 0
+    chunks_produced: int = 0
+    chunks_unchanged: int = 0
+    vectors_embedded: int = 0
+    vectors_reused: int = 0
+    points_written: int = 0
+    points_deleted: int = 0
+    pages_resumed: int = 0
+    pages_failed: int = 0
+    chunks_deduplicated: int = 0
+    done: bool = False
+
+    @property
+    def percent(self) -> int:
+        """Overall completion: parsing weighs 20%, writing the chunks parsed so far the other 80%"""
+        if self.done:
+            return 100
+        parsed = self.pages_parsed / self.total_pages if self.total_pages else 0.0
+        settled = self.points_written + self.chunks_unchanged + self.chunks_deduplicated
+        written = settled / self.chunks_produced if self.chunks_produced else 0.0
+        return min(99, int(100 * parsed * (0.2 + 0.8 * written)))
+
+    def message(self) -> str:
+        pages = f"{self.pages_parsed}/{self.total_pages}" if self.total_pages else str(self.pages_parsed)
+        if self.pages_resumed:
+            pages += f" ({self.pages_resumed} resumed)"
+        if self.pages_failed:
+            pages += f" ({self.pages_failed} failed)"
+        return (f"📖 {pages} pages parsed · ✂️ {self.chunks_produced} chunks ({self.chunks_unchanged} unchanged) · "
+                f"🧹 {self.chunks_deduplicated} near-duplicates · 🧠 {self.vectors_embedded} embedded · "
+                f"💾 {self.points_written} written")
+
+
+def filter_conditions(filter: Optional[models.Filter]) -> List[Tuple[List[str], Any]]:
+    """(payload path, match) of each condition of `filter`, which must be `must` matches on payload fields"""
+    if filter is None:
+        return []
+    must = filter.must if isinstance(filter.must, list) else [filter.must] if filter.must else []
+    supported = not (filter.should or filter.must_not or filter.min_should) and all(
+        isinstance(condition, models.FieldCondition)
+        and isinstance(condition.match, (models.MatchValue, models.MatchAny, models.MatchExcept))
+        for condition in must
+    )
+    if not supported:
+        raise ValueError("The filter must be a Filter of must=[FieldCondition(key=..., match=MatchValue/MatchAny/"
+                         "MatchExcept)], so chunks can be matched against it without Qdrant")
+    return [(condition.key.split("."), condition.match) for condition in must]
+
+
+def page_source(metadata: dict) -> Optional[str]:
+    """The file or URL a chunk came from"""
+    source = metadata.get("source") or metadata.get("link")
+    return str(source) if source is not None else None
+
+
+def conditions_match(conditions: List[Tuple[List[str], Any]], metadata: dict) -> bool:
+    """Whether a chunk with this metadata matches the filter given by filter_conditions()"""
+    for path, match in conditions:
+        value = {METADATA_KEY: metadata}
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(match, models.MatchValue) and value != match.value:
+            return False
+        if isinstance(match, models.MatchAny) and value not in match.any:
+            return False
+        if isinstance(match, models.MatchExcept) and value in match.except_:
+            return False
+    return True
+
+
+class IngestCancelled(Exception):
+    """Raised by IngestionPipeline.run() when its `cancel` event was set"""
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class IngestionPipeline:
+    """
+    Pipelined ingestion of page Documents into a Qdrant collection.
+
+    The collection is created on the first upsert (sized from the first embedding) if it
+    does not exist yet. `on_progress` is always called from the thread that calls run(),
+    so it is safe to update Streamlit widgets from it.
+
+    A run treats its input as the complete content of `scope` (the whole collection by
+    default): once every chunk is written, points in scope it did not produce are deleted.
+    Pass delete_stale=False to only add/update. `prune`, called once every chunk is written,
+    may name more points to delete as stale (e.g. of files deleted since the last run). A
+    cancelled run keeps the points it already wrote and deletes nothing. With
+    text_splitter=None the input Documents are taken as ready-made chunks (e.g. chunked in
+    worker processes).
+
+    An input page whose metadata has FAILED_KEY set is not chunked. No point of its source
+    (see page_source) is deleted as stale, no fold of it is revised, and the source is not
+    recorded as finished in the checkpoint, so the next run tries it again.
+
+    A new collection is created with `profile` (Qdrant's defaults if None); a profile that
+    defers index building gets its HNSW graph built once a run completes (a cancelled run
+    leaves that to the next complete one).
+
+    With a `checkpoint`, every written batch and every finished source is recorded, and a
+    run after a failed or cancelled one skips the sources that were finished (the pages of
+    a source must arrive one after another). The checkpoint is cleared when a run completes.
+
+    With `dedup`, chunks that are near-duplicates of an earlier chunk of the run are never
+    embedded or stored; the kept chunk lists their metadata under metadata["also_in"] and
+    keeps the chunks themselves in its payload. Folds made by earlier runs are revised: those
+    of pages in the input (see page_source) are replaced by this run's, and so are those of
+    pages in scope when stale points are deleted, since such a page is no longer there. Any
+    other fold is kept, and written again as a point of its own (or folded into a chunk of
+    this run) if this run deletes the point it was folded into. This is why `scope` must be a
+    plain list of payload field matches (see filter_conditions).
+
+    A run that writes or deletes points bumps the collection's version, which invalidates
+    the answers cached for it (see answer_cache.py).
+
+    Every chunk is also written with its BM25 sparse vector for hybrid search (hybrid.py),
+    unless the collection was created without one.
+
+    Points are read and written through the underscore methods at the end of the class;
+    local_index.LocalIngestionPipeline overrides them to ingest into a local index instead.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection_name: str,
+        embedding: Embeddings,
+        text_splitter,
+        batch_size: int = 64,
+        queue_size: int = 4,
+        embed_workers: int = 4,
+        distance: models.Distance = models.Distance.COSINE,
+        scope: Optional[models.Filter] = None,
+        delete_stale: bool = True,
+        profile: Optional[CollectionProfile] = None,
+        dedup: Optional[NearDuplicateFilter] = None,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.embedding = embedding
+        self.text_splitter = text_splitter
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.embed_workers = embed_workers
+        self.distance = distance
+        self.scope = scope
+        self.delete_stale = delete_stale
+        self.profile = profile
+        self.dedup = dedup
+        self._scope_conditions = filter_conditions(scope)
+        self._collection_ready = False
+        self._lexical = False
+
+    def run(
+        self,
+        pages: Iterable[Document],
+        total_pages: Optional[int] = None,
+        on_progress: Optional[Callable[[IngestProgress], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        checkpoint: Optional[IngestCheckpoint] = None,
+        prune: Optional[Callable[[], Iterable[str]]] = None,
+    ) -> IngestProgress:
+        progress = IngestProgress(total_pages=total_pages)
+        lock = threading.Lock()
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        existing = self._fetch_hashes()
+        reusable = {}  # content hash -> an existing point whose vector can be copied
+        for point_id, point_hash in existing.items():
+            if point_hash:
+                reusable.setdefault(point_hash, point_id)
+        produced = set()
+
+        resumed_sources = set()
+        upserted = set()  # written by an earlier attempt, possibly outside `scope`
+        if checkpoint is not None:
+            resumed_sources = checkpoint.done_sources()
+            upserted = checkpoint.upserted_points()
+            produced |= checkpoint.done_points()  # kept, not deleted as stale
+        # (batches that must be written first, source, its point IDs), in the order sources end
+        finished_sources = deque()
+        batches_sent = 0
+
+        folded = self._fetch_duplicates()  # kept point ID -> chunks folded into it by earlier runs
+        input_sources = set()  # page_source() of every input page, resumed ones included
+        failed_sources = set()  # page_source() of pages that failed to load: their points stay
+        also_in: Dict[str, List[dict]] = {}  # kept point ID -> near-duplicates dropped in its favour by this run
+        if checkpoint is not None:
+            for kept, entry in checkpoint.folds():
+                also_in.setdefault(kept, []).append(entry)
+        if self.dedup is not None:
+            self.dedup.reset()
+
+        page_queue = queue.Queue(maxsize=self.queue_size)
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        vector_queue = queue.Queue(maxsize=max(self.queue_size, self.embed_workers))
+
+        def put(q, item):
+            # Block on a full queue, but give up as soon as another stage failed
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            raise _Cancelled()
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            raise _Cancelled()
+
+        def stage(target, out_q):
+            def runner():
+                try:
+                    target()
+                except _Cancelled:
+                    return
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+                    return
+                try:
+                    put(out_q, _DONE)
+                except _Cancelled:
+                    pass
+            thread = threading.Thread(target=runner, daemon=True)
+            thread.start()
+            return thread
+
+        def load():
+            page_iter = iter(pages)
+            try:
+                for page in page_iter:
+                    input_sources.add(page_source(page.metadata))
+                    if resumed_sources and checkpoint.source_of(page.metadata) in resumed_sources:
+                        with lock:
+                            progress.pages_parsed += 1
+                            progress.pages_resumed += 1
+                        continue
+                    put(page_queue, page)
+                    with lock:
+                        progress.pages_parsed += 1
+            finally:
+                if hasattr(page_iter, "close"):
+                    page_iter.close()  # lets a lazy loader shut its process pool down early
+
+        def split():
+            nonlocal batches_sent
+            batch = []
+            source, source_points, source_folds, source_failed = None, [], [], False
+
+            def finish_source():
+                # The source is in Qdrant once the batches sent so far, plus the one still
+                # being filled, are written
+                if checkpoint is not None and source is not None and not source_failed:
+                    with lock:
+                        finished_sources.append((batches_sent + (1 if batch else 0), source, source_points,
+                                                 source_folds))
+
+            while (page := get(page_queue)) is not _DONE:
+                if checkpoint is not None and checkpoint.source_of(page.metadata) != source:
+                    finish_source()
+                    source, source_points, source_folds = checkpoint.source_of(page.metadata), [], []
+                    source_failed = False
+                if page.metadata.get(FAILED_KEY):
+                    with lock:
+                        failed_sources.add(page_source(page.metadata))
+                        progress.pages_failed += 1
+                    source_failed = True
+                    continue
+                chunks = self.text_splitter.split_documents([page]) if self.text_splitter else [page]
+                changed = []
+                deduplicated = 0
+                for chunk in chunks:
+                    point_id = chunk_point_id(chunk)
+                    if point_id in produced:
+                        source_points.append(point_id)
+                        continue  # identical chunk already queued in this run
+                    if self.dedup is not None:
+                        kept = self.dedup.check(point_id, chunk.page_content)
+                        if kept is not None:
+                            entry = {"id": point_id, CONTENT_KEY: chunk.page_content, METADATA_KEY: chunk.metadata}
+                            also_in.setdefault(kept, []).append(entry)
+                            source_folds.append((kept, entry))
+                            deduplicated += 1
+                            continue
+                    source_points.append(point_id)
+                    produced.add(point_id)
+                    if point_id not in existing and point_id not in upserted:
+                        changed.append((point_id, chunk))
+                with lock:
+                    progress.chunks_produced += len(chunks)
+                    progress.chunks_unchanged += len(chunks) - len(changed) - deduplicated
+                    progress.chunks_deduplicated += deduplicated
+                batch.extend(changed)
+                while len(batch) >= self.batch_size:
+                    put(chunk_queue, batch[:self.batch_size])
+                    batch = batch[self.batch_size:]
+                    batches_sent += 1
+            finish_source()
+            if batch:
+                put(chunk_queue, batch)
+
+        def embed_batch(batch):
+            hashes = [content_hash(doc.page_content) for _, doc in batch]
+            vectors = self._reuse_vectors([reusable.get(h) for h in hashes])
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            if missing:
+                fresh = self.embedding.embed_documents([batch[i][1].page_content for i in missing])
+                for i, vector in zip(missing, fresh):
+                    vectors[i] = vector
+            with lock:
+                progress.vectors_embedded += len(missing)
+                progress.vectors_reused += len(batch) - len(missing)
+            return hashes, vectors
+
+        def embed():
+            # Up to embed_workers batches are embedded at once; their futures go downstream
+            # in order, so the upsert stage still writes batches in document order
+            with ThreadPoolExecutor(max_workers=self.embed_workers) as pool:
+                while (batch := get(chunk_queue)) is not _DONE:
+                    put(vector_queue, (batch, pool.submit(embed_batch, batch)))
+
+        threads = [stage(load, page_queue), stage(split, chunk_queue), stage(embed, vector_queue)]
+
+        def commit_sources(batches_written):
+            while True:
+                with lock:
+                    if not finished_sources or finished_sources[0][0] > batches_written:
+                        return
+                    _, source, point_ids, folds = finished_sources.popleft()
+                checkpoint.commit_source(source, point_ids, folds)
+
+        # Upsert runs on the calling thread so progress callbacks happen here too
+        reported = None
+        finished = False
+        batches_written = 0
+        try:
+            while not stop.is_set():
+                if cancel is not None and cancel.is_set():
+                    raise IngestCancelled()
+                try:
+                    item = vector_queue.get(timeout=0.1)
+                except queue.Empty:
+                    item = None
+                if item is _DONE:
+                    finished = True
+                    if checkpoint is not None:
+                        commit_sources(batches_written)  # every batch is written by now
+                    break
+                if item is not None:
+                    batch, embedded = item
+                    hashes, vectors = embedded.result()
+                    self._upsert(batch, hashes, vectors)
+                    batches_written += 1
+                    if checkpoint is not None:
+                        checkpoint.commit_batch([point_id for point_id, _ in batch])
+                    with lock:
+                        progress.points_written += len(batch)
+                if checkpoint is not None:
+                    commit_sources(batches_written)
+                if on_progress:
+                    with lock:
+                        snapshot = (progress.pages_parsed, progress.chunks_produced,
+                                    progress.vectors_embedded, progress.points_written)
+                    if snapshot != reported:
+                        reported = snapshot
+                        on_progress(progress)
+        finally:
+            if not finished:
+                stop.set()  # a stage or the upsert failed: unblock everything else
+            for thread in threads:
+                thread.join()
+            if checkpoint is not None and not finished:
+                commit_sources(batches_written)  # sources whose batches all made it are resumable
+            if progress.points_written:
+                # Even a failed or cancelled run changed what questions are answered from
+                bump_collection_version(self.collection_name)
+
+        if errors:
+            raise errors[0]
+        stale = [point_id for point_id in existing if point_id not in produced] if self.delete_stale else []
+        if prune is not None:
+            stale += [point_id for point_id in set(prune()) - set(stale) if point_id not in produced]
+        if failed_sources and stale:
+            sources = self._point_sources(stale)
+            stale = [point_id for point_id in stale if sources.get(point_id) not in failed_sources]
+
+        def decided_again(entry):
+            metadata = entry[METADATA_KEY]
+            if page_source(metadata) in failed_sources:
+                return False
+            return page_source(metadata) in input_sources or (
+                self.delete_stale and conditions_match(self._scope_conditions, metadata))
+
+        # kept point ID -> chunks folded into it by earlier runs that this run leaves alone
+        carried = {kept: [entry for entry in entries if not decided_again(entry)] for kept, entries in folded.items()}
+        # Chunks of other pages folded into a point about to be deleted: written
+        # again (or folded into a chunk of this run), so their text stays in the collection
+        orphans = [entry for point_id in stale for entry in carried.pop(point_id, [])]
+        fresh = []
+        for entry in orphans:
+            if entry["id"] in produced:
+                continue
+            if self.dedup is not None:
+                kept = self.dedup.check(entry["id"], entry[CONTENT_KEY])
+                if kept is not None:
+                    also_in.setdefault(kept, []).append(entry)
+                    continue
+            produced.add(entry["id"])
+            fresh.append((entry["id"], Document(page_content=entry[CONTENT_KEY], metadata=entry[METADATA_KEY])))
+        for start in range(0, len(fresh), self.batch_size):
+            batch = fresh[start:start + self.batch_size]
+            self._upsert(batch, *embed_batch(batch))
+            progress.points_written += len(batch)
+        # Rewrite the folds that changed: new ones, and old ones of chunks now decided again
+        self._set_duplicates({
+            point_id: carried.get(point_id, []) + also_in.get(point_id, [])
+            for point_id in set(carried) | set(also_in)
+            if point_id in also_in or len(carried[point_id]) != len(folded[point_id])
+        })
+        if stale:
+            self._delete(stale)
+            progress.points_deleted = len(stale)
+        if progress.points_written or progress.points_deleted:
+            # again: answers cached while the run was writing saw a half-updated collection
+            bump_collection_version(self.collection_name)
+        self._finish_load()
+        if checkpoint is not None:
+            checkpoint.clear()
+        progress.done = True
+        if on_progress:
+            on_progress(progress)
+        return progress
+
+    def _fetch_hashes(self) -> Dict[str, Optional[str]]:
+        """Content hash of every stored point in scope"""
+        return fetch_point_hashes(self.client, self.collection_name, self.scope)
+
+    def _finish_load(self):
+        if self.profile and self.profile.defer_index and self.client.collection_exists(self.collection_name):
+            self.profile.finish_load(self.client, self.collection_name)
+
+    def _ensure_collection(self, vector_size: int):
+        if self._collection_ready:
+            return
+        if not self.client.collection_exists(self.collection_name):
+            if self.profile:
+                self.profile.create_collection(self.client, self.collection_name, vector_size, self.distance)
+            else:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=models.VectorParams(size=vector_size, distance=self.distance),
+                    sparse_vectors_config=sparse_vectors_config(),
+                )
+        self._lexical = collection_has_lexical(self.client, self.collection_name)
+        self._collection_ready = True
+
+    def _fetch_duplicates(self, batch_size: int = 1000) -> Dict[str, List[dict]]:
+        """Point ID -> chunks folded into it, for every point of the collection that has any"""
+        if not self.client.collection_exists(self.collection_name):
+            return {}
+        has_duplicates = models.Filter(must_not=[models.IsEmptyCondition(is_empty=models.PayloadField(key=DUPLICATES_KEY))])
+        duplicates = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(self.collection_name, scroll_filter=has_duplicates, limit=batch_size,
+                                                offset=offset, with_payload=[DUPLICATES_KEY], with_vectors=False)
+            for point in points:
+                duplicates[str(point.id)] = (point.payload or {}).get(DUPLICATES_KEY) or []
+            if offset is None:
+                return duplicates
+
+    def _set_duplicates(self, duplicates: Dict[str, List[dict]], batch_size: int = 256):
+        """Store the chunks folded into each point, and list their metadata in its metadata["also_in"]"""
+        point_ids = list(duplicates)
+        for start in range(0, len(point_ids), batch_size):
+            stored = self.client.retrieve(self.collection_name, ids=point_ids[start:start + batch_size],
+                                          with_payload=[METADATA_KEY], with_vectors=False)
+            operations = []
+            for point in stored:
+                entries = duplicates[str(point.id)]
+                metadata = self._with_also_in((point.payload or {}).get(METADATA_KEY) or {}, entries)
+                operations.append(models.SetPayloadOperation(set_payload=models.SetPayload(
+                    payload={METADATA_KEY: metadata, DUPLICATES_KEY: entries}, points=[point.id])))
+            if operations:
+                self.client.batch_update_points(self.collection_name, update_operations=operations)
+
+    @staticmethod
+    def _with_also_in(metadata: dict, entries: List[dict]) -> dict:
+        """A kept chunk's metadata with the metadata of the chunks folded into it listed in also_in"""
+        metadata = {key: value for key, value in metadata.items() if key != "also_in"}
+        if entries:
+            metadata["also_in"] = [entry[METADATA_KEY] for entry in entries]
+        return metadata
+
+    def _point_sources(self, point_ids: List[str], batch_size: int = 1000) -> Dict[str, Optional[str]]:
+        """page_source() of each of the given points"""
+        sources = {}
+        for start in range(0, len(point_ids), batch_size):
+            for point in self.client.retrieve(self.collection_name, ids=point_ids[start:start + batch_size],
+                                              with_payload=[METADATA_KEY], with_vectors=False):
+                sources[str(point.id)] = page_source((point.payload or {}).get(METADATA_KEY) or {})
+        return sources
+
+    def _reuse_vectors(self, point_ids: List[Optional[str]]) -> List[Optional[List[float]]]:
+        """Stored vectors for the given existing point IDs (None where there is nothing to reuse)"""
+        wanted = list({point_id for point_id in point_ids if point_id})
+        if not wanted:
+            return [None] * len(point_ids)
+        stored = {
+            str(point.id): point.vector
+            for point in self.client.retrieve(self.collection_name, ids=wanted, with_payload=False,
+                                              with_vectors=[DENSE_VECTOR])
+        }
+        return [stored.get(point_id) if point_id else None for point_id in point_ids]
+
+    def _upsert(self, batch: List[Tuple[str, Document]], hashes: List[str], vectors: List[List[float]]):
+        if not batch:
+            return
+        self._ensure_collection(len(vectors[0]))
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=point_id,
+                    vector={DENSE_VECTOR: vector, SPARSE_VECTOR: sparse_vector(doc.page_content)} if self._lexical
+                    else vector,
+                    payload={CONTENT_KEY: doc.page_content, METADATA_KEY: doc.metadata, HASH_KEY: point_hash},
+                )
+                for (point_id, doc), point_hash, vector in zip(batch, hashes, vectors)
+            ],
+        )
+
+    def _delete(self, point_ids: List[str]):
+        delete_points(self.client, self.collection_name, point_ids)
@@ -0,0 +1,222 @@
+# snapshot.py - Columnar snapshot of a collection's chunks and vectors
+#
+# export_collection() scrolls a collection (payloads and vectors) into an Arrow IPC or
+# Parquet file: one row per point with its ID (a UUID, or an integer as its decimal digits),
+# chunk text, metadata (as JSON), content hash and vector (float16 by default, half the size of float32 at no practical loss for
+# cosine search). restore_collection() memory-maps such a file and bulk-uploads it into a
+# new collection, so moving to another Qdrant node or changing collection settings is local
+# I/O with no embedding calls.
+#
+#   python -m rag_common.snapshot export my_documents snapshots/my_documents.arrow
+#   python -m rag_common.snapshot restore snapshots/my_documents.arrow my_documents_v2 --profile low-memory
+
+import argparse
+import json
+import os
+import time
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from qdrant_client import QdrantClient, models
+
+from rag_common.answer_cache import bump_collection_version
+from rag_common.collection_config import collection_dimensions
+from rag_common.collection_profiles import CollectionProfile, get_profile
+from rag_common.hybrid import DENSE_VECTOR, SPARSE_VECTOR, sparse_vector
+from rag_common.incremental import HASH_KEY
+from rag_common.pipeline import CONTENT_KEY, METADATA_KEY
+
+DEFAULT_SNAPSHOT_DIR = os.getenv(
+    "SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "snapshots"),
+)
+VECTOR_TYPES = {"float16": pa.float16(), "float32": pa.float32()}
+
+
+def default_snapshot_path(collection_name: str) -> str:
+    return os.path.join(DEFAULT_SNAPSHOT_DIR, f"{collection_name}.arrow")
+
+
+def snapshot_schema(dimensions: int, dtype: str = "float16", **info) -> pa.Schema:
+    """Row layout of a snapshot; `info` (model, distance, ...) is kept in the schema metadata"""
+    return pa.schema(
+        [
+            pa.field("id", pa.string()),  # see point_id()
+            pa.field("text", pa.large_string()),
+            pa.field("metadata", pa.large_string()),  # JSON, metadata differs between loaders
+            pa.field("content_hash", pa.string()),
+            pa.field("vector", pa.list_(VECTOR_TYPES[dtype], dimensions)),
+        ],
+        metadata={key: str(value) for key, value in dict(info, dimensions=dimensions, dtype=dtype).items()},
+    )
+
+
+def point_id(value: str) -> Union[int, str]:
+    """Qdrant point ID of a snapshot row: integer IDs are stored as digits, UUIDs always contain dashes"""
+    return int(value) if value.isdigit() else value
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def export_collection(client: QdrantClient, collection_name: str, path: Optional[str] = None,
+                      dtype: str = "float16", batch_size: int = 1000) -> int:
+    """
+    Write every point of a collection to `path` (.arrow for memory-mappable Arrow IPC,
+    .parquet for a compressed, portable file). The file is written next to its final name
+    and renamed into place, so a failed export never leaves a truncated snapshot behind.
+    Returns the number of points written.
+    """
+    path = path or default_snapshot_path(collection_name)
+    dimensions = collection_dimensions(client, collection_name)
+    if dimensions is None:
+        raise ValueError(f"Collection {collection_name!r} does not exist")
+    distance = client.get_collection(collection_name).config.params.vectors.distance
+    schema = snapshot_schema(dimensions, dtype, collection=collection_name, distance=distance.value,
+                             created_at=time.time())
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = f"{path}.partial"
+    if _is_parquet(path):
+        writer = pq.ParquetWriter(partial, schema, compression="zstd")
+    else:
+        writer = ipc.new_file(partial, schema)
+    written = 0
+    try:
+        offset = None
+        while True:
+            points, offset = client.scroll(collection_name, limit=batch_size, offset=offset,
+                                           with_payload=True, with_vectors=[DENSE_VECTOR])
+            if points:
+                writer.write(_to_record_batch(points, schema, dimensions))
+                written += len(points)
+            if offset is None:
+                break
+    finally:
+        writer.close()
+    os.replace(partial, path)
+    return written
+
+
+def _to_record_batch(points, schema: pa.Schema, dimensions: int) -> pa.RecordBatch:
+    vector_type = schema.field("vector").type.value_type
+    vectors = np.asarray([point.vector for point in points], dtype=vector_type.to_pandas_dtype())
+    payloads = [point.payload or {} for point in points]
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([str(point.id) for point in points], pa.string()),
+            pa.array([payload.get(CONTENT_KEY, "") for payload in payloads], pa.large_string()),
+            pa.array([json.dumps(payload.get(METADATA_KEY, {}), default=str) for payload in payloads],
+                     pa.large_string()),
+            pa.array([payload.get(HASH_KEY) for payload in payloads], pa.string()),
+            pa.FixedSizeListArray.from_arrays(pa.array(vectors.reshape(-1), vector_type), dimensions),
+        ],
+        schema=schema,
+    )
+
+
+def read_snapshot(path: str, batch_size: int = 4096) -> Iterator[pa.RecordBatch]:
+    """Record batches of a snapshot, memory-mapped (Arrow IPC reads without copying)"""
+    if _is_parquet(path):
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size)
+        return
+    with pa.memory_map(path) as source:
+        reader = ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def snapshot_info(path: str) -> dict:
+    """Schema metadata of a snapshot (collection, distance, dimensions, dtype, ...) and its row count"""
+    if _is_parquet(path):
+        parquet = pq.ParquetFile(path, memory_map=True)
+        schema, rows = parquet.schema_arrow, parquet.metadata.num_rows
+    else:
+        with pa.memory_map(path) as source:
+            reader = ipc.open_file(source)
+            schema = reader.schema
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    info = {key.decode(): value.decode() for key, value in (schema.metadata or {}).items()}
+    info["rows"] = rows
+    return info
+
+
+def restore_collection(path: str, client: QdrantClient, collection_name: str,
+                       profile: Optional[CollectionProfile] = None, batch_size: int = 1024,
+                       parallel: int = 1) -> int:
+    """
+    Create `collection_name` from a snapshot and upload all of its points (IDs, payloads
+    and vectors as exported). The collection must not exist yet. A profile that defers
+    index building gets its graph built after the upload. Returns the number of points.
+
+    Args:
+        path: Snapshot written by export_collection
+        client: Target Qdrant
+        collection_name: Collection to create
+        profile: Collection settings (default: COLLECTION_PROFILE)
+        batch_size: Points per upload request
+        parallel: Upload processes (qdrant-client's upload_collection)
+    """
+    if client.collection_exists(collection_name):
+        raise ValueError(f"Collection {collection_name!r} already exists, restore into a new one")
+    info = snapshot_info(path)
+    profile = profile or get_profile()
+    profile.create_collection(client, collection_name, int(info["dimensions"]),
+                              models.Distance(info.get("distance", models.Distance.COSINE.value)))
+
+    restored = 0
+    for batch in read_snapshot(path, batch_size=batch_size):
+        vector_column = batch.column("vector")
+        vectors = vector_column.flatten().to_numpy(zero_copy_only=False).reshape(len(batch), -1).astype(np.float32)
+        texts, metadatas, hashes = (batch.column(name).to_pylist() for name in ("text", "metadata", "content_hash"))
+        if profile.lexical:
+            # sparse vectors are not part of the snapshot; they are cheap to recompute from the text
+            vectors = [{DENSE_VECTOR: vector.tolist(), SPARSE_VECTOR: sparse_vector(text)}
+                       for vector, text in zip(vectors, texts)]
+        client.upload_collection(
+            collection_name=collection_name,
+            ids=[point_id(value) for value in batch.column("id").to_pylist()],
+            vectors=vectors,
+            payload=[
+                {CONTENT_KEY: text, METADATA_KEY: json.loads(metadata), HASH_KEY: point_hash}
+                for text, metadata, point_hash in zip(texts, metadatas, hashes)
+            ],
+            batch_size=batch_size,
+            parallel=parallel,
+            wait=True,
+        )
+        restored += len(batch)
+    profile.finish_load(client, collection_name)
+    bump_collection_version(collection_name)  # answers cached for an earlier collection of this name
+    return restored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a collection to a snapshot, or rebuild one from it")
+    parser.add_argument("--qdrant-url", default="http://localhost:6333")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write a collection to an .arrow or .parquet snapshot")
+    export.add_argument("collection")
+    export.add_argument("path", nargs="?", default=None, help="Default: .cache/snapshots/<collection>.arrow")
+    export.add_argument("--dtype", choices=list(VECTOR_TYPES), default="float16")
+    restore = commands.add_parser("restore", help="Create a new collection from a snapshot")
+    restore.add_argument("path")
+    restore.add_argument("collection")
+    restore.add_argument("--profile", default=None, help="Collection profile of the new collection")
+    restore.add_argument("--parallel", type=int, default=1, help="Upload processes")
+    args = parser.parse_args()
+
+    qdrant_client = QdrantClient(url=args.qdrant_url, prefer_grpc=True)
+    start = time.perf_counter()
+    if args.command == "export":
+        count = export_collection(qdrant_client, args.collection, args.path, dtype=args.dtype)
+        print(f"Exported {count} points to {args.path or default_snapshot_path(args.collection)}")
+    else:
+        count = restore_collection(args.path, qdrant_client, args.collection, profile=get_profile(args.profile),
+                                   parallel=args.parallel)
+        print(f"Restored {count} points into {args.collection}")
+    print(f"Took {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,129 @@
+# conftest.py - Shared test setup: import path, throwaway caches, an offline tokenizer, and
+# fixtures for PDF files and a local HTTP site
+#
+# tiktoken downloads its encodings on first use, so the chunker, the dedup filter and the
+# context packer would need the network. Tests run them on a byte-level encoding built here
+# instead (one token per UTF-8 byte), which tokenizes every text the same way offline.
+
+import os
+import sys
+import tempfile
+import threading
+
+_CACHE_DIR = tempfile.mkdtemp(prefix="rag-tests-")
+# every cache, checkpoint and index goes to a throwaway directory instead of .cache/
+for _name in ("ANSWER_CACHE_PATH", "EMBEDDING_CACHE_PATH", "PAGE_CACHE_PATH", "FRONTIER_PATH",
+              "BOILERPLATE_PATH", "CRAWL_CACHE_PATH"):
+    os.environ.setdefault(_name, os.path.join(_CACHE_DIR, f"{_name.lower()}.sqlite"))
+for _name in ("CHECKPOINT_DIR", "SNAPSHOT_DIR", "LOCAL_INDEX_DIR"):
+    os.environ.setdefault(_name, os.path.join(_CACHE_DIR, _name.lower()))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+import tiktoken
+
+BYTE_ENCODING = tiktoken.Encoding(
+    name="test_bytes",
+    pat_str=r"""'(?:[sdmt]|ll|ve|re)| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={},
+)
+
+
+@pytest.fixture(autouse=True)
+def offline_encoding(monkeypatch):
+    """Every tiktoken lookup returns BYTE_ENCODING, so no test downloads an encoding"""
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: BYTE_ENCODING)
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: BYTE_ENCODING)
+    return BYTE_ENCODING
+
+
+def pdf_bytes(pages) -> bytes:
+    """A PDF with one page per string of `pages`, each line set in Helvetica"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in text.split("\n")]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode("latin-1")))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def write_pdf():
+    """write_pdf(path, *pages) writes a PDF with those page texts and returns its path"""
+    def write(path, *pages):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(pdf_bytes(pages))
+        return str(path)
+    return write
+
+
+class _Site:
+    """What the local HTTP server serves: path -> (body, headers), and every request it got"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.pages = {}
+        self.requests = []  # (path, request headers)
+
+    def add(self, path: str, body, content_type: str = "text/html; charset=utf-8", **headers):
+        self.pages[path] = (body.encode("utf-8") if isinstance(body, str) else body,
+                            dict(headers, **{"Content-Type": content_type}))
+        return self.url + path
+
+    def hits(self, path: str) -> int:
+        return sum(1 for requested, _ in self.requests if requested == path)
+
+
+@pytest.fixture
+def http_site():
+    """A local HTTP server on a free port; fill it through site.add(path, body, **headers)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    site = None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            site.requests.append((self.path, dict(self.headers)))
+            if self.path not in site.pages:
+                self.send_error(404)
+                return
+            body, headers = site.pages[self.path]
+            etag = headers.get("ETag")
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    site = _Site(f"http://127.0.0.1:{server.server_address[1]}")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield site
+    server.shutdown()
+    server.server_close()
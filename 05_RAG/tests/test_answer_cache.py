@@ -0,0 +1,77 @@
+# test_answer_cache.py - Cached answers and their invalidation by collection versions
+#
+# Answers only count for the collection version they were given from: bumping the version
+# (which every ingestion that writes or deletes points does) must hide them from both tiers,
+# and an answer computed across a bump must not be filed under the new version.
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+
+from rag_common.answer_cache import AnswerCache, get_answer_cache, normalize_query
+from rag_common.pipeline import IngestionPipeline
+
+
+@pytest.fixture
+def cache():
+    return AnswerCache(":memory:", threshold=0.9)
+
+
+def test_exact_tier_folds_case_and_punctuation(cache):
+    cache.put("docs", "gpt", "How do I install Node?", "Use nvm.")
+    assert normalize_query("  How do I  install Node?? ") == "how do i install node"
+    assert cache.get_exact("docs", "gpt", "how do i install node").answer == "Use nvm."
+    assert cache.get_exact("docs", "other-llm", "How do I install Node?") is None
+    assert cache.get_exact("blog", "gpt", "How do I install Node?") is None
+
+
+def test_semantic_tier_needs_the_threshold(cache):
+    cache.put("docs", "gpt", "install node", "Use nvm.", query_vector=[1.0, 0.0])
+    hit = cache.get_similar("docs", "gpt", [0.95, 0.1])
+    assert hit is not None and not hit.exact and hit.similarity >= 0.9
+    assert cache.get_similar("docs", "gpt", [0.5, 0.5]) is None
+    assert (cache.semantic_hits, cache.misses) == (1, 1)
+
+
+def test_bumping_the_version_invalidates_both_tiers(cache):
+    cache.put("docs", "gpt", "install node", "Use nvm.", query_vector=[1.0, 0.0])
+    cache.put("blog", "gpt", "install node", "Old post.", query_vector=[1.0, 0.0])
+    assert cache.get_similar("docs", "gpt", [1.0, 0.0]) is not None  # loads the docs matrix
+
+    cache.bump_version("docs")
+    assert cache.collection_version("docs") == 1
+    assert cache.get_exact("docs", "gpt", "install node") is None
+    assert cache.get_similar("docs", "gpt", [1.0, 0.0]) is None
+    assert cache.get_exact("blog", "gpt", "install node").answer == "Old post."
+
+    cache.put("docs", "gpt", "install node", "Use fnm now.", query_vector=[1.0, 0.0])
+    assert cache.get_similar("docs", "gpt", [1.0, 0.0]).answer == "Use fnm now."
+
+
+def test_answer_from_before_a_bump_is_not_stored(cache):
+    version = cache.collection_version("docs")  # read before searching
+    cache.bump_version("docs")  # ingestion finished while the answer was being generated
+    cache.put("docs", "gpt", "install node", "Use nvm.", version=version)
+    assert cache.get_exact("docs", "gpt", "install node") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_ingestion_bumps_the_version_only_when_it_changes_points():
+    shared = get_answer_cache()
+    client = QdrantClient(":memory:")
+    pipeline = IngestionPipeline(client, "answers_test", DeterministicFakeEmbedding(size=8), text_splitter=None)
+    pages = [Document(page_content="Use nvm.", metadata={"source": "a.pdf"})]
+    before = shared.collection_version("answers_test")
+    pipeline.run(pages)
+    after_write = shared.collection_version("answers_test")
+    assert after_write > before
+
+    shared.put("answers_test", "gpt", "install node", "Use nvm.")
+    pipeline.run(pages)  # nothing changed
+    assert shared.collection_version("answers_test") == after_write
+    assert shared.get_exact("answers_test", "gpt", "install node") is not None
+
+    pipeline.run([])  # deletes the page's point
+    assert shared.get_exact("answers_test", "gpt", "install node") is None
+    client.close()
@@ -0,0 +1,55 @@
+# test_boilerplate.py - Removing blocks repeated across a site's pages
+#
+# A site of twelve pages shares a sidebar; a lesson list appears on the later half only.
+# Whatever order the crawl returns the pages in, the same blocks must be removed.
+
+import random
+
+from langchain_core.documents import Document
+
+from rag_common.boilerplate import BoilerplateStripper
+
+SIDEBAR = "Home\nLessons\nAbout"
+LESSONS = "Lesson 1: Setup\nLesson 2: Deploy"
+
+
+def site():
+    pages = []
+    for n in range(12):
+        text = f"{SIDEBAR}\nPage {n} explains topic {n} in detail."
+        if n >= 5:
+            text += "\n" + LESSONS  # on 7 of 12 pages: above ratio 0.5
+        pages.append(Document(page_content=text, metadata={"link": f"https://x.dev/{n}"}))
+    return pages
+
+
+def stripped(pages, path=None):
+    stripper = BoilerplateStripper(ratio=0.5, min_pages=10, path=path)
+    return {page.metadata["link"]: page.page_content for page in stripper.strip_all(pages)}
+
+
+def test_result_does_not_depend_on_crawl_order():
+    expected = {f"https://x.dev/{n}": f"Page {n} explains topic {n} in detail." for n in range(12)}
+    assert stripped(site()) == expected
+    for seed in range(3):
+        pages = site()
+        random.Random(seed).shuffle(pages)
+        assert stripped(pages) == expected
+
+
+def test_small_sites_are_left_alone():
+    pages = site()[:9]
+    assert stripped(pages) == {page.metadata["link"]: page.page_content for page in pages}
+
+
+def test_incremental_run_is_judged_against_the_whole_site(tmp_path):
+    path = str(tmp_path / "boilerplate.sqlite")
+    stripped(site(), path)
+    changed = Document(page_content=f"{SIDEBAR}\nPage 3, rewritten.", metadata={"link": "https://x.dev/3"})
+    assert stripped([changed], path) == {"https://x.dev/3": "Page 3, rewritten."}
+
+    # most pages are gone: the lesson list is no longer on more than half of them
+    stripper = BoilerplateStripper(ratio=0.5, min_pages=1, path=path)
+    stripper.forget([f"https://x.dev/{n}" for n in range(5, 11)])
+    page = stripper.strip_all([site()[11]])[0]
+    assert LESSONS in page.page_content and SIDEBAR not in page.page_content
@@ -0,0 +1,78 @@
+# test_bulk_ingest.py - The bulk PDF CLI's ingestor run over directories one after another
+#
+# Each run covers one directory tree of the same collection. A later run over another
+# directory must leave what earlier runs stored alone, near-duplicate folds included, and
+# pruning a changed file must not take the chunks folded into its points with it.
+
+import os
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+
+from rag_common.bulk_ingest import BulkIngestor
+from rag_common.dedup import NearDuplicateFilter
+from rag_common.pipeline import DUPLICATES_KEY, IngestionPipeline
+
+SHARED = "Install the dependencies with npm ci before running the build.\nIt uses the exact versions from the lock file."
+COLLECTION = "bulk_test"
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+def ingest(client, *paths):
+    pipeline = IngestionPipeline(client, COLLECTION, DeterministicFakeEmbedding(size=16), text_splitter=None,
+                                 delete_stale=False, dedup=NearDuplicateFilter(0.9))
+    report = BulkIngestor(pipeline, workers=1, page_cache_path=None).run(list(paths))
+    assert not report.failed
+    return report
+
+
+def stored(client):
+    points, _ = client.scroll(COLLECTION, limit=100, with_payload=True)
+    return {os.path.basename(point.payload["metadata"]["source"]): point.payload for point in points}
+
+
+def folded_sources(payload):
+    return [os.path.basename(entry["metadata"]["source"]) for entry in payload.get(DUPLICATES_KEY) or []]
+
+
+def test_second_directory_keeps_folds_of_the_first(client, tmp_path, write_pdf):
+    write_pdf(tmp_path / "one" / "a.pdf", SHARED)
+    write_pdf(tmp_path / "one" / "b.pdf", SHARED)
+    write_pdf(tmp_path / "two" / "c.pdf", "Run PostgreSQL in Docker with a named volume.")
+
+    ingest(client, tmp_path / "one")
+    # files arrive in completion order, so either one may be the kept copy
+    [(kept, payload)] = stored(client).items()
+    folded = folded_sources(payload)
+    assert sorted([kept] + folded) == ["a.pdf", "b.pdf"]
+
+    report = ingest(client, tmp_path / "two")
+    assert report.points_pruned == 0
+    points = stored(client)
+    assert set(points) == {kept, "c.pdf"}
+    assert folded_sources(points[kept]) == folded
+    assert [os.path.basename(dup["source"]) for dup in points[kept]["metadata"]["also_in"]] == folded
+
+
+def test_pruned_point_gives_back_chunks_folded_from_another_directory(client, tmp_path, write_pdf):
+    paths = {"a.pdf": write_pdf(tmp_path / "one" / "a.pdf", SHARED), "b.pdf": write_pdf(tmp_path / "two" / "b.pdf", SHARED)}
+    ingest(client, tmp_path / "one", tmp_path / "two")
+    # files arrive in completion order, so either one may be the kept copy
+    [kept] = stored(client)
+    [folded] = set(paths) - {kept}
+
+    # the kept file changes and only its directory is ingested again: its old point is pruned
+    write_pdf(paths[kept], "Run PostgreSQL in Docker with a named volume.")
+    report = ingest(client, os.path.dirname(paths[kept]))
+    assert report.points_pruned == 1
+    points = stored(client)
+    assert set(points) == {"a.pdf", "b.pdf"}
+    assert "PostgreSQL" in points[kept]["page_content"]
+    assert "npm ci" in points[folded]["page_content"]
@@ -0,0 +1,83 @@
+# test_checkpoint.py - Resuming a failed ingestion run from its checkpoint
+#
+# The embedding model fails partway through a run over Qdrant local mode; the second
+# attempt with the same checkpoint must skip the finished sources, write nothing twice and
+# end with the same collection a clean run produces.
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.incremental import chunk_point_id, fetch_point_hashes
+from rag_common.pipeline import IngestionPipeline
+
+COLLECTION = "checkpoint_test"
+
+
+class FlakyEmbedding(DeterministicFakeEmbedding):
+    fail_on: str = ""  # texts containing this fail to embed
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("embedding API is down")
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def pages():
+    return [Document(page_content=f"chunk {n} of {source}", metadata={"source": source, "page": n})
+            for source in ["a.pdf", "b.pdf", "c.pdf"] for n in range(2)]
+
+
+def run(client, embedding, checkpoint):
+    pipeline = IngestionPipeline(client, COLLECTION, embedding, text_splitter=None, batch_size=2)
+    return pipeline.run(pages(), checkpoint=checkpoint)
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+def test_failed_run_resumes_after_finished_sources(client, tmp_path):
+    checkpoint = IngestCheckpoint(str(tmp_path / "job.sqlite"), run_key="v1")
+    embedding = FlakyEmbedding(size=8, fail_on="c.pdf", embedded=[])
+    with pytest.raises(RuntimeError):
+        run(client, embedding, checkpoint)
+    assert checkpoint.done_sources() == {"a.pdf", "b.pdf"}
+    assert len(checkpoint.upserted_points()) == 4
+
+    # a restarted process opens the same file
+    checkpoint = IngestCheckpoint(str(tmp_path / "job.sqlite"), run_key="v1")
+    embedding = FlakyEmbedding(size=8, embedded=[])
+    progress = run(client, embedding, checkpoint)
+    assert progress.pages_resumed == 4
+    assert embedding.embedded == ["chunk 0 of c.pdf", "chunk 1 of c.pdf"]
+    assert (progress.points_written, progress.points_deleted) == (2, 0)
+    assert set(fetch_point_hashes(client, COLLECTION)) == {chunk_point_id(page) for page in pages()}
+    assert checkpoint.done_sources() == set()  # cleared once the run completed
+
+
+def test_checkpoint_of_another_configuration_is_discarded(tmp_path):
+    path = str(tmp_path / "job.sqlite")
+    checkpoint = IngestCheckpoint(path, run_key="chunk=250")
+    checkpoint.commit_batch(["p1"])
+    checkpoint.commit_source("a.pdf", ["p1"], [("p0", {"id": "p2", "page_content": "x", "metadata": {}})])
+    reopened = IngestCheckpoint(path, run_key="chunk=250")
+    assert (reopened.done_sources(), reopened.done_points()) == ({"a.pdf"}, {"p1"})
+    assert reopened.folds() == [("p0", {"id": "p2", "page_content": "x", "metadata": {}})]
+
+    other = IngestCheckpoint(path, run_key="chunk=500")
+    assert (other.done_sources(), other.upserted_points(), other.folds()) == (set(), set(), [])
+
+
+def test_job_names_become_safe_file_names(tmp_path):
+    checkpoint = IngestCheckpoint.for_job("docs/site v2", directory=str(tmp_path), source_key="link")
+    assert checkpoint.path == str(tmp_path / "docs_site_v2.sqlite")
+    assert checkpoint.source_of({"link": "https://x.dev/a"}) == "https://x.dev/a"
+    assert checkpoint.source_of({"source": "a.pdf"}) is None
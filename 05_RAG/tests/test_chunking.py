@@ -0,0 +1,86 @@
+# test_chunking.py - TokenTextChunker's vectorized boundary scoring and chunk limits
+#
+# The numpy scoring of cut points is checked against a plain per-boundary loop, and the
+# batched create_documents() path against split_text() one text at a time.
+
+import random
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from rag_common.chunking import TokenTextChunker
+
+WORDS = ["npm", "ci", "install", "der", "Übergang", "数据", "lock-file.", "build", "x", "émigré"]
+
+
+def random_text(rng, words=200):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice([" ", " ", " ", ". ", "\n", "\n\n"]))
+    return "".join(parts)
+
+
+def reference_scores(chunker, data: bytes, bounds):
+    """The same scores as _boundary_scores, one boundary at a time"""
+    scores = []
+    for at in bounds:
+        score = 0
+        for rank, sep in enumerate(chunker.separators):
+            if any(at - shift >= 0 and data[at - shift:at - shift + len(sep)] == sep
+                   for shift in range(len(sep.rstrip()), len(sep) + 1)):
+                score = len(chunker.separators) - rank
+                break
+        if at < len(data) and data[at] & 0xC0 == 0x80:
+            score = -1
+        scores.append(score)
+    return scores
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_scores_match_the_reference(seed):
+    chunker = TokenTextChunker(chunk_size=40, chunk_overlap=10)
+    text = random_text(random.Random(seed))
+    data = text.encode("utf-8")
+    tokens = chunker.encoding.encode_ordinary(text)
+    bounds = np.concatenate([[0], np.cumsum(chunker.token_lengths[np.asarray(tokens)])])
+    assert chunker._boundary_scores(data, bounds).tolist() == reference_scores(chunker, data, bounds)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chunks_fit_the_budget_and_cover_the_text(seed):
+    chunker = TokenTextChunker(chunk_size=40, chunk_overlap=10)
+    text = random_text(random.Random(seed))
+    chunks = chunker.split_text(text)
+    assert all(chunker.count_tokens(chunk) <= 40 for chunk in chunks)
+    # every word of the text is in some chunk, in order, and chunks never split a character
+    position = 0
+    for chunk in chunks:
+        assert "�" not in chunk
+        found = text.find(chunk[:10], max(0, position - 80))
+        assert found >= 0
+        position = found + len(chunk)
+    assert text.rstrip().endswith(chunks[-1][-10:])
+
+
+def test_cuts_prefer_paragraphs_then_sentences():
+    chunker = TokenTextChunker(chunk_size=30, chunk_overlap=5)
+    text = "First paragraph here.\n\nSecond one, which is longer. It has two sentences."
+    chunks = chunker.split_text(text)
+    assert chunks[0] == "First paragraph here."
+    assert chunks[1].startswith("Second one")
+
+
+def test_batched_documents_match_single_texts():
+    chunker = TokenTextChunker(chunk_size=40, chunk_overlap=10)
+    rng = random.Random(7)
+    docs = [Document(page_content=random_text(rng, 60), metadata={"page": i}) for i in range(4)]
+    chunks = chunker.split_documents(docs)
+    expected = [(chunk, doc.metadata) for doc in docs for chunk in chunker.split_text(doc.page_content)]
+    assert [(chunk.page_content, chunk.metadata) for chunk in chunks] == expected
+
+
+def test_overlap_must_be_smaller_than_the_chunk():
+    with pytest.raises(ValueError):
+        TokenTextChunker(chunk_size=50, chunk_overlap=50)
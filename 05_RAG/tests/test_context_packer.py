@@ -0,0 +1,72 @@
+# test_context_packer.py - Merging overlapping chunks and packing them into a token budget
+#
+# Tokens are counted with the tests' byte-level encoding (one token per UTF-8 byte), so
+# budgets below are plain character counts.
+
+from langchain_core.documents import Document
+
+from rag_common.context_packer import SPAN_SEPARATOR, ContextPacker, _overlap, merge_spans
+
+PAGE = ("Install the dependencies with npm ci before running the build. It uses the exact versions "
+        "from the lock file and fails when package.json and the lock file disagree.")
+
+
+def render(text, metadata):
+    return f"[{metadata['source']} p{metadata.get('page')}]\n{text}"
+
+
+def chunk(start, stop, source="guide.pdf", page=1, **metadata):
+    return Document(page_content=PAGE[start:stop], metadata={"source": source, "page": page, **metadata})
+
+
+def test_overlap_needs_a_real_suffix_prefix_match():
+    assert _overlap(PAGE[:80], PAGE[50:]) == 30
+    assert _overlap(PAGE[:80], PAGE[70:]) == 0  # 10 shared characters are below MIN_OVERLAP
+    assert _overlap(PAGE[50:], PAGE[:80]) == 0
+
+
+def test_merge_spans_keeps_the_shared_text_once():
+    assert merge_spans(PAGE[:80], PAGE[50:]) == PAGE
+    assert merge_spans(PAGE[50:], PAGE[:80]) == PAGE  # either order
+    assert merge_spans(PAGE, PAGE[20:60]) == PAGE  # containment
+    assert merge_spans(PAGE[:40], PAGE[100:]) is None
+
+
+def test_neighbouring_chunks_of_a_page_become_one_span():
+    packer = ContextPacker(render, budget=10_000)
+    docs = [chunk(50, len(PAGE)), chunk(0, 80), chunk(0, 80, page=2)]
+    packed = packer.pack(docs)
+    assert packed.chunks_packed == 3
+    assert packed.spans == [PAGE, PAGE[:80]]
+    assert packed.text == render(PAGE, docs[0].metadata) + "\n\n" + render(PAGE[:80], docs[2].metadata)
+    assert packed.saved > 0
+
+
+def test_a_chunk_bridging_two_spans_merges_all_three():
+    packer = ContextPacker(render, budget=10_000)
+    packed = packer.pack([chunk(0, 60), chunk(100, len(PAGE)), chunk(40, 120)])
+    assert packed.spans == [PAGE]
+
+
+def test_spans_that_do_not_fit_are_dropped_by_value():
+    packer = ContextPacker(render, budget=170)
+    docs = [chunk(0, 60, page=1), chunk(0, 60, page=2), chunk(60, 160, page=3)]
+    packed = packer.pack(docs, scores=[1.0, 0.9, 0.95])
+    assert packed.tokens <= 170
+    # two short pages are worth more per token than the long one
+    assert packed.spans == [PAGE[:60], PAGE[:60]]
+    assert (packed.chunks, packed.chunks_packed) == (3, 2)
+
+
+def test_spans_of_one_page_share_its_header():
+    packer = ContextPacker(render, budget=10_000)
+    packed = packer.pack([chunk(0, 40), chunk(100, len(PAGE))])
+    assert packed.text == render(PAGE[:40] + SPAN_SEPARATOR + PAGE[100:], {"source": "guide.pdf", "page": 1})
+
+
+def test_a_single_oversized_span_is_cut_to_the_budget():
+    packer = ContextPacker(render, budget=50)
+    packed = packer.pack([chunk(0, len(PAGE))])
+    assert packed.chunks_packed == 1
+    assert packed.tokens <= 50
+    assert PAGE.startswith(packed.spans[0])
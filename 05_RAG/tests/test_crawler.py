@@ -0,0 +1,64 @@
+# test_crawler.py - Conditional requests through the crawl cache, against a local server
+#
+# The site answers 304 when If-None-Match matches the page's ETag. A 304 only means
+# "unchanged" when the cache still holds the entry it was validated against.
+
+import asyncio
+
+from langchain_core.documents import Document
+
+from rag_common.crawl_cache import CrawlCache
+from rag_common.crawler import AsyncCrawler
+
+
+def parse(url, content):
+    return Document(page_content=content.decode(), metadata={"source": url})
+
+
+def crawl(cache, urls):
+    return asyncio.run(AsyncCrawler(rate_per_host=1000, burst=1000, cache=cache).crawl(urls, parse))
+
+
+class ForgetfulCache(CrawlCache):
+    """Loses every entry right after building a request's headers, as a concurrent reset would"""
+
+    def conditional_headers(self, url):
+        headers = super().conditional_headers(url)
+        self.reset()
+        return headers
+
+
+def test_unchanged_page_is_skipped(http_site, tmp_path):
+    http_site.add("/guide", "<p>Install with npm ci.</p>", ETag='"v1"')
+    url = http_site.url + "/guide"
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite"))
+    assert [doc.page_content for doc in crawl(cache, [url])] == ["<p>Install with npm ci.</p>"]
+    cache.commit()
+
+    assert crawl(cache, [url]) == []
+    assert cache.unchanged == {url}
+    assert http_site.requests[-1][1].get("If-None-Match") == '"v1"'
+
+
+def test_not_modified_without_an_entry_is_refetched(http_site, tmp_path):
+    http_site.add("/guide", "<p>Install with npm ci.</p>", ETag='"v1"')
+    url = http_site.url + "/guide"
+    cache = ForgetfulCache(str(tmp_path / "crawl.sqlite"))
+    crawl(cache, [url])
+    cache.commit()
+
+    # the 304 answers headers whose entry is gone: the page must be fetched in full
+    docs = crawl(cache, [url])
+    assert [doc.page_content for doc in docs] == ["<p>Install with npm ci.</p>"]
+    assert cache.unchanged == set()
+    assert "If-None-Match" not in http_site.requests[-1][1]
+    assert http_site.hits("/guide") == 3
+    cache.commit()
+    assert cache.get(url).content_hash == cache.hash_content(b"<p>Install with npm ci.</p>")
+
+
+def test_check_treats_not_modified_without_an_entry_as_a_miss(tmp_path):
+    cache = CrawlCache(str(tmp_path / "crawl.sqlite"))
+    assert not cache.check("http://example.com/a", 304, {}, b"")
+    cache.commit()
+    assert cache.get("http://example.com/a") is None
@@ -0,0 +1,87 @@
+# test_embedding_cache.py - The persistent embedding cache and CachedEmbeddings
+#
+# A fake model records what reaches it: cached texts, repeated texts and reduced-dimension
+# lookups of texts cached at full size must never be sent twice.
+
+import math
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag_common.embedding_cache import CachedEmbeddings, EmbeddingCache, truncate_embedding
+
+
+class RecordingEmbeddings(Embeddings):
+    def __init__(self, size=4):
+        self.size = size
+        self.sent = []
+
+    def _vector(self, text):
+        return [float(len(text) + i) for i in range(self.size)]
+
+    def embed_documents(self, texts):
+        self.sent.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.sent.append([text])
+        return self._vector(text)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+
+def test_only_misses_reach_the_model_once_each(cache):
+    model = RecordingEmbeddings()
+    embeddings = CachedEmbeddings(model, cache, model="fake")
+    first = embeddings.embed_documents(["a", "bb", "a"])
+    assert model.sent == [["a", "bb"]]
+    assert first == [model._vector("a"), model._vector("bb"), model._vector("a")]
+
+    second = embeddings.embed_documents(["bb", "ccc", "a"])
+    assert model.sent[1:] == [["ccc"]]
+    assert second == [model._vector("bb"), model._vector("ccc"), model._vector("a")]
+    assert embeddings.embed_query("ccc") == model._vector("ccc")
+    assert len(model.sent) == 2
+    assert (cache.hits, cache.misses) == (3, 4)
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    CachedEmbeddings(RecordingEmbeddings(), EmbeddingCache(path), model="fake").embed_documents(["a"])
+    model = RecordingEmbeddings()
+    assert CachedEmbeddings(model, EmbeddingCache(path), model="fake").embed_query("a") == model._vector("a")
+    assert model.sent == []
+
+
+def test_model_and_dimensions_are_part_of_the_key(cache):
+    cache.put_many("fake", None, ["a"], [[1.0, 2.0]])
+    assert cache.get_many("fake", None, ["a"]) == [[1.0, 2.0]]
+    assert cache.get_many("other", None, ["a"]) == [None]
+    assert cache.get_many("fake", 1, ["a"]) == [None]
+
+
+def test_reduced_dimensions_are_served_from_full_size_vectors(cache):
+    full = RecordingEmbeddings(size=4)
+    CachedEmbeddings(full, cache, model="text-embedding-3-small").embed_documents(["hello"])
+    reduced_model = RecordingEmbeddings(size=2)
+    reduced = CachedEmbeddings(reduced_model, cache, model="text-embedding-3-small", dimensions=2)
+    vector = reduced.embed_query("hello")
+    assert reduced_model.sent == []
+    assert vector == pytest.approx(truncate_embedding(full._vector("hello"), 2))
+    assert math.hypot(*vector) == pytest.approx(1.0)
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path):
+    vector_bytes = 4 * 4
+    # room for just under four vectors; eviction goes down to 90% of that, i.e. three
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_bytes=4 * vector_bytes - 1)
+    for text in ["a", "b", "c"]:
+        cache.put_many("fake", None, [text], [[1.0] * 4])
+    cache.get_many("fake", None, ["a"])  # "b" is now the least recently used
+    cache.put_many("fake", None, ["d"], [[1.0] * 4])
+    found = cache.get_many("fake", None, ["a", "b", "c", "d"])
+    assert [vector is not None for vector in found] == [True, False, True, True]
+    assert cache.stats()["bytes"] <= 3 * vector_bytes
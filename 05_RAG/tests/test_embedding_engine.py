@@ -0,0 +1,88 @@
+# test_embedding_engine.py - Token-packed, concurrent, retried embedding requests
+#
+# A fake AsyncOpenAI client stands in for the API: it answers each request with its items
+# in reverse order, can fail the first requests with 429s, and records what it was sent.
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from rag_common.embedding_engine import AsyncEmbeddingEngine, BatchedEmbeddings
+
+retry_delay = AsyncEmbeddingEngine._retry_delay  # before no_backoff replaces it
+
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.test/embeddings"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class FakeClient:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    async def create(self, model, input, encoding_format, **kwargs):
+        self.requests.append(list(input))
+        if self.failures:
+            self.failures -= 1
+            raise rate_limit_error()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), float(i)]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=data[::-1])
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(AsyncEmbeddingEngine, "_retry_delay", staticmethod(lambda error, attempt: 0))
+
+
+def test_requests_are_packed_by_tokens_and_inputs():
+    engine = AsyncEmbeddingEngine(max_tokens_per_request=10, max_inputs_per_request=3)
+    batches, inputs = engine.pack(["aaaa", "bbbb", "cc", "d", "e", "f", "g"])
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]  # 4+4+2 tokens, then 3 inputs, then the rest
+    assert inputs == ["aaaa", "bbbb", "cc", "d", "e", "f", "g"]
+    assert engine.pack(["aaaaaa", "bbbbbb"])[0] == [[0], [1]]  # 12 tokens would not fit one request
+
+
+def test_inputs_over_the_context_length_are_truncated():
+    engine = AsyncEmbeddingEngine()
+    _, inputs = engine.pack(["x" * 9000])
+    assert len(inputs[0]) == 8191  # one token per byte in the tests' encoding
+
+
+def test_output_order_matches_input_order_across_concurrent_requests():
+    client = FakeClient()
+    engine = AsyncEmbeddingEngine(max_inputs_per_request=2, max_concurrency=3, client=client)
+    texts = ["a" * n for n in range(1, 12)]
+    vectors = engine.embed(texts)
+    assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+    assert len(client.requests) == 6
+    assert 1 < client.max_in_flight <= 3
+
+
+def test_rate_limited_requests_are_retried():
+    client = FakeClient(failures=2)
+    engine = AsyncEmbeddingEngine(client=client, max_retries=2)
+    assert BatchedEmbeddings(engine).embed_query("abc") == [3.0, 0.0]
+    assert (engine.requests_sent, engine.retries) == (3, 2)
+
+
+def test_retries_give_up_after_max_retries():
+    engine = AsyncEmbeddingEngine(client=FakeClient(failures=5), max_retries=1)
+    with pytest.raises(openai.RateLimitError):
+        engine.embed(["abc"])
+
+
+def test_backoff_honours_retry_after():
+    assert retry_delay(rate_limit_error("7"), 0) == 7.0
+    assert 0 <= retry_delay(rate_limit_error(), 3) <= 4.0
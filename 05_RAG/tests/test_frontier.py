@@ -0,0 +1,106 @@
+# test_frontier.py - Sitemap discovery into the persistent frontier, against a local server
+#
+# The site has a sitemap index with one child sitemap per section. Runs are simulated by
+# discovering, taking frontier.due() and marking it indexed, with <lastmod> values and
+# sitemap entries changed in between.
+
+import asyncio
+import gzip
+
+import pytest
+
+from rag_common.crawler import AsyncCrawler
+from rag_common.frontier import Frontier, discover, iter_sitemap, normalize_lastmod
+
+
+def sitemap_index(site, children):
+    entries = "".join(f"<sitemap><loc>{site.url}{path}</loc><lastmod>{lastmod}</lastmod></sitemap>"
+                      for path, lastmod in children.items())
+    return site.add("/sitemap-index.xml", '<?xml version="1.0" encoding="UTF-8"?>'
+                    f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>',
+                    content_type="application/xml")
+
+
+def sitemap(site, path, pages):
+    entries = "".join(f"<url><loc>{site.url}{page}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "")
+                      + "</url>" for page, lastmod in pages.items())
+    site.add(path, '<?xml version="1.0" encoding="UTF-8"?>'
+             f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>',
+             content_type="application/xml")
+
+
+def run(frontier, site, scope="/docs/"):
+    found = asyncio.run(discover(frontier, site.url + scope, sitemap_url=site.url + "/sitemap-index.xml",
+                                 crawler=AsyncCrawler(rate_per_host=1000, burst=1000)))
+    due, removed = frontier.due(), frontier.removed()
+    frontier.mark_indexed(due, removed)
+    return found, [url[len(site.url):] for url in due], [url[len(site.url):] for url in removed]
+
+
+@pytest.fixture
+def frontier():
+    return Frontier(":memory:")
+
+
+def test_only_updated_pages_are_due_again(frontier, http_site):
+    sitemap_index(http_site, {"/sitemap-docs.xml": "2024-01-01", "/sitemap-blog.xml": "2024-01-01"})
+    sitemap(http_site, "/sitemap-docs.xml", {"/docs/a": "2024-01-01", "/docs/b": "2024-01-01T10:00:00+02:00"})
+    sitemap(http_site, "/sitemap-blog.xml", {"/blog/x": "2024-01-01"})
+
+    found, due, removed = run(frontier, http_site)
+    assert found == 2  # /blog/ is out of scope
+    assert due == ["/docs/a", "/docs/b"] and removed == []
+
+    # nothing changed: nothing is due and unchanged child sitemaps are not downloaded again
+    assert run(frontier, http_site) == (0, [], [])
+    assert http_site.hits("/sitemap-docs.xml") == 1
+
+    sitemap_index(http_site, {"/sitemap-docs.xml": "2024-02-01", "/sitemap-blog.xml": "2024-01-01"})
+    sitemap(http_site, "/sitemap-docs.xml", {"/docs/a": "2024-01-01", "/docs/b": "2024-02-01"})
+    _, due, removed = run(frontier, http_site)
+    assert due == ["/docs/b"] and removed == []
+    assert http_site.hits("/sitemap-docs.xml") == 2
+    assert http_site.hits("/sitemap-blog.xml") == 1
+
+
+def test_pages_dropped_from_the_sitemap_are_removed_once(frontier, http_site):
+    sitemap_index(http_site, {"/sitemap-docs.xml": "2024-01-01"})
+    sitemap(http_site, "/sitemap-docs.xml", {"/docs/a": "2024-01-01", "/docs/b": "2024-01-01"})
+    run(frontier, http_site)
+
+    sitemap_index(http_site, {"/sitemap-docs.xml": "2024-03-01"})
+    sitemap(http_site, "/sitemap-docs.xml", {"/docs/a": "2024-01-01"})
+    _, due, removed = run(frontier, http_site)
+    assert due == [] and removed == ["/docs/b"]
+    # mark_indexed() forgot it, so the next run does not report it again
+    assert frontier.removed() == []
+
+    # listed again later: a new page
+    sitemap_index(http_site, {"/sitemap-docs.xml": "2024-04-01"})
+    sitemap(http_site, "/sitemap-docs.xml", {"/docs/a": "2024-01-01", "/docs/b": "2024-01-01"})
+    assert run(frontier, http_site)[1] == ["/docs/b"]
+
+
+def test_pages_without_lastmod_are_rechecked_after_a_while(frontier, http_site):
+    sitemap_index(http_site, {"/sitemap-docs.xml": "2024-01-01"})
+    sitemap(http_site, "/sitemap-docs.xml", {"/docs/a": None})
+    run(frontier, http_site)
+    assert frontier.due(recheck_after=3600) == []
+    assert frontier.due(recheck_after=0) == [http_site.url + "/docs/a"]
+
+
+def test_links_are_followed_when_the_sitemap_is_missing(frontier, http_site):
+    http_site.add("/docs/", '<a href="/docs/a">A</a> <a href="/blog/x">out of scope</a>')
+    http_site.add("/docs/a", '<a href="b#section">B</a>')
+    http_site.add("/docs/b", '<a href="/docs/">back</a>')
+    found, due, _ = run(frontier, http_site)
+    assert found == 3
+    assert due == ["/docs/", "/docs/a", "/docs/b"]
+
+
+def test_iter_sitemap_reads_gzip_and_normalizes_lastmod():
+    content = gzip.compress(b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                            b"<url><loc> https://x.dev/a </loc><lastmod>2024-01-01T02:00:00+02:00</lastmod></url>"
+                            b"<url><loc>https://x.dev/b</loc><lastmod>not a date</lastmod></url></urlset>")
+    assert list(iter_sitemap(content)) == [("url", "https://x.dev/a", normalize_lastmod("2024-01-01T00:00:00Z")),
+                                           ("url", "https://x.dev/b", None)]
@@ -0,0 +1,84 @@
+# test_html_extract.py - The streaming extractor against the BeautifulSoup reference
+#
+# Both backends must produce the same text and blocks, on well-formed pages and on the
+# broken markup real sites serve: unclosed skipped elements, stray end tags, void tags.
+# Random tag soups cover what the sample pages miss.
+
+import random
+
+import pytest
+
+from rag_common.html_extract import SoupExtractor, StreamingExtractor
+
+DOCS_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Assert | Chai</title>
+<style>body { color: red }</style><script>var x = "<p>not text</p>";</script></head>
+<body>
+<header><h1>Chai</h1><nav><ul><li><a href="/">Home</a></li><li><a href="/api">API</a></li></ul></nav></header>
+<main>
+  <h2>assert.equal(actual, expected)</h2>
+  <p>Asserts non-strict equality (<code>==</code>) of <em>actual</em> and <b>expected</b>.</p>
+  <pre><code>assert.equal(3, '3', '== coerces values to strings');</code></pre>
+  <table><tr><th>Param</th><th>Type</th></tr><tr><td>actual</td><td>Mixed</td></tr></table>
+  <p>Fish &amp; chips &lt;3 &copy; caf&eacute;<br>next line<img src="x.png" alt="x"></p>
+</main>
+<footer><p>&copy; Chai</p></footer>
+</body></html>"""
+
+SAMPLES = {
+    "docs page": DOCS_PAGE,
+    "unclosed nav ends with its parent": "<div><p>Intro</p><nav><a>Menu</a></div><p>Article text</p><p>More</p>",
+    "unclosed nav at the top level": "<p>Before</p><nav><a>Menu</a><p>Swallowed</p>",
+    "unclosed nav in a list item": "<ul><li>One<nav>menu</li><li>Two</li></ul><p>After</p>",
+    "stray end tags": "<p>One</span></nav></div> two</p></footer><p>Three</p>",
+    "unclosed footer inside a section": "<section><p>A</p><footer>legal</section><p>B</p>",
+    "nested skipped elements": "<nav><div><nav>x</nav>y</div>z</nav><p>kept</p>",
+    "inline text around blocks": "text <div>block</div> tail <span>inline</span> more",
+    "unclosed paragraph": "<div><p>One<p>Two</div>Three",
+    "script inside body": "<p>A<script>if (a < b) { document.write('<p>x</p>') }</script>B</p>",
+}
+
+
+@pytest.mark.parametrize("name", list(SAMPLES))
+def test_stream_matches_bs4_on_samples(name):
+    html = SAMPLES[name].encode("utf-8")
+    reference, streamed = SoupExtractor().extract(html), StreamingExtractor().extract(html)
+    assert streamed.text == reference.text
+    assert streamed.blocks == reference.blocks
+
+
+def test_unclosed_nav_does_not_swallow_the_article():
+    page = StreamingExtractor().extract(SAMPLES["unclosed nav ends with its parent"].encode())
+    assert page.blocks == ["Intro", "Article text", "More"]
+
+
+def test_title_and_charset():
+    page = StreamingExtractor().extract(DOCS_PAGE.encode("utf-8"))
+    assert page.title == "Assert | Chai"
+    assert "café" in page.text and "not text" not in page.text and "Home" not in page.text
+    latin1 = '<meta charset="iso-8859-1"><p>caf\xe9</p>'.encode("latin-1")
+    assert StreamingExtractor().extract(latin1).text == "café"
+
+
+TAGS = ["div", "p", "span", "nav", "footer", "li", "ul", "section", "b", "script", "style", "br", "td"]
+
+
+def tag_soup(rng, length=40):
+    parts = []
+    for _ in range(length):
+        kind = rng.random()
+        tag = rng.choice(TAGS)
+        if kind < 0.35:
+            parts.append(f"<{tag}>")
+        elif kind < 0.6:
+            parts.append(f"</{tag}>")
+        else:
+            parts.append(rng.choice(["alpha", "beta gamma", " ", "delta\n", "eps", "<!-- note -->", "<br/>"]))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_stream_matches_bs4_on_tag_soup(seed):
+    html = tag_soup(random.Random(seed)).encode()
+    reference, streamed = SoupExtractor().extract(html), StreamingExtractor().extract(html)
+    assert (streamed.text, streamed.blocks) == (reference.text, reference.blocks), html
@@ -0,0 +1,71 @@
+# test_hybrid.py - BM25 sparse vectors and reciprocal-rank fusion with the dense ranking
+#
+# The hybrid search runs against Qdrant local mode with fake embeddings that carry no
+# meaning, so a chunk naming the query's exact identifier can only make the top k through
+# the lexical ranking.
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+
+from rag_common.hybrid import (RRF_K, HybridQdrantVectorStore, collection_has_lexical, query_sparse_vector,
+                               reciprocal_rank_fusion, sparse_vector, token_index, tokenize)
+from rag_common.pipeline import IngestionPipeline
+
+COLLECTION = "hybrid_test"
+
+
+def doc(name):
+    return Document(page_content=name, id=name)
+
+
+def test_fusion_rewards_agreement_between_rankings():
+    dense = [doc("a"), doc("b"), doc("c")]
+    lexical = [doc("c"), doc("d"), doc("b")]
+    fused = reciprocal_rank_fusion([dense, lexical], limit=3)
+    # b: 1/62 + 1/63 and c: 1/63 + 1/61 beat a: 1/61 alone
+    assert [d.id for d in fused] == ["c", "b", "a"]
+    assert [d.id for d in reciprocal_rank_fusion([dense, lexical], limit=10)] == ["c", "b", "a", "d"]
+
+
+def test_fusion_falls_back_to_content_for_documents_without_ids():
+    fused = reciprocal_rank_fusion([[Document(page_content="x")], [Document(page_content="x")]], limit=5)
+    assert len(fused) == 1
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("How do I fix ERR_REQUIRE_ESM in package.json with ts-node?") == [
+        "fix", "err_require_esm", "package", "json", "ts", "node", "package.json", "ts-node"]
+
+
+def test_bm25_weights_saturate_with_term_frequency():
+    once, thrice = sparse_vector("npm build"), sparse_vector("npm npm npm build")
+    weight = lambda vector, token: vector.values[vector.indices.index(token_index(token))]
+    assert weight(once, "npm") < weight(thrice, "npm") < 2.2  # (K1 + 1) is the ceiling
+    assert query_sparse_vector("npm npm build").values == [1.0, 1.0]
+    assert query_sparse_vector("how is it").indices == []
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+def test_hybrid_search_finds_the_exact_identifier(client):
+    texts = [f"General notes number {n} about setting up a JavaScript project." for n in range(30)]
+    texts.append("Run git stash pop to restore the changes you stashed.")
+    pages = [Document(page_content=text, metadata={"source": f"{n}.md"}) for n, text in enumerate(texts)]
+    embedding = DeterministicFakeEmbedding(size=16)
+    IngestionPipeline(client, COLLECTION, embedding, text_splitter=None).run(pages)
+    assert collection_has_lexical(client, COLLECTION)
+
+    store = HybridQdrantVectorStore(client=client, collection_name=COLLECTION, embedding=embedding,
+                                    validate_collection_config=False, lexical=True)
+    hits = store.hybrid_search("git stash pop", k=3)
+    assert texts[-1] in [hit.page_content for hit in hits]
+
+    store.lexical = False  # falls back to a plain dense search
+    assert len(store.hybrid_search("git stash pop", k=3)) == 3
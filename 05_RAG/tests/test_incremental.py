@@ -0,0 +1,83 @@
+# test_incremental.py - Content-hash point IDs and hash-diffed re-indexing
+#
+# IngestionPipeline runs twice over Qdrant local mode: the second run must embed only new
+# text, reuse the stored vector of a chunk that merely moved, and delete what is gone.
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient, models
+
+from rag_common.hybrid import DENSE_VECTOR
+from rag_common.incremental import chunk_point_id, fetch_point_hashes, fetch_point_sources
+from rag_common.pipeline import IngestionPipeline
+
+COLLECTION = "incremental_test"
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+def run(client, pages, embedding, scope=None):
+    pipeline = IngestionPipeline(client, COLLECTION, embedding, text_splitter=None, batch_size=2, scope=scope)
+    return pipeline.run(pages)
+
+
+def chunk(text, source="a.pdf", page=1):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_point_id_depends_on_text_and_metadata():
+    assert chunk_point_id(chunk("x")) == chunk_point_id(chunk("x"))
+    assert chunk_point_id(chunk("x")) != chunk_point_id(chunk("y"))
+    assert chunk_point_id(chunk("x")) != chunk_point_id(chunk("x", page=2))
+
+
+def test_rerun_embeds_only_new_text_and_deletes_stale_points(client):
+    embedding = CountingEmbedding(size=8, embedded=[])
+    first = run(client, [chunk("one"), chunk("two"), chunk("three")], embedding)
+    assert (first.points_written, first.vectors_embedded) == (3, 3)
+
+    embedding.embedded.clear()
+    # "two" moved to page 2 (new ID, same text), "three" is gone, "four" is new
+    second = run(client, [chunk("one"), chunk("two", page=2), chunk("four")], embedding)
+    assert embedding.embedded == ["four"]
+    assert second.chunks_unchanged == 1
+    assert (second.vectors_reused, second.points_written, second.points_deleted) == (1, 2, 2)
+
+    hashes = fetch_point_hashes(client, COLLECTION)
+    assert set(hashes) == {chunk_point_id(doc) for doc in [chunk("one"), chunk("two", page=2), chunk("four")]}
+    # the moved chunk got the stored vector of "two" (Qdrant keeps cosine vectors normalized)
+    moved = client.retrieve(COLLECTION, [chunk_point_id(chunk("two", page=2))], with_vectors=True)[0]
+    expected = np.array(embedding.embed_query("two"))
+    assert moved.vector[DENSE_VECTOR] == pytest.approx(expected / np.linalg.norm(expected), abs=1e-5)
+
+
+def test_unchanged_rerun_writes_nothing(client):
+    embedding = CountingEmbedding(size=8, embedded=[])
+    pages = [chunk("one"), chunk("two")]
+    run(client, pages, embedding)
+    progress = run(client, pages, embedding)
+    assert (progress.points_written, progress.points_deleted, progress.vectors_embedded) == (0, 0, 0)
+
+
+def test_scoped_run_leaves_other_sources_alone(client):
+    embedding = CountingEmbedding(size=8, embedded=[])
+    run(client, [chunk("one"), chunk("other", source="b.pdf")], embedding)
+    scope = models.Filter(must=[models.FieldCondition(key="metadata.source", match=models.MatchValue(value="a.pdf"))])
+    progress = run(client, [chunk("one, edited")], embedding, scope=scope)
+    assert progress.points_deleted == 1
+    assert sorted(fetch_point_sources(client, COLLECTION).values()) == ["a.pdf", "b.pdf"]
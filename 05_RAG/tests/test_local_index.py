@@ -0,0 +1,140 @@
+# test_local_index.py - Writing to the local index: deletes, compaction, the store and the pipeline
+#
+# LocalIngestionPipeline must leave a local index holding what IngestionPipeline leaves in a
+# Qdrant collection given the same runs, so each scenario is run against both and compared.
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient, models
+
+from rag_common import clients
+from rag_common.dedup import NearDuplicateFilter
+from rag_common.local_index import LocalIngestionPipeline, LocalReplicaStore, LocalVectorIndex
+from rag_common.pipeline import CONTENT_KEY, DUPLICATES_KEY, METADATA_KEY, IngestionPipeline
+
+SHARED = ("Install the dependencies with npm ci before running the build, because it uses the exact "
+          "versions from the lock file and fails when package.json and the lock file disagree.")
+COLLECTION = "local_test"
+
+
+def page(link, text):
+    return Document(page_content=text, metadata={"link": link})
+
+
+def scope(*links):
+    return models.Filter(must=[models.FieldCondition(key="metadata.link", match=models.MatchAny(any=list(links)))])
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LocalVectorIndex.create(str(tmp_path / "index"), 4, capacity=2)
+    yield index
+    index.close()
+
+
+def test_delete_is_kept_on_disk(index):
+    index.add(["a", "b", "c"], [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]], ["A", "B", "C"], [{}, {}, {"n": 3}])
+    assert index.delete(["b", "missing"]) == 1
+    assert (len(index), index.dead_rows) == (2, 1)
+    assert "b" not in [point_id for point_id, *_ in index.search([0, 1, 0, 0], k=3)]
+    reopened = LocalVectorIndex(index.directory)
+    assert sorted(reopened.get(["a", "b", "c"])) == ["a", "c"]
+    assert reopened.count(lambda metadata: metadata.get("n") == 3) == 1
+    reopened.close()
+
+
+def test_compact_drops_dead_rows_only(index):
+    index.add(["a", "b"], [[1, 0, 0, 0], [0, 1, 0, 0]], ["A", "B"], [{}, {}])
+    index.add(["a"], [[0, 0, 1, 0]], ["A2"], [{"v": 2}])  # replaces a: one dead row
+    index.update({"b": {"also_in": [{"link": "x"}]}}, {"b": [{"id": "x", CONTENT_KEY: "B", METADATA_KEY: {}}]})
+    compacted = index.compact()
+    assert (len(compacted), compacted.dead_rows) == (2, 0)
+    assert compacted.get(["a"]) == {"a": ("A2", {"v": 2})}
+    assert compacted.duplicates() == {"b": [{"id": "x", CONTENT_KEY: "B", METADATA_KEY: {}}]}
+    assert compacted.search([0, 0, 1, 0], k=1)[0][0] == "a"
+    compacted.close()
+
+
+def test_store_adds_and_deletes_texts(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=8)
+    store = LocalReplicaStore.from_texts(["npm ci", "git stash pop"], embedding, metadatas=[{"n": 1}, {"n": 2}],
+                                         ids=["a", "b"], directory=str(tmp_path / "index"))
+    assert store.add_texts(["docker compose up"], ids=["c"]) == ["c"]
+    assert store.similarity_search("docker compose up", k=1)[0].id == "c"
+    assert store.delete(["a"])
+    assert {doc.id for doc in store.similarity_search("npm ci", k=5)} == {"b", "c"}
+
+    # from_texts on an existing index adds to it
+    again = LocalReplicaStore.from_texts(["yarn install"], embedding, ids=["d"], directory=str(tmp_path / "index"))
+    assert len(again.index) == 3
+
+
+def qdrant_points(client):
+    points, _ = client.scroll(COLLECTION, limit=100, with_payload=True)
+    return {point.payload[METADATA_KEY]["link"]: (point.payload[CONTENT_KEY], point.payload[METADATA_KEY],
+                                                  point.payload.get(DUPLICATES_KEY) or []) for point in points}
+
+
+def local_points(index):
+    duplicates = index.duplicates()
+    return {metadata["link"]: (text, metadata, duplicates.get(point_id, []))
+            for point_id, text, metadata in index.points()}
+
+
+RUNS = [
+    ([page("a", SHARED), page("b", SHARED), page("c", "A page about PostgreSQL in Docker.")], None),
+    ([page("a", "Something else entirely about rate limiting in nginx.")], ["a"]),  # b's text lived in a's point
+    ([page("c", "PostgreSQL in Docker, with a named volume.")], ["c"]),
+]
+
+
+def test_local_pipeline_matches_qdrant(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=16)
+    client = QdrantClient(":memory:")
+    local = None
+    for pages, links in RUNS:
+        kwargs = dict(text_splitter=None, batch_size=1, scope=scope(*links) if links else None,
+                      dedup=NearDuplicateFilter(0.9))
+        expected = IngestionPipeline(client, COLLECTION, embedding, **kwargs).run(pages)
+        local = LocalIngestionPipeline(COLLECTION, embedding, directory=str(tmp_path / "index"), **kwargs)
+        progress = local.run(pages)
+        assert (progress.points_written, progress.points_deleted, progress.chunks_deduplicated) == (
+            expected.points_written, expected.points_deleted, expected.chunks_deduplicated)
+        assert local_points(local.index) == qdrant_points(client)
+    assert set(local_points(local.index)) == {"a", "b", "c"}
+    client.close()
+
+
+def test_unchanged_chunks_are_not_written_again(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=16)
+    pages = [page("a", "npm ci installs from the lock file."), page("b", "git stash pop restores changes.")]
+    first = LocalIngestionPipeline(COLLECTION, embedding, None, directory=str(tmp_path / "index")).run(pages)
+    second = LocalIngestionPipeline(COLLECTION, embedding, None, directory=str(tmp_path / "index")).run(pages)
+    assert (first.points_written, second.points_written, second.chunks_unchanged) == (2, 0, 2)
+
+
+def test_pipeline_compacts_once_dead_rows_outnumber_points(tmp_path):
+    embedding = DeterministicFakeEmbedding(size=16)
+    directory = str(tmp_path / "index")
+    for n in range(3):
+        pipeline = LocalIngestionPipeline(COLLECTION, embedding, None, directory=directory)
+        pipeline.run([page("a", f"Version {n} of the install guide.")])
+    assert (len(pipeline.index), pipeline.index.dead_rows) == (1, 0)
+
+
+def test_local_backend_ingests_and_answers_without_qdrant(monkeypatch):
+    monkeypatch.setattr(clients, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(clients, "get_embedding_model", lambda model, dimensions: DeterministicFakeEmbedding(size=8))
+    monkeypatch.setattr(clients, "sized_embedding_model",
+                        lambda name, stored, model, dimensions: DeterministicFakeEmbedding(size=8))
+    pipeline = clients.get_ingestion_pipeline(None, "offline_test", None)
+    assert isinstance(pipeline, LocalIngestionPipeline)
+    pipeline.run([page("a", "npm ci installs from the lock file.")])
+
+    store = clients.get_vector_store(None, "offline_test")
+    assert [doc.page_content for doc in store.hybrid_search("npm ci", k=1)] == ["npm ci installs from the lock file."]
+    # a second run is seen by the next query
+    clients.get_ingestion_pipeline(None, "offline_test", None, delete_stale=False).run(
+        [page("b", "git stash pop restores changes.")])
+    assert len(clients.get_vector_store(None, "offline_test").index) == 2
@@ -0,0 +1,85 @@
+# test_page_cache.py - Extracted page text cached by file content
+#
+# PDFs come from the write_pdf fixture and are extracted in-process (max_workers=1, no page
+# timeout). A cached PDF must come back without pypdf opening it, whatever path or buffer
+# it arrives as.
+
+import pytest
+
+from rag_common import pdf_extract
+from rag_common.page_cache import PageCache
+from rag_common.pdf_extract import lazy_load_pdf_buffer, lazy_load_pdf_parallel
+
+
+def load(path, cache, **kwargs):
+    return list(lazy_load_pdf_parallel(path, max_workers=1, page_timeout=None, page_cache=cache, **kwargs))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(str(tmp_path / "pages.sqlite"))
+
+
+def forbid_parsing(monkeypatch):
+    def open_pdf(pdf):
+        raise AssertionError("a cached PDF was opened")
+    monkeypatch.setattr(pdf_extract, "open_pdf", open_pdf)
+
+
+def test_second_load_is_served_without_parsing(cache, write_pdf, tmp_path, monkeypatch):
+    path = write_pdf(tmp_path / "guide.pdf", "First page", "Second page")
+    first = load(path, cache)
+    assert [doc.page_content for doc in first] == ["First page", "Second page"]
+    assert cache.stats()["misses"] == 0 and cache.stats()["pages"] == 2
+
+    forbid_parsing(monkeypatch)
+    copy = tmp_path / "renamed.pdf"
+    copy.write_bytes(open(path, "rb").read())
+    second = load(str(copy), cache)
+    assert [doc.page_content for doc in second] == ["First page", "Second page"]
+    assert [doc.metadata["source"] for doc in second] == [str(copy)] * 2
+    assert [doc.metadata["page"] for doc in second] == [0, 1]
+    assert cache.hits == 2
+
+
+def test_uploads_share_entries_with_files_on_disk(cache, write_pdf, tmp_path, monkeypatch):
+    path = write_pdf(tmp_path / "guide.pdf", "Only page")
+    load(path, cache)
+    forbid_parsing(monkeypatch)
+    with open(path, "rb") as f:
+        docs = list(lazy_load_pdf_buffer(f, max_workers=1, page_timeout=None, source="upload.pdf", page_cache=cache))
+    assert [(doc.page_content, doc.metadata["source"]) for doc in docs] == [("Only page", "upload.pdf")]
+
+
+def test_failed_pages_are_not_cached(cache):
+    cache.put_file("f", {}, 2)
+    cache.put_pages("f", [(0, "1", "text"), (1, "2", None)])
+    cached = cache.get("f")
+    assert not cached.complete
+    assert cached.has_range(0, 1) and not cached.has_range(0, 2)
+
+
+def test_another_extractor_version_misses(tmp_path):
+    path = str(tmp_path / "pages.sqlite")
+    PageCache(path, version="v1").put_file("f", {}, 1)
+    assert PageCache(path, version="v2").get("f") is None
+    assert PageCache(path, version="v1").total_pages("f") == 1
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite"), max_bytes=25)
+    for name in ["a", "b"]:
+        cache.put_file(name, {}, 1)
+        cache.put_pages(name, [(0, "1", name * 10)])
+    cache.get("a")  # "b" is now the least recently used
+    cache.put_file("c", {}, 1)
+    cache.put_pages("c", [(0, "1", "c" * 10)])
+    assert [cache.total_pages(name) for name in "abc"] == [1, None, 1]
+
+
+def test_ingested_files_are_remembered_per_collection(cache):
+    cache.mark_ingested("docs", "guide.pdf", "h1")
+    assert cache.ingested_hash("docs", "guide.pdf") == "h1"
+    assert cache.ingested_hash("other", "guide.pdf") is None
+    cache.forget_collection("docs")
+    assert cache.ingested_hash("docs", "guide.pdf") is None
@@ -0,0 +1,71 @@
+# test_pdf_extract.py - Page-parallel extraction and pages that fail to extract
+#
+# A page whose extraction raises (as a timed-out page does) must come out flagged, and an
+# ingestion of the file must then keep the chunks stored from it and not record the file
+# as finished in its checkpoint.
+
+import pypdf
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.chunking import TokenTextChunker
+from rag_common.incremental import fetch_point_sources
+from rag_common.pdf_extract import lazy_load_pdf_parallel, load_pdf_parallel
+from rag_common.pipeline import FAILED_KEY, IngestionPipeline
+
+COLLECTION = "pdf_test"
+
+
+def break_pages(monkeypatch):
+    """From now on, pages whose text contains "Broken" raise while being extracted"""
+    extract_text = pypdf.PageObject.extract_text
+
+    def extract(page, *args, **kwargs):
+        text = extract_text(page, *args, **kwargs)
+        if "Broken" in text:
+            raise TimeoutError("page took too long")
+        return text
+    monkeypatch.setattr(pypdf.PageObject, "extract_text", extract)
+
+
+class RecordingCheckpoint(IngestCheckpoint):
+    committed: list
+
+    def commit_source(self, source, point_ids, folds=()):
+        self.committed.append(source)
+        super().commit_source(source, point_ids, folds)
+
+
+def test_pages_keep_their_order_and_metadata(write_pdf, tmp_path):
+    path = write_pdf(tmp_path / "guide.pdf", *[f"Page {n}" for n in range(9)])
+    docs = load_pdf_parallel(path, max_workers=3, page_timeout=None, pages_per_task=2, source="guide.pdf")
+    assert [doc.page_content for doc in docs] == [f"Page {n}" for n in range(9)]
+    assert [(doc.metadata["page"], doc.metadata["page_label"]) for doc in docs] == [(n, str(n + 1)) for n in range(9)]
+    assert {doc.metadata["source"] for doc in docs} == {"guide.pdf"}
+
+
+def test_a_failed_page_is_flagged(write_pdf, tmp_path, monkeypatch):
+    break_pages(monkeypatch)
+    path = write_pdf(tmp_path / "guide.pdf", "Fine page", "Broken page")
+    docs = list(lazy_load_pdf_parallel(path, max_workers=1, page_timeout=None))
+    assert [(doc.page_content, doc.metadata.get(FAILED_KEY)) for doc in docs] == [("Fine page", None), ("", True)]
+
+
+def test_a_failed_page_keeps_the_stored_chunks_of_its_file(write_pdf, tmp_path, monkeypatch):
+    client = QdrantClient(":memory:")
+    pipeline = IngestionPipeline(client, COLLECTION, DeterministicFakeEmbedding(size=8),
+                                 text_splitter=TokenTextChunker(chunk_size=50, chunk_overlap=10))
+    path = write_pdf(tmp_path / "guide.pdf", "Install with npm ci.", "Broken page about Docker volumes.")
+    pipeline.run(load_pdf_parallel(path, max_workers=1, page_timeout=None))
+    assert len(fetch_point_sources(client, COLLECTION)) == 2
+
+    # the Docker page times out on the next run: its chunk must not be deleted as stale
+    break_pages(monkeypatch)
+    checkpoint = RecordingCheckpoint(str(tmp_path / "job.sqlite"))
+    checkpoint.committed = []
+    progress = pipeline.run(load_pdf_parallel(path, max_workers=1, page_timeout=None), checkpoint=checkpoint)
+    assert (progress.pages_failed, progress.points_deleted) == (1, 0)
+    assert len(fetch_point_sources(client, COLLECTION)) == 2
+    assert checkpoint.committed == []  # the file is not finished: a resumed run extracts it again
+    client.close()
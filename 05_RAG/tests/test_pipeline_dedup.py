@@ -0,0 +1,114 @@
+# test_pipeline_dedup.py - Near-duplicate folding across scoped (incremental) pipeline runs
+#
+# Runs IngestionPipeline against Qdrant local mode with fake embeddings: page "b" repeats
+# page "a", so its chunk is folded into a's. Later runs restricted to the changed page, or
+# adding other pages without a scope, must neither lose b's text nor keep listing pages
+# whose chunks were decided again.
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient, models
+
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.dedup import NearDuplicateFilter
+from rag_common.pipeline import DUPLICATES_KEY, IngestionPipeline
+
+SHARED = ("Install the dependencies with npm ci before running the build, because it uses the exact "
+          "versions from the lock file and fails when package.json and the lock file disagree.")
+COLLECTION = "dedup_test"
+
+
+def page(link: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"link": link})
+
+
+def scope(*links: str) -> models.Filter:
+    return models.Filter(must=[models.FieldCondition(key="metadata.link", match=models.MatchAny(any=list(links)))])
+
+
+def run(client, pages, links=None, embedding=None, checkpoint=None, delete_stale=True):
+    pipeline = IngestionPipeline(client, COLLECTION, embedding or DeterministicFakeEmbedding(size=16),
+                                 text_splitter=None, batch_size=1, scope=scope(*links) if links else None,
+                                 delete_stale=delete_stale, dedup=NearDuplicateFilter(0.9))
+    return pipeline.run(pages, checkpoint=checkpoint)
+
+
+def stored(client):
+    points, _ = client.scroll(COLLECTION, limit=100, with_payload=True)
+    return {point.payload["metadata"]["link"]: point.payload for point in points}
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+def test_folded_chunk_is_kept_when_its_kept_page_changes(client):
+    run(client, [page("a", SHARED), page("b", SHARED)], ["a", "b"])
+    assert set(stored(client)) == {"a"}
+    assert [entry["metadata"]["link"] for entry in stored(client)["a"][DUPLICATES_KEY]] == ["b"]
+
+    # only "a" changed: "b" is out of scope, but its text lived in a's point
+    run(client, [page("a", "Something else entirely about rate limiting in nginx.")], ["a"])
+    points = stored(client)
+    assert set(points) == {"a", "b"}
+    assert points["b"]["page_content"] == SHARED
+    assert "Something else" in points["a"]["page_content"]
+
+
+def test_also_in_forgets_pages_decided_again(client):
+    run(client, [page("a", SHARED), page("b", SHARED)], ["a", "b"])
+    assert [dup["link"] for dup in stored(client)["a"]["metadata"]["also_in"]] == ["b"]
+
+    # "b" changed and no longer repeats "a": a's point is out of scope but must stop listing it
+    run(client, [page("b", "A page about PostgreSQL in Docker.")], ["b"])
+    points = stored(client)
+    assert set(points) == {"a", "b"}
+    assert "also_in" not in points["a"]["metadata"]
+    assert points["a"][DUPLICATES_KEY] == []
+
+
+def test_unscoped_run_keeps_folds_of_pages_it_did_not_see(client):
+    # a bulk run over one directory, then one over another directory into the same collection
+    run(client, [page("a", SHARED), page("b", SHARED)], delete_stale=False)
+    run(client, [page("c", "A page about PostgreSQL in Docker.")], delete_stale=False)
+    points = stored(client)
+    assert set(points) == {"a", "c"}
+    assert [entry["metadata"]["link"] for entry in points["a"][DUPLICATES_KEY]] == ["b"]
+    assert [dup["link"] for dup in points["a"]["metadata"]["also_in"]] == ["b"]
+
+
+def test_full_run_forgets_folds_of_pages_that_are_gone(client):
+    run(client, [page("a", SHARED), page("b", SHARED)])
+    # the whole collection again, without "b"
+    run(client, [page("a", SHARED)])
+    points = stored(client)
+    assert set(points) == {"a"}
+    assert points["a"][DUPLICATES_KEY] == []
+
+
+def test_folds_survive_a_resumed_run(client, tmp_path):
+    class FailOnce(DeterministicFakeEmbedding):
+        failed: bool = False
+
+        def embed_documents(self, texts):
+            if not self.failed and any("boom" in text for text in texts):
+                self.failed = True
+                raise RuntimeError("embedding API down")
+            return super().embed_documents(texts)
+
+    pages = [page("a", SHARED), page("b", SHARED), page("c", "boom: a page whose embedding fails once")]
+    embedding = FailOnce(size=16)
+    checkpoint = IngestCheckpoint(str(tmp_path / "checkpoint.sqlite"), source_key="link")
+    with pytest.raises(RuntimeError):
+        run(client, pages, ["a", "b", "c"], embedding, checkpoint)
+    assert checkpoint.done_sources() == {"a", "b"}
+
+    progress = run(client, pages, ["a", "b", "c"], embedding, checkpoint)
+    assert progress.pages_resumed == 2
+    points = stored(client)
+    assert set(points) == {"a", "c"}
+    assert [dup["link"] for dup in points["a"]["metadata"]["also_in"]] == ["b"]
@@ -0,0 +1,60 @@
+# test_snapshot.py - Exporting a collection to a columnar snapshot and restoring it
+#
+# Both kinds of Qdrant point IDs must survive the round trip: the content-hash UUIDs the
+# pipeline writes, and the integer IDs of collections filled by other tools.
+
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient, models
+
+from rag_common.collection_profiles import get_profile
+from rag_common.hybrid import DENSE_VECTOR
+from rag_common.pipeline import CONTENT_KEY, METADATA_KEY
+from rag_common.snapshot import export_collection, point_id, restore_collection, snapshot_info
+
+IDS = [0, 7, str(uuid.UUID(int=12345))]
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    client.create_collection("source", vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE))
+    client.upsert("source", points=[
+        models.PointStruct(id=pid, vector=[1.0, float(n), 0.5, 0.0],
+                           payload={CONTENT_KEY: f"chunk {n}", METADATA_KEY: {"source": "a.pdf", "page": n}})
+        for n, pid in enumerate(IDS)
+    ])
+    yield client
+    client.close()
+
+
+@pytest.mark.parametrize("name", ["source.arrow", "source.parquet"])
+def test_round_trip_keeps_ids_payloads_and_vectors(client, tmp_path, name):
+    path = str(tmp_path / name)
+    assert export_collection(client, "source", path) == 3
+    info = snapshot_info(path)
+    assert (info["rows"], info["dimensions"], info["dtype"]) == (3, "4", "float16")
+
+    assert restore_collection(path, client, "copy", profile=get_profile("default")) == 3
+    original = {point.id: point for point in client.retrieve("source", IDS, with_vectors=True)}
+    restored = {point.id: point for point in client.retrieve("copy", IDS, with_vectors=True)}
+    assert set(restored) == set(original) == {0, 7, IDS[2]}
+    for pid, point in original.items():
+        assert restored[pid].payload[CONTENT_KEY] == point.payload[CONTENT_KEY]
+        assert restored[pid].payload[METADATA_KEY] == point.payload[METADATA_KEY]
+        # the default profile adds BM25 vectors, so the dense one is named
+        assert np.allclose(restored[pid].vector[DENSE_VECTOR], point.vector, atol=1e-3)
+
+
+def test_restore_never_overwrites_a_collection(client, tmp_path):
+    path = str(tmp_path / "source.arrow")
+    export_collection(client, "source", path)
+    with pytest.raises(ValueError):
+        restore_collection(path, client, "source")
+
+
+def test_point_ids_are_read_back_with_their_type():
+    assert point_id("42") == 42
+    assert point_id(IDS[2]) == IDS[2]
@@ -1,22 +1,22 @@
-from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings
-from openai import OpenAI
+import os
+import sys
 
 from dotenv import load_dotenv
 
-load_dotenv()
-client = OpenAI()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.answer_cache import get_answer_cache
+from rag_common.clients import get_openai_client, get_qdrant_client, get_vector_store
+from rag_common.context_packer import ContextPacker
 
+load_dotenv()
+client = get_openai_client()
 
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small"
-)
 
-vector_store = QdrantVectorStore.from_existing_collection(
-    collection_name="chai_docs_youtube",
-    url="http://localhost:6333",
-    embedding=embedding_model
-)
+# Cached: asking the same question again does not call the embeddings API.
+# Query vectors get the size the collection was indexed with; the collection is looked up once
+vector_store = get_vector_store(get_qdrant_client("http://localhost:6333"), "chai_docs_youtube")
+if vector_store is None:
+    sys.exit("Collection 'chai_docs_youtube' not found, run indexing.py first")
 # Display welcome message
 print("="*50)
 print("🌟 Welcome to the Chai Docs Assistant! 🌟")
@@ -27,14 +27,33 @@ print("Currently the documentation contains: HTML, Git, C++, Django, SQL, DevOps
 print("="*50)
 print("Enter your question below:")
 query = input("> ")
-results = vector_store.similarity_search(
-    query
-)
+
+# Asked before (or something close enough) since the collection was last indexed: no search, no LLM call
+answer_cache = get_answer_cache()
+context_packer = ContextPacker(lambda content, metadata: (
+    f"Page Title: {metadata['title']}\nPage Content: {content}\nSource Link: {metadata['link']}\n"
+    # near-duplicate chunks dropped at indexing time are listed on the one that was kept
+    f"Also At: {', '.join(dup.get('link', '') for dup in metadata.get('also_in', [])) or '-'}"
+))
+CACHE_VARIANT = f"gpt-4.1-mini/k4/hybrid/ctx{context_packer.budget}"
+version = answer_cache.collection_version("chai_docs_youtube")
+cached = answer_cache.get_exact("chai_docs_youtube", CACHE_VARIANT, query)
+query_vector = None
+if cached is None:
+    query_vector = vector_store.embeddings.embed_query(query)
+    cached = answer_cache.get_similar("chai_docs_youtube", CACHE_VARIANT, query_vector)
+if cached is not None:
+    print(f"☕️ {cached.answer}")
+    sys.exit(0)
+
+# Dense and BM25 rankings fused: exact commands and identifiers in the question are found too
+# (with the ef/rescoring of the profile the collection was built with, read from its config)
+results = vector_store.hybrid_search(query, query_vector)
 # print(results)
-context = "\n\n".join([
-    f"{idx+1}\nPage Title: {res.metadata['title']}\nPage Content: {res.page_content}\nSource Link: {res.metadata['link']}\n\n"
-    for idx, res in enumerate(results)
-])
+# Overlapping chunks of a page merged into one span under one header, packed into the token budget
+packed = context_packer.pack(results)
+print(f"🧩 {packed.summary()}")
+context = packed.text
 
 # print(context)
 
@@ -63,4 +82,6 @@ def gpt_mini():
     return response.choices[0].message.content
 
 
-print(f"☕️ {gpt_mini()}")
+answer = gpt_mini()
+answer_cache.put("chai_docs_youtube", CACHE_VARIANT, query, answer, query_vector, version)
+print(f"☕️ {answer}")
@@ -1,68 +1,70 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from langchain_core.documents import Document
-import time
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_qdrant import QdrantVectorStore
-
-
-def scrape_chai_docs(urls):
-    docs = []
-
-    for i, url in enumerate(urls):
-        print(f"Scraping {i+1}/{len(urls)}: {url}")
-
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Remove unwanted elements
-            for element in soup(["script", "style", "nav", "footer"]):
-                element.extract()
-
-            # Extract text content
-            content = soup.get_text(separator=' ', strip=True)
-            content = ' '.join(content.split())  # Clean whitespace
-
-            # Create document
-            # Extract custom title from URL
-            try:
-                # Example: https://chaidocs.vercel.app/youtube/chai-aur-git/diff-stash-tags/
-                parts = url.strip('/').split('/')
-                # Find the segment after 'youtube'
-                youtube_idx = parts.index('youtube')
-                course = parts[youtube_idx + 1]  # e.g., 'chai-aur-git'
-                lesson = parts[youtube_idx + 2]  # e.g., 'diff-stash-tags'
-                # Format course and lesson
-                course_title = course.replace('chai-aur-', '').replace('-', ' ').strip()
-                lesson_title = lesson.replace('-', ' ').strip()
-                custom_title = f"{course_title} - {lesson_title}"
-            except Exception:
-                custom_title = soup.title.string if soup.title else ""
-
-            doc = Document(
-                page_content=content,
-                metadata={
-                    "link": url,
-                    "title": custom_title,
-                }
-            )
-
-            docs.append(doc)
-
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-
-        time.sleep(0.5)  # Be nice to the server
-
-    return docs
-
-
-# Your URLs
-urls = [
+from qdrant_client import QdrantClient, models
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rag_common.boilerplate import BoilerplateStripper
+from rag_common.checkpoint import IngestCheckpoint
+from rag_common.chunking import TokenTextChunker
+from rag_common.crawl_cache import CrawlCache
+from rag_common.crawler import AsyncCrawler
+from rag_common.collection_config import get_collection_embedding_model
+from rag_common.collection_profiles import get_profile
+from rag_common.dedup import get_dedup_filter
+from rag_common.frontier import Frontier, discover
+from rag_common.html_extract import get_extractor
+from rag_common.pipeline import IngestionPipeline
+from rag_common.snapshot import default_snapshot_path, export_collection
+
+
+# HTML-to-text backend: "stream" (single pass, no tree) or "bs4" (full BeautifulSoup tree)
+EXTRACTOR = get_extractor(os.getenv("HTML_EXTRACTOR", "stream"))
+
+
+def parse_chai_doc(url, content):
+    # Visible text without script/style/nav/footer, one line per block (paragraph, list item, ...)
+    page = EXTRACTOR.extract(content)
+
+    # Create document
+    # Extract custom title from URL
+    try:
+        # Example: https://chaidocs.vercel.app/youtube/chai-aur-git/diff-stash-tags/
+        parts = url.strip('/').split('/')
+        # Find the segment after 'youtube'
+        youtube_idx = parts.index('youtube')
+        course = parts[youtube_idx + 1]  # e.g., 'chai-aur-git'
+        lesson = parts[youtube_idx + 2]  # e.g., 'diff-stash-tags'
+        # Format course and lesson
+        course_title = course.replace('chai-aur-', '').replace('-', ' ').strip()
+        lesson_title = lesson.replace('-', ' ').strip()
+        custom_title = f"{course_title} - {lesson_title}"
+    except Exception:
+        custom_title = page.title
+
+    return Document(
+        page_content="\n".join(page.blocks),
+        metadata={
+            "link": url,
+            "title": custom_title,
+        }
+    )
+
+
+def scrape_chai_docs(urls, concurrency=8, rate_per_host=4.0, crawl_cache=None):
+    # Pages are fetched concurrently over one keep-alive session; the per-host
+    # token bucket (rate_per_host requests/second) keeps us nice to the server.
+    # With a crawl_cache, requests are conditional and unchanged pages are left out
+    # HTML parsing runs in a process pool, so it never competes with the fetchers
+    crawler = AsyncCrawler(concurrency=concurrency, rate_per_host=rate_per_host, cache=crawl_cache)
+    with ProcessPoolExecutor() as parse_pool:
+        return asyncio.run(crawler.crawl(urls, parse_chai_doc, executor=parse_pool))
+
+
+# Known lesson pages: seeds for link discovery when the sitemap is unavailable
+seed_urls = [
     'https://chaidocs.vercel.app/youtube/chai-aur-html/introduction/',
     'https://chaidocs.vercel.app/youtube/chai-aur-html/emmit-crash-course/',
     'https://chaidocs.vercel.app/youtube/chai-aur-html/html-tags/',
@@ -107,36 +109,87 @@ urls = [
     'https://chaidocs.vercel.app/youtube/chai-aur-devops/node-logger/'
 ]
 
-# Scrape all URLs
-docs = scrape_chai_docs(urls)
-print(f"Scraped {len(docs)} documents")
-
-
-# print(docs[4])
-# print(docs[5])
-
-#step-2:
-# Chunking
-print("chunking.....")
-text_splitter = RecursiveCharacterTextSplitter(
-    # Set a really small chunk size, just to show.
-    chunk_size=1000,
-    chunk_overlap=200,
-    length_function=len,
-    is_separator_regex=False,
-)
-splited_doc = text_splitter.split_documents(documents=docs)
-print("Vector Embeddings...")
-
-# Vector Embeddings
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small"
-)
-
-qdrant = QdrantVectorStore.from_documents(
-    documents = splited_doc,
-    embedding = embedding_model,
-    url='http://localhost:6333',
-    prefer_grpc=True,  # Uses port 6334
-    collection_name="chai_docs_youtube",
-)
\ No newline at end of file
+# The parse process pool re-imports this file in its workers on macOS/Windows,
+# so everything that does work has to live under the main guard
+if __name__ == "__main__":
+    SITE_SCOPE = 'https://chaidocs.vercel.app/youtube/'  # only URLs under this prefix are indexed
+    SITEMAP_URL = 'https://chaidocs.vercel.app/sitemap-index.xml'
+    COLLECTION_NAME = "chai_docs_youtube"
+    qdrant_client = QdrantClient(url='http://localhost:6333', prefer_grpc=True)  # Uses port 6334
+
+    # ETag / Last-Modified / content hash of every page, and the frontier of known URLs
+    # with their sitemap lastmod, as of the last successful run.
+    # Forget them if the collection is gone, otherwise nothing would be re-indexed
+    crawl_cache = CrawlCache()
+    frontier = Frontier()
+    # Sizes are in tokens of the embedding model (250 tokens is about 1000 characters)
+    text_splitter = TokenTextChunker(
+        chunk_size=250,
+        chunk_overlap=50,
+        model="text-embedding-3-small",
+    )
+    # Pages and points written so far by a run that did not complete (with these chunk settings)
+    checkpoint = IngestCheckpoint.for_job(COLLECTION_NAME, run_key=f"{text_splitter.chunk_size}/{text_splitter.chunk_overlap}",
+                                          source_key="link")
+    if not qdrant_client.collection_exists(COLLECTION_NAME):
+        crawl_cache.reset()
+        frontier.reset_indexed()
+        checkpoint.clear()
+
+    # Discover URLs from the sitemap (or by following links from the seeds), then
+    # scrape only the ones that are new or whose lastmod moved since they were indexed
+    asyncio.run(discover(frontier, SITE_SCOPE, sitemap_url=SITEMAP_URL, seeds=seed_urls))
+    due_urls = frontier.due()
+    removed_urls = frontier.removed()
+    print(f"{len(due_urls)} URLs due, {len(removed_urls)} removed from the site")
+
+    # Pages whose chunks an interrupted run already wrote are not fetched again
+    resumed_urls = checkpoint.done_sources()
+    if resumed_urls:
+        print(f"Resuming: {len(resumed_urls)} pages were indexed by the interrupted run")
+
+    docs = scrape_chai_docs([url for url in due_urls if url not in resumed_urls], crawl_cache=crawl_cache)
+    print(f"Scraped {len(docs)} new or changed documents, {len(crawl_cache.unchanged)} unchanged")
+
+    # Sidebars, lesson lists and headers repeat on every page: blocks found on more than
+    # BOILERPLATE_RATIO of the site's pages are dropped before chunking. Block counts are
+    # kept for the whole site, so the few pages of an incremental run are judged against all
+    boilerplate = BoilerplateStripper(ratio=float(os.getenv("BOILERPLATE_RATIO", "0.5")), key="link")
+    boilerplate.forget(removed_urls)
+    docs = boilerplate.strip_all(docs)
+    print(boilerplate.summary())
+
+    # Vector Embeddings (cached on disk, so re-runs never re-embed the same text).
+    # A new collection gets EMBEDDING_DIMENSIONS (e.g. 512) dimensions, an existing one keeps its size
+    embedding_model = get_collection_embedding_model(qdrant_client, COLLECTION_NAME)
+
+    # Point IDs are content hashes: only pages whose text changed get re-embedded,
+    # and chunks of pages that changed or were removed from the site are deleted.
+    # The stale-point diff is limited to those pages, everything else is left alone
+    changed_links = sorted({doc.metadata["link"] for doc in docs} | set(removed_urls) | resumed_urls)
+    changed_scope = models.Filter(must=[
+        models.FieldCondition(key="metadata.link", match=models.MatchAny(any=changed_links or [""]))
+    ])
+    pipeline = IngestionPipeline(
+        client=qdrant_client,
+        collection_name=COLLECTION_NAME,
+        embedding=embedding_model,
+        text_splitter=text_splitter,
+        scope=changed_scope,
+        profile=get_profile(),  # COLLECTION_PROFILE, e.g. bulk-load for the first full crawl
+        dedup=get_dedup_filter(),  # drops near-identical chunks (DEDUP_THRESHOLD, default 0.9)
+    )
+    stats = pipeline.run(docs, total_pages=len(docs), checkpoint=checkpoint)
+    crawl_cache.commit()
+    frontier.mark_indexed([url for url in due_urls if url not in crawl_cache.failed], removed_urls)
+    print(f"{stats.chunks_produced} chunks: {stats.chunks_unchanged} unchanged, "
+          f"{stats.vectors_embedded} embedded, {stats.points_deleted} stale deleted")
+    if pipeline.dedup:
+        print(pipeline.dedup.summary())
+    print(f"Embedding cache: {embedding_model.cache.stats()}")
+
+    # Chunks and vectors as a memory-mappable Arrow file, to rebuild the collection
+    # without embedding calls: python -m rag_common.snapshot restore <path> <new collection>
+    if qdrant_client.collection_exists(COLLECTION_NAME):
+        snapshot_path = default_snapshot_path(COLLECTION_NAME)
+        print(f"Snapshot: {export_collection(qdrant_client, COLLECTION_NAME, snapshot_path)} points in {snapshot_path}")